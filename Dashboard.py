@@ -1,12 +1,14 @@
 # app.py - Main Dashboard Page (AI Job Market Explorer)
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-import requests
 from datetime import datetime, timedelta
 
+from utils.data_access import (
+    current_dataset_version, load_jobs, dataset_rows, get_sample, get_stored_sample, get_salary_sketches
+)
+from utils.query_engine import get_engine, get_sample_engine, approximate_rows
+from utils.figures import figure_for, rates_version, THEME_COLORS, APPROXIMATE_FIGURES
+from utils.sketches import group_sketches, sketch_quantiles
+
 # Page config
 st.set_page_config(
     page_title="AI Job Market Explorer",
@@ -28,6 +30,9 @@ if 'last_rate_update' not in st.session_state:
 # Fetch real-time currency rates
 @st.cache_data(ttl=3600)
 def fetch_currency_rates():
+    # Imported here so requests only loads when rates actually need fetching
+    import requests
+
     try:
         response = requests.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=5)
         if response.status_code == 200:
@@ -180,10 +185,7 @@ def apply_theme():
 apply_theme()
 
 def get_theme_colors():
-    if st.session_state.theme == 'dark':
-        return {'bg': '#0e1117', 'paper_bg': '#262730', 'text': '#fafafa', 'grid': '#3b3b3b'}
-    else:
-        return {'bg': '#ffffff', 'paper_bg': '#f8f9fa', 'text': '#1a1a2e', 'grid': '#cbd5e0'}
+    return THEME_COLORS[st.session_state.theme]
 
 theme_colors = get_theme_colors()
 
@@ -231,103 +233,54 @@ with st.sidebar:
     if st.session_state.last_rate_update:
         st.caption(f"Rates updated: {st.session_state.last_rate_update.strftime('%Y-%m-%d %H:%M')}")
 
-# Title
-st.title("AI Job Market Explorer")
-st.markdown("Discover insights from 2,000+ AI/ML job postings (Oct 2024 - Jul 2025)")
-
-# Helper function to categorize work type (hybrid = between 0% and 100% exclusive)
-def categorize_work_type(ratio):
-    if ratio == 0:
-        return 'On-site'
-    elif ratio == 100:
-        return 'Remote'
-    else:
-        return 'Hybrid'
-
-# Load data with spinner
-@st.cache_data
-def load_data():
-    np.random.seed(42)
-
-    countries_currencies = {
-        'USA': 'USD', 'UK': 'GBP', 'Germany': 'EUR', 'Canada': 'CAD',
-        'Australia': 'AUD', 'India': 'INR', 'Japan': 'JPY'
-    }
+# Resolve the dataset version first: the preview below is painted from the
+# snapshot's stored sample before the full dataset is loaded
+try:
+    version = current_dataset_version()
+except Exception as e:
+    st.error(f"Error loading dataset: {e}")
+    st.stop()
 
-    company_sizes = ['Startup (1-50)', 'Small (51-200)', 'Medium (201-1000)',
-                     'Large (1001-5000)', 'Enterprise (5000+)']
+if version is None:
+    st.stop()
 
-    locations = list(countries_currencies.keys())
-    n_samples = 2000
-
-    experience_levels = np.random.choice(['Junior', 'Mid-Level', 'Senior', 'Lead'],
-                                        n_samples, p=[0.25, 0.35, 0.30, 0.10])
-
-    location_list = np.random.choice(locations, n_samples)
-    currencies = [countries_currencies[loc] for loc in location_list]
-
-    exp_multipliers = {
-        'Junior': (0.6, 0.8), 'Mid-Level': (0.8, 1.1),
-        'Senior': (1.2, 1.6), 'Lead': (1.7, 2.2)
-    }
-
-    base_salary_ranges = {
-        'USD': (80000, 130000), 'GBP': (55000, 90000), 'EUR': (60000, 100000),
-        'CAD': (90000, 140000), 'AUD': (100000, 160000),
-        'INR': (1200000, 2500000), 'JPY': (8000000, 13000000)
-    }
+# Title
+st.title("AI Job Market Explorer")
+intro = st.empty()
 
-    salaries_local = []
-    salaries_usd = []
-    for loc, curr, exp in zip(location_list, currencies, experience_levels):
-        min_base, max_base = base_salary_ranges[curr]
-        mult_min, mult_max = exp_multipliers[exp]
-        min_sal = int(min_base * mult_min)
-        max_sal = int(max_base * mult_max)
-        local_salary = np.random.randint(min_sal, max_sal)
-        salaries_local.append(local_salary)
-        salaries_usd.append(local_salary / CURRENCY_RATES[curr])
-
-    remote_ratios = []
-    for _ in range(n_samples):
-        rand = np.random.random()
-        if rand < 0.3:
-            remote_ratios.append(0)
-        elif rand < 0.5:
-            remote_ratios.append(100)
-        elif rand < 0.7:
-            remote_ratios.append(50)
-        else:
-            remote_ratios.append(np.random.randint(20, 80))
-
-    work_types = [categorize_work_type(r) for r in remote_ratios]
-
-    data = pd.DataFrame({
-        'job_title': np.random.choice(['Data Scientist', 'ML Engineer', 'AI Researcher', 'Data Analyst',
-                                       'Deep Learning Engineer', 'NLP Engineer', 'Computer Vision Engineer'], n_samples),
-        'experience_level': experience_levels,
-        'location': location_list,
-        'currency': currencies,
-        'salary_local': salaries_local,
-        'salary_usd': salaries_usd,
-        'remote_ratio': remote_ratios,
-        'work_type': work_types,
-        'company_size': np.random.choice(company_sizes, n_samples),
-        'company': np.random.choice(['Google', 'Amazon', 'Microsoft', 'Meta', 'Apple', 'IBM',
-                                     'NVIDIA', 'Tesla', 'OpenAI', 'DeepMind', 'Anthropic', 'Databricks'], n_samples),
-        'skills': [', '.join(np.random.choice(['Python', 'TensorFlow', 'PyTorch', 'SQL', 'AWS',
-                    'Docker', 'Kubernetes', 'Scikit-learn', 'R', 'Spark'],
-                    size=np.random.randint(2, 6), replace=False)) for _ in range(n_samples)],
-        'posted_date': pd.date_range(start='2024-10-01', periods=n_samples, freq='3H')
-    })
-
-    return data
+target_currency = st.session_state.default_currency
 
-with st.spinner("Loading data..."):
-    df = load_data()
+# Approximate mode: on large datasets the KPIs are first drawn from the
+# stratified sample stored with the snapshot, before the dataset itself is
+# loaded, and the charts from the sample's estimates; all are replaced by
+# the exact results at the end of the run. Once a view has been refined in
+# this process its exact charts are cached, so later reruns skip the
+# preview.
+MAX_REFINED_VIEWS = 64
+
+@st.cache_resource(max_entries=2)
+def refined_views(version):
+    # Ordered set of the refined (currency, rates, theme) views of a version
+    return {}
+
+views = refined_views(version)
+view = (target_currency, rates_version(CURRENCY_RATES), st.session_state.theme)
+preview = dataset_rows(version) >= approximate_rows() and view not in views
+# None for snapshots published before samples were stored: their sample is
+# built from the dataset once it is loaded
+sample = get_stored_sample(version) if preview else None
+# (placeholder, function drawing the exact content into it)
+refinements = []
+preview_notice = st.empty()
+
+def show_preview_notice(sample):
+    preview_notice.info(
+        f"Showing estimates from a {len(sample):,}-posting sample (error bars: 95% confidence) "
+        "while the exact figures are computed..."
+    )
 
-target_currency = st.session_state.default_currency
-df['salary_target'] = df['salary_usd'].apply(lambda x: convert_to_target_currency(x, target_currency))
+if sample is not None:
+    show_preview_notice(sample)
 
 # Custom CSS for metric cards
 st.markdown("""
@@ -348,50 +301,128 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# KPI Metrics
-col1, col2, col3, col4 = st.columns(4)
+# KPI Metrics (computed by the configured query engine over the dataset, or
+# estimated from the sample while previewing)
+def show_kpis(data, approximate=False):
+    engine = get_sample_engine() if approximate else get_engine()
+    summary = engine.summary(data)
+    work_types = engine.value_counts(data, 'work_type').set_index('work_type')
+    prefix = "≈" if approximate else ""
+    col1, col2, col3, col4 = st.columns(4)
+
+    total_jobs = summary['jobs']
+
+    with col1:
+        # No salary (and no percentages below) without any jobs, e.g. an
+        # empty dataset or sample
+        if summary['avg_salary_usd'] is None:
+            st.metric("Avg Salary", "n/a")
+        else:
+            avg_salary = convert_to_target_currency(summary['avg_salary_usd'], target_currency)
+            help_text = None
+            if approximate:
+                margin = convert_to_target_currency(summary['avg_salary_margin'], target_currency)
+                help_text = f"95% confidence: {avg_salary - margin:,.0f} - {avg_salary + margin:,.0f} {target_currency}"
+            st.metric("Avg Salary", f"{prefix}{avg_salary/1000:.0f}K {target_currency}", "+8%", help=help_text)
+
+    with col2:
+        st.metric("Total Jobs", f"{total_jobs:,}", "")
+
+    for col, work_type in [(col3, 'Remote'), (col4, 'Hybrid')]:
+        with col:
+            if not total_jobs:
+                st.metric(f"{work_type} Jobs", "n/a")
+                continue
+            count = work_types['count'].get(work_type, 0)
+            help_text = None
+            if approximate:
+                help_text = f"95% confidence: ±{work_types['margin'].get(work_type, 0) / total_jobs * 100:.1f} points"
+            st.metric(f"{work_type} Jobs", f"{prefix}{count / total_jobs * 100:.1f}%", "", help=help_text)
+
+kpi_placeholder = st.empty()
+if sample is not None:
+    with kpi_placeholder.container():
+        show_kpis(sample, approximate=True)
 
-with col1:
-    avg_salary = df['salary_target'].mean()
-    st.metric("Avg Salary", f"{avg_salary/1000:.0f}K {target_currency}", "+8%")
+# Load data with spinner
+with st.spinner("Loading data..."):
+    df = load_jobs(version=version)
 
-with col2:
-    total_jobs = len(df)
-    st.metric("Total Jobs", f"{total_jobs:,}", "")
+if df is None:
+    st.stop()
 
-with col3:
-    remote_pct = (df['work_type'] == 'Remote').sum() / len(df) * 100
-    st.metric("Remote Jobs", f"{remote_pct:.1f}%", "")
+date_range = f"{df['posting_date'].min():%b %Y} - {df['posting_date'].max():%b %Y}"
+intro.markdown(f"Discover insights from {len(df):,} AI/ML job postings ({date_range})")
 
-with col4:
-    hybrid_pct = (df['work_type'] == 'Hybrid').sum() / len(df) * 100
-    st.metric("Hybrid Jobs", f"{hybrid_pct:.1f}%", "")
+if preview:
+    if sample is None:
+        show_preview_notice(get_sample(df))
+        with kpi_placeholder.container():
+            show_kpis(df, approximate=True)
+    refinements.append((kpi_placeholder, lambda: show_kpis(df)))
+else:
+    with kpi_placeholder.container():
+        show_kpis(df)
+
+# Salary percentiles come from the snapshot's quantile sketches merged into
+# one, so they stay within a fraction of a percent of rank and are instant at any dataset size
+SALARY_PERCENTILES = [10, 25, 50, 75, 90]
+salary_sketch = group_sketches(get_salary_sketches(df)).get(None)
+if salary_sketch is not None:
+    percentiles = sketch_quantiles(salary_sketch, [p / 100 for p in SALARY_PERCENTILES])
+    st.caption("Salary percentiles: " + " · ".join(
+        f"{'Median' if p == 50 else f'P{p}'} {convert_to_target_currency(value, target_currency)/1000:,.0f}K"
+        for p, value in zip(SALARY_PERCENTILES, percentiles)
+    ) + f" {target_currency}")
 
 if target_currency != 'USD':
     st.caption(f"Salary values converted from USD to {target_currency} using ExchangeRate-API rates")
 
 st.divider()
 
-# Monthly trends
-st.subheader("Job Postings Trend (Oct 2024 - Jul 2025)")
-df['month'] = df['posted_date'].dt.to_period('M').astype(str)
-monthly_counts = df.groupby('month').size().reset_index(name='count')
+# Charts come from a cache keyed by dataset version, exchange rates, currency
+# and theme; unchanged charts are reused across reruns and sessions
+theme = st.session_state.theme
+
+def draw_figure(kind, **options):
+    fig = figure_for(kind, df, target_currency, CURRENCY_RATES, theme, options=options)
+    # Estimates get their own key: they can equal the exact chart drawn later
+    st.plotly_chart(fig, use_container_width=True, key=f'{kind}_estimate' if options.get('approximate') else None)
+
+def show_figure(kind, **options):
+    placeholder = st.empty()
+    with placeholder.container():
+        if preview and kind in APPROXIMATE_FIGURES:
+            draw_figure(kind, approximate=True, **options)
+            refinements.append((placeholder, lambda: draw_figure(kind, **options)))
+        else:
+            draw_figure(kind, **options)
+
+# Trends are drawn from the daily/weekly/monthly rollups stored with the snapshot
+TREND_FREQUENCIES = {'Monthly': 'monthly', 'Weekly': 'weekly', 'Daily': 'daily'}
+TREND_SEGMENTS = {
+    'All Jobs': 'all', 'Job Title': 'job_title',
+    'Country': 'company_location', 'Experience Level': 'experience_level'
+}
+TREND_METRICS = {'Postings': 'posting_trend', 'Average Salary': 'salary_trend'}
+
+st.subheader(f"Job Postings Trend ({date_range})")
+col1, col2, col3 = st.columns(3)
+with col1:
+    trend_frequency = st.radio("Granularity", list(TREND_FREQUENCIES), horizontal=True, key='trend_frequency')
+with col2:
+    trend_segment = st.selectbox("Split by", list(TREND_SEGMENTS), key='trend_segment')
+with col3:
+    trend_metric = st.radio("Metric", list(TREND_METRICS), horizontal=True, key='trend_metric')
+if TREND_SEGMENTS[trend_segment] in ('job_title', 'company_location'):
+    st.caption(f"Showing the 5 {trend_segment.lower()} segments with the most postings")
 
 with st.spinner("Generating trend chart..."):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=monthly_counts['month'], y=monthly_counts['count'],
-        mode='lines+markers', name='Job Postings',
-        line=dict(color='#3B82F6', width=3), marker=dict(size=8)
-    ))
-    fig.update_layout(
-        xaxis_title='Month', yaxis_title='Number of Postings',
-        height=350, hovermode='x unified',
-        plot_bgcolor=theme_colors['paper_bg'], paper_bgcolor=theme_colors['bg'],
-        font=dict(color=theme_colors['text']),
-        xaxis=dict(gridcolor=theme_colors['grid']), yaxis=dict(gridcolor=theme_colors['grid'])
+    show_figure(
+        TREND_METRICS[trend_metric],
+        frequency=TREND_FREQUENCIES[trend_frequency],
+        segment=TREND_SEGMENTS[trend_segment]
     )
-    st.plotly_chart(fig, use_container_width=True)
 
 st.divider()
 
@@ -405,45 +436,12 @@ with col1:
     else:
         st.caption("Salaries displayed in original USD")
     with st.spinner("Loading..."):
-        fig = go.Figure()
-        exp_order = ['Junior', 'Mid-Level', 'Senior', 'Lead']
-        colors = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444']
-
-        for exp, color in zip(exp_order, colors):
-            exp_data = df[df['experience_level'] == exp]['salary_target']
-            fig.add_trace(go.Box(y=exp_data, name=exp, marker_color=color, boxmean='sd'))
-
-        fig.update_layout(
-            yaxis_title=f'Salary ({target_currency})', xaxis_title='Experience Level',
-            height=350, showlegend=False,
-            plot_bgcolor=theme_colors['paper_bg'], paper_bgcolor=theme_colors['bg'],
-            font=dict(color=theme_colors['text']),
-            xaxis=dict(gridcolor=theme_colors['grid']), yaxis=dict(gridcolor=theme_colors['grid'])
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('salary_by_experience')
 
 with col2:
     st.subheader("Job Title Distribution")
     with st.spinner("Loading..."):
-        job_dist = df['job_title'].value_counts().reset_index()
-        job_dist.columns = ['job_title', 'count']
-
-        # Use theme-appropriate color scale
-        if st.session_state.theme == 'dark':
-            color_scale = [[0, '#1e3a8a'], [0.5, '#3b82f6'], [1, '#60a5fa']]  # Dark theme: darker to lighter blue
-        else:
-            color_scale = [[0, '#2563eb'], [0.5, '#1e40af'], [1, '#1e3a8a']]  # Light theme: vibrant to dark blue
-
-        fig = px.bar(job_dist, y='job_title', x='count', orientation='h',
-                     color='count', color_continuous_scale=color_scale)
-        fig.update_layout(
-            height=350, showlegend=False,
-            xaxis_title='Number of Jobs', yaxis_title='Job Title',
-            plot_bgcolor=theme_colors['paper_bg'], paper_bgcolor=theme_colors['bg'],
-            font=dict(color=theme_colors['text']),
-            xaxis=dict(gridcolor=theme_colors['grid']), yaxis=dict(gridcolor=theme_colors['grid'])
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('job_titles')
 
 st.divider()
 
@@ -453,73 +451,19 @@ col1, col2 = st.columns([1, 1])
 with col1:
     st.subheader("Work Type Distribution")
     with st.spinner("Loading..."):
-        work_type_dist = df['work_type'].value_counts().reset_index()
-        work_type_dist.columns = ['work_type', 'count']
-
-        fig = px.pie(work_type_dist, values='count', names='work_type', hole=0.4,
-                     color_discrete_sequence=['#3B82F6', '#10B981', '#F59E0B'])
-        fig.update_traces(textposition='inside', textinfo='percent+label', textfont=dict(color='white'))
-        fig.update_layout(height=300, plot_bgcolor=theme_colors['paper_bg'],
-                          paper_bgcolor=theme_colors['bg'], font=dict(color=theme_colors['text']))
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('work_types')
 
 with col2:
     st.subheader("Jobs by Country")
     with st.spinner("Loading..."):
-        loc_dist = df['location'].value_counts().reset_index()
-        loc_dist.columns = ['location', 'count']
-        loc_dist['percentage'] = (loc_dist['count'] / loc_dist['count'].sum() * 100).round(1)
-        loc_dist = loc_dist.sort_values('count', ascending=True)
-
-        fig = go.Figure()
-        for idx, row in loc_dist.iterrows():
-            fig.add_trace(go.Scatter(
-                x=[0, row['count']], y=[row['location'], row['location']],
-                mode='lines', line=dict(color='lightgray', width=2),
-                showlegend=False, hoverinfo='skip'
-            ))
-
-        fig.add_trace(go.Scatter(
-            x=loc_dist['count'], y=loc_dist['location'],
-            mode='markers+text', marker=dict(size=12, color='#3B82F6'),
-            text=[f"{p:.1f}%" for p in loc_dist['percentage']],
-            textposition='middle right', textfont=dict(color=theme_colors['text']),
-            showlegend=False, hovertemplate='<b>%{y}</b><br>Jobs: %{x}<extra></extra>'
-        ))
-
-        fig.update_layout(
-            height=300, xaxis_title='Number of Jobs', yaxis_title='',
-            margin=dict(l=0, r=80, t=20, b=40),
-            plot_bgcolor=theme_colors['paper_bg'], paper_bgcolor=theme_colors['bg'],
-            font=dict(color=theme_colors['text']),
-            xaxis=dict(gridcolor=theme_colors['grid']), yaxis=dict(gridcolor=theme_colors['grid'])
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('jobs_by_country')
 
 st.divider()
 
 # Skills demand
 st.subheader("Most In-Demand Skills")
 with st.spinner("Analyzing skills..."):
-    all_skills = []
-    for skills in df['skills']:
-        all_skills.extend([s.strip() for s in skills.split(',')])
-
-    skills_count = pd.Series(all_skills).value_counts().reset_index()
-    skills_count.columns = ['skill', 'count']
-    skills_count['percentage'] = (skills_count['count'] / len(df) * 100).round(1)
-
-    fig = px.bar(skills_count.head(10), y='skill', x='percentage', orientation='h',
-                 text='percentage', labels={'percentage': 'Percentage of Jobs (%)', 'skill': 'Skill'},
-                 color='percentage', color_continuous_scale='Viridis')
-    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside', textfont=dict(color=theme_colors['text']))
-    fig.update_layout(
-        height=400, showlegend=False,
-        plot_bgcolor=theme_colors['paper_bg'], paper_bgcolor=theme_colors['bg'],
-        font=dict(color=theme_colors['text']),
-        xaxis=dict(gridcolor=theme_colors['grid']), yaxis=dict(gridcolor=theme_colors['grid'])
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    show_figure('skill_demand')
 
 st.divider()
 
@@ -531,45 +475,24 @@ else:
     st.caption("Salaries displayed in original USD. Hover over bars to see local currency equivalent.")
 
 with st.spinner("Loading salary comparison..."):
-    # Get both local and converted salaries for display
-    salary_by_location = df.groupby(['location', 'currency']).agg({
-        'salary_target': 'mean',
-        'salary_local': 'mean'
-    }).reset_index()
-    salary_by_location = salary_by_location.sort_values('salary_target', ascending=True)
-
-    # Use theme-appropriate color scale
-    if st.session_state.theme == 'dark':
-        color_scale = [[0, '#1e3a8a'], [0.5, '#3b82f6'], [1, '#60a5fa']]  # Dark theme: darker to lighter blue
-        text_color = 'white'
-    else:
-        color_scale = [[0, '#2563eb'], [0.5, '#1e40af'], [1, '#1e3a8a']]  # Light theme: vibrant to dark blue
-        text_color = 'white'
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        y=salary_by_location['location'], x=salary_by_location['salary_target'],
-        orientation='h', text=[f"{sal:,.0f}" for sal in salary_by_location['salary_target']],
-        textposition='auto', textfont=dict(color=text_color),
-        marker=dict(color=salary_by_location['salary_target'], colorscale=color_scale, showscale=False),
-        hovertemplate='<b>%{y}</b><br>Converted: %{x:,.0f} ' + target_currency + '<br>Original Currency: %{customdata}<extra></extra>',
-        customdata=salary_by_location['currency']
-    ))
-
-    fig.update_layout(
-        xaxis_title=f'Average Salary ({target_currency})', yaxis_title='Country',
-        height=350, margin=dict(l=0, r=20, t=20, b=40),
-        plot_bgcolor=theme_colors['paper_bg'], paper_bgcolor=theme_colors['bg'],
-        font=dict(color=theme_colors['text']),
-        xaxis=dict(gridcolor=theme_colors['grid']), yaxis=dict(gridcolor=theme_colors['grid'])
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    show_figure('salary_by_country')
+
+# Refine the preview to exact values, top to bottom
+if refinements:
+    for placeholder, draw in refinements:
+        with placeholder.container():
+            draw()
+    views[view] = None
+    # Bounded: the oldest views are refined again if they come back
+    for stale in list(views)[:-MAX_REFINED_VIEWS]:
+        views.pop(stale, None)
+    preview_notice.empty()
 
 # Footer
 st.markdown("---")
 st.markdown(f"""
 <div style='text-align: center; color: gray; font-size: 0.8rem;'>
-    <p>AI Job Market Explorer | Data: 2,000+ postings (Oct 2024 - Jul 2025) | Built with Streamlit</p>
+    <p>AI Job Market Explorer | Data: {len(df):,} postings ({date_range}) | Built with Streamlit</p>
     <p>2025 Mohammadreza Hendiani | Licensed under MIT</p>
 </div>
 """, unsafe_allow_html=True)
@@ -0,0 +1,367 @@
+# api.py
+"""
+Headless JSON API over the job dataset.
+
+Serves the same data access layer, filter engine and search logic as the
+Search Jobs page (utils/search.py) to programmatic clients, without a
+Streamlit session.
+
+Run locally:
+    uvicorn api:app --port 8000
+    python api.py --port 8000
+
+Endpoints (GET, JSON):
+    /health                   Dataset version and number of postings
+    /options                  Filter options with job counts
+    /jobs                     Filtered, paginated jobs (optionally ranked, with facets)
+    /jobs/{job_id}/similar    Postings most similar to one job
+    /aggregates               Job counts and salary statistics per group, computed
+                              by the configured query engine (medians from the
+                              salary sketches when they can answer the request,
+                              see median_source)
+    /trends                   Posting and salary trends from the rollups
+    /cache                    Cache hit/miss counters and memory/disk usage
+
+Filters for /jobs and /aggregates take raw dataset values, repeated or
+comma-separated: work_type, experience_level (EN, MI, SE, EX),
+employment_type, company_location, company_size, company_name and skills
+(unknown values are rejected with 400; skills are first corrected to the
+closest known skill), plus q (free text), min_salary_usd, posted_from / posted_to and
+deadline_from / deadline_to (inclusive YYYY-MM-DD bounds) and open_on
+(jobs still accepting applications on that day), and inclusive numeric
+ranges as <column>_min / <column>_max for years_experience,
+benefits_score and job_description_length.
+
+The API serves the snapshot the CURRENT pointer of data/snapshots refers
+to and never downloads or publishes one itself: without a snapshot it
+refuses to start, and answers 503 if the snapshot disappears.
+
+Handlers run the numpy work in a thread pool so the event loop stays
+responsive. Large responses are gzip-compressed, and every response has an
+ETag built from the dataset version and the request, so a client sending
+If-None-Match gets 304 Not Modified without the query being run. Response
+payloads are kept in the shared cache layer (utils/cache.py) under the same
+key, so repeated queries from any client, or any worker process when the
+disk tier is enabled, are served without recomputation.
+"""
+import argparse
+import hashlib
+import json
+import math
+from datetime import date
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from utils.cache import cached, cache_stats
+from utils.data_access import load_version, get_rollups, get_salary_sketches
+from utils.filter_engine import (
+    FILTER_COLUMNS, RANGE_COLUMNS, SKILLS, get_filter_index, get_option_catalog, combine_masks, facet_counts
+)
+from utils.query_engine import get_engine
+from utils.ranking import match_scores, top_k
+from utils.rollups import FREQUENCIES, SEGMENT_COLUMNS, trend_series
+from utils.search import correct_skills, search_masks
+from utils.similarity import get_similarity_index, similar_jobs
+from utils.sketches import SKETCH_COLUMNS, group_sketches, sketch_quantiles
+from utils.snapshots import current_version
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+GROUP_COLUMNS = FILTER_COLUMNS + ['job_title', 'industry']
+NO_SNAPSHOT = "No dataset snapshot is published; run the app once or python -m utils.snapshots publish"
+
+
+def _values(request, name):
+    """All values of a repeated and/or comma-separated query parameter."""
+    return [
+        value.strip()
+        for raw in request.query_params.getlist(name)
+        for value in raw.split(',') if value.strip()
+    ]
+
+
+def _number(request, name, default, minimum=None, maximum=None, cast=int):
+    """Numeric query parameter; raises ValueError for invalid values."""
+    raw = request.query_params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number") from None
+    # float() accepts 'nan' and 'inf'
+    if not math.isfinite(value):
+        raise ValueError(f"'{name}' must be a finite number")
+    if minimum is not None and maximum is not None and not minimum <= value <= maximum:
+        raise ValueError(f"'{name}' must be between {minimum} and {maximum}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"'{name}' must be >= {minimum}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"'{name}' must be <= {maximum}")
+    return value
+
+
+def _date(request, name):
+    """ISO date query parameter (None when absent); raises ValueError for invalid dates."""
+    raw = request.query_params.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date (YYYY-MM-DD)") from None
+
+
+def _choice(request, name, default, choices):
+    value = request.query_params.get(name, default)
+    if value not in choices:
+        raise ValueError(f"'{name}' must be one of: {', '.join(map(str, choices))}")
+    return value
+
+
+def _records(frame):
+    """JSON-ready records (numpy and timestamp values converted)."""
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def _search(request, df):
+    """
+    Filter masks for the filter and search parameters of a request.
+
+    Filter values must be raw catalog values (e.g. experience_level=SE, not
+    Senior); unknown values raise ValueError rather than being dropped, so
+    a typo never turns into "no filter". Skills are corrected to their
+    closest match first and only rejected when nothing is close.
+    """
+    index = get_filter_index(df)
+    selections = {column: _values(request, column) for column in FILTER_COLUMNS}
+    selections[SKILLS], corrections = correct_skills(df, _values(request, SKILLS))
+    unknown = {column: [value for value in values if value not in set(index.options[column])]
+               for column, values in selections.items()}
+    unknown[SKILLS] = [entered for entered, match in corrections if match is None]
+    unknown = {column: values for column, values in unknown.items() if values}
+    if unknown:
+        raise ValueError("Unknown filter values: " + '; '.join(
+            f"{column}: {', '.join(values)}" for column, values in unknown.items()
+        ))
+    masks, similar_titles = search_masks(
+        df, selections, request.query_params.get('q', ''),
+        min_salary=_number(request, 'min_salary_usd', 0, minimum=0, cast=float),
+        date_ranges={
+            'posting_date': (_date(request, 'posted_from'), _date(request, 'posted_to')),
+            'application_deadline': (_date(request, 'deadline_from'), _date(request, 'deadline_to')),
+        },
+        open_on=_date(request, 'open_on'),
+        ranges={
+            column: (_number(request, f'{column}_min', None, cast=float), _number(request, f'{column}_max', None, cast=float))
+            for column in RANGE_COLUMNS
+        }
+    )
+    notes = {}
+    if corrections:
+        notes['skill_corrections'] = dict(corrections)
+    if similar_titles:
+        notes['similar_titles'] = similar_titles
+    return selections, masks, notes
+
+
+def health(request, df):
+    return {'status': 'ok', 'dataset_version': df.attrs['dataset_version'], 'jobs': len(df)}
+
+
+def options(request, df):
+    return {
+        'dataset_version': df.attrs['dataset_version'],
+        'options': {column: {str(k): int(v) for k, v in counts.items()}
+                    for column, counts in get_option_catalog(df).items()},
+    }
+
+
+def jobs(request, df):
+    page = _number(request, 'page', 1, minimum=1)
+    page_size = _number(request, 'page_size', DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+    sort = _choice(request, 'sort', 'posting_order', ['posting_order', 'best_match'])
+    remote = _number(request, 'remote_ratio', None, minimum=0, maximum=100)
+
+    index = get_filter_index(df)
+    selections, masks, notes = _search(request, df)
+    rows = np.flatnonzero(combine_masks(masks, len(df)))
+    total = len(rows)
+
+    scores = None
+    if sort == 'best_match':
+        scores = match_scores(
+            df, index, rows, skills=selections[SKILLS],
+            target_salary_usd=_number(request, 'target_salary_usd', 0, minimum=0, cast=float),
+            remote_ratio=remote
+        )
+        # Only the rows up to the requested page are selected and sorted
+        rows, scores = top_k(rows, scores, page * page_size)
+
+    start = (page - 1) * page_size
+    page_rows = rows[start:start + page_size]
+    records = _records(df.iloc[page_rows])
+    if scores is not None:
+        for record, score in zip(records, scores[start:start + page_size]):
+            record['match_score'] = round(float(score) * 100, 2)
+
+    payload = {
+        'dataset_version': df.attrs['dataset_version'],
+        'total': total, 'page': page, 'page_size': page_size,
+        'pages': -(-total // page_size),
+        'jobs': records, **notes,
+    }
+    if request.query_params.get('facets', '').lower() in ('1', 'true', 'yes'):
+        payload['facets'] = {
+            column: dict(zip(map(str, index.options[column]), counts.tolist()))
+            for column, counts in facet_counts(index, masks).items()
+        }
+    return payload
+
+
+def similar(request, df):
+    job_id = request.path_params['job_id']
+    matches = np.flatnonzero(df['job_id'].astype(str).to_numpy() == job_id)
+    if not len(matches):
+        raise LookupError(f"Job '{job_id}' not found")
+
+    rows, scores = similar_jobs(get_similarity_index(df), matches[0], k=_number(request, 'k', 10, minimum=1, maximum=100))
+    records = _records(df.iloc[rows])
+    for record, score in zip(records, scores):
+        record['similarity'] = round(float(score) * 100, 2)
+    return {'dataset_version': df.attrs['dataset_version'], 'job_id': job_id, 'similar': records}
+
+
+def aggregates(request, df):
+    group_by = _choice(request, 'group_by', 'company_location', GROUP_COLUMNS)
+    selections, masks, notes = _search(request, df)
+    # Selections run in the configured query engine, like the Dashboard
+    # charts; the other filters (text, salary, dates, ranges) restrict it
+    # to their matching rows
+    other = {name: mask for name, mask in masks.items() if name not in selections}
+    rows = np.flatnonzero(combine_masks(other, len(df))) if other else None
+    stats = get_engine().salary_stats(df, group_by, selections, rows)
+
+    # Medians the salary sketches can answer (groups and filters over their
+    # columns only) come from them, so they match the Dashboard's box plots
+    median_source = 'exact'
+    if group_by in SKETCH_COLUMNS and set(masks) <= set(SKETCH_COLUMNS):
+        sketches = group_sketches(
+            get_salary_sketches(df), by=group_by, selections={column: selections[column] for column in masks}
+        )
+        stats['median_salary_usd'] = [
+            sketch_quantiles(sketches[value], [0.5])[0] if value in sketches else median
+            for value, median in zip(stats[group_by], stats['median_salary_usd'])
+        ]
+        median_source = 'sketch'
+    return {
+        'dataset_version': df.attrs['dataset_version'],
+        'group_by': group_by, 'total': int(combine_masks(masks, len(df)).sum()),
+        'median_source': median_source,
+        'groups': _records(stats.round(2)), **notes,
+    }
+
+
+def trends(request, df):
+    frequency = _choice(request, 'frequency', 'monthly', list(FREQUENCIES))
+    segment = _choice(request, 'segment', 'all', ['all'] + SEGMENT_COLUMNS)
+    series = trend_series(get_rollups(df), frequency, segment, top_n=_number(request, 'top_n', 5, minimum=1))
+    return {
+        'dataset_version': df.attrs['dataset_version'],
+        'frequency': frequency, 'segment': segment,
+        'series': _records(series.round(dict.fromkeys(series.select_dtypes('number').columns, 2))),
+    }
+
+
+def _etag(df, request):
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.md5(f'{request.url.path}?{query}'.encode()).hexdigest()[:16]
+    return f'W/"{df.attrs["dataset_version"]}-{digest}"'
+
+
+def load_current():
+    """
+    Dataset of the snapshot the CURRENT pointer refers to.
+
+    Unlike data_access.load_jobs, this never downloads or publishes (both
+    report through Streamlit); snapshots come from the app or from
+    ``python -m utils.snapshots publish``.
+
+    Returns:
+        pd.DataFrame: The dataset, or None when no snapshot is published
+    """
+    version = current_version()
+    return None if version is None else load_version(version)
+
+
+@cached('api_response', disk=True)
+def _response(etag, _handler, _request, _df):
+    return _handler(_request, _df)
+
+
+def endpoint(handler):
+    """
+    Wrap a synchronous handler(request, df) -> dict as an async endpoint.
+
+    Loads the current dataset version, answers If-None-Match with 304,
+    runs the handler in the thread pool (or serves its cached payload for
+    the same ETag) and maps ValueError to 400 and LookupError to 404.
+    """
+    async def run(request):
+        df = await run_in_threadpool(load_current)
+        if df is None:
+            return JSONResponse({'error': NO_SNAPSHOT}, status_code=503)
+
+        etag = _etag(df, request)
+        if_none_match = [tag.strip() for tag in request.headers.get('if-none-match', '').split(',')]
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status_code=304, headers={'ETag': etag})
+
+        try:
+            payload = await run_in_threadpool(_response, etag, handler, request, df)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+        except LookupError as e:
+            return JSONResponse({'error': str(e).strip("'\"")}, status_code=404)
+        return JSONResponse(payload, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+    return run
+
+
+async def cache(request):
+    return JSONResponse(await run_in_threadpool(cache_stats), headers={'Cache-Control': 'no-store'})
+
+
+app = Starlette(
+    routes=[
+        Route('/health', endpoint(health)),
+        Route('/options', endpoint(options)),
+        Route('/jobs', endpoint(jobs)),
+        Route('/jobs/{job_id}/similar', endpoint(similar)),
+        Route('/aggregates', endpoint(aggregates)),
+        Route('/trends', endpoint(trends)),
+        Route('/cache', cache),
+    ],
+    middleware=[Middleware(GZipMiddleware, minimum_size=1000)],
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the job dataset as a JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    if current_version() is None:
+        parser.exit(1, f"{NO_SNAPSHOT}\n")
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/approximate.py
+"""
+Approximate Dashboard queries: sample estimates vs exact answers.
+
+Builds a synthetic posting CSV of --rows postings by resampling the repo
+dataset, publishes it as a snapshot in a scratch directory (which also
+builds the stratified sample, see utils/sampling.py) and reports for each
+Dashboard aggregate:
+
+- exact: time of the configured query engine (skill demand: the skill index),
+- estimate: time of query_engine.SampleEngine on the sample,
+- max error: largest relative error of an estimate,
+- coverage: share of exact values inside the estimates' 95% intervals.
+
+Exact timings are cold (first call per dataset version, as on a fresh
+process), estimates include reading nothing but the sample.
+
+Usage:
+    python benchmarks/approximate.py [--rows 1000000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault('JOB_CACHE_MEMORY_MB', '16384')
+
+DATASET = os.path.join('data', 'ai_job_dataset.csv')
+
+
+def make_dataset(path, rows, seed=0):
+    """Write rows postings resampled from the repo dataset."""
+    source = pd.read_csv(os.path.join(REPO_ROOT, DATASET))
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df = source.iloc[rng.integers(0, len(source), rows)]
+    df.assign(job_id=[f'AI{i:09d}' for i in range(rows)]).to_csv(path, index=False)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def compare(exact, estimate, key, value, margin, rounding=0.0):
+    """(max relative error, coverage) of estimate against exact, joined on key."""
+    joined = exact.set_index(key)[[value]].join(estimate.set_index(key)[[value, margin]], rsuffix='_estimate', how='inner')
+    error = (joined[f'{value}_estimate'] - joined[value]).abs()
+    # Rounded values (whole jobs, 0.1 points) may miss by the rounding step
+    covered = error <= joined[margin] + rounding
+    return float((error / joined[value].abs()).max()), float(covered.mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='approximate_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        make_dataset(DATASET, args.rows)
+
+        from utils.data_access import get_sample, get_skill_demand, load_jobs
+        from utils.query_engine import get_engine, get_sample_engine
+
+        (df, publish_seconds) = timed(load_jobs)
+        exact, estimate = get_engine(), get_sample_engine()
+        sample, _ = timed(lambda: get_sample(df))
+        print(f"{len(df):,} postings, sample of {len(sample):,} "
+              f"(ingest + publish incl. sample: {publish_seconds:.1f} s)")
+
+        queries = {
+            'summary': (
+                lambda engine: pd.DataFrame([engine.summary(df)]).assign(key=0), 'key',
+                [('jobs', 'jobs_margin', 1), ('avg_salary_usd', 'avg_salary_margin', 0)]
+            ),
+            'jobs by title': (lambda engine: engine.value_counts(df, 'job_title'), 'job_title', [('count', 'margin', 1)]),
+            'jobs by country': (
+                lambda engine: engine.value_counts(df, 'company_location'), 'company_location', [('count', 'margin', 1)]
+            ),
+            'salary by country': (
+                lambda engine: engine.group_salary(df, 'company_location'), 'company_location',
+                [('avg_salary_usd', 'margin', 0)]
+            ),
+            'skill demand': (
+                lambda engine: get_skill_demand(df) if engine is exact else estimate.skill_demand(df), 'skill',
+                [('percentage', 'margin', 0.1)]
+            ),
+            'filtered summary (SE, Python)': (
+                lambda engine: pd.DataFrame([engine.summary(df, {'experience_level': ['SE'], 'skills': ['Python']})]).assign(key=0),
+                'key', [('jobs', 'jobs_margin', 1), ('avg_salary_usd', 'avg_salary_margin', 0)]
+            ),
+        }
+
+        print(f"{'Query':<32} {'exact ms':>10} {'estimate ms':>12} {'max error':>10} {'coverage':>9}")
+        for label, (query, key, values) in queries.items():
+            exact_result, exact_seconds = timed(lambda: query(exact))
+            estimate_result, estimate_seconds = timed(lambda: query(estimate))
+            errors, coverage = zip(*(
+                compare(exact_result, estimate_result, key, *value) for value in values
+            ))
+            print(f"{label:<32} {exact_seconds * 1000:>10.1f} {estimate_seconds * 1000:>12.1f} "
+                  f"{max(errors):>9.2%} {min(coverage):>9.0%}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
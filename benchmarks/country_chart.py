@@ -0,0 +1,102 @@
+# benchmarks/country_chart.py
+"""
+Size of the Jobs by Country lollipop chart as the number of countries grows.
+
+Builds synthetic datasets of --rows postings spread over each of
+--countries company locations and reports, for figures.build_jobs_by_country
+and for the previous construction (one stem trace per country, added in an
+iterrows() loop):
+
+- traces: number of traces in the figure,
+- payload KB: size of the figure JSON sent to the browser,
+- build ms: time to build the figure.
+
+Exits with status 1 if the chart does not stay at two traces.
+
+Usage:
+    python benchmarks/country_chart.py [--rows 200000] [--countries 10 50 150 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+# Counts come straight from the synthetic frame
+os.environ['JOB_QUERY_ENGINE'] = 'pandas'
+
+
+def make_dataset(rows, countries, seed=0):
+    """Postings over countries locations with skewed (Zipf-like) frequencies."""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, countries + 1)
+    locations = rng.choice([f'Country {i:03d}' for i in range(countries)], rows, p=weights / weights.sum())
+    df = pd.DataFrame({'company_location': pd.Categorical(locations)})
+    df.attrs['dataset_version'] = f'synthetic-{rows}-{countries}'
+    return df
+
+
+def per_country_stems(df):
+    """The previous construction: one gray stem trace per country."""
+    import plotly.graph_objects as go
+
+    loc_dist = df['company_location'].astype(object).value_counts().reset_index()
+    loc_dist.columns = ['location', 'count']
+    loc_dist['percentage'] = (loc_dist['count'] / loc_dist['count'].sum() * 100).round(1)
+    loc_dist = loc_dist.sort_values('count', ascending=True, kind='stable')
+
+    fig = go.Figure()
+    for _, row in loc_dist.iterrows():
+        fig.add_trace(go.Scatter(
+            x=[0, row['count']], y=[row['location'], row['location']],
+            mode='lines', line=dict(color='lightgray', width=2),
+            showlegend=False, hoverinfo='skip'
+        ))
+    fig.add_trace(go.Scatter(
+        x=loc_dist['count'], y=loc_dist['location'],
+        mode='markers+text', marker=dict(size=12, color='#3B82F6'),
+        text=[f"{p:.1f}%" for p in loc_dist['percentage']],
+        textposition='middle right',
+        showlegend=False, hovertemplate='<b>%{y}</b><br>Jobs: %{x}<extra></extra>'
+    ))
+    fig.update_layout(height=max(300, 24 * len(loc_dist)), xaxis_title='Number of Jobs', yaxis_title='')
+    return fig
+
+
+def measure(build):
+    start = time.perf_counter()
+    fig = build()
+    seconds = time.perf_counter() - start
+    return len(fig.data), len(fig.to_json()) / 1024, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--countries', type=int, nargs='+', default=[10, 50, 150, 300])
+    args = parser.parse_args()
+
+    from utils.figures import build_jobs_by_country
+
+    print(f"{'Countries':>9} {'Chart':<18} {'traces':>7} {'payload KB':>11} {'build ms':>9}")
+    failed = False
+    for countries in args.countries:
+        df = make_dataset(args.rows, countries)
+        for label, build in [
+            ('two traces', lambda: build_jobs_by_country(df, 'USD', 1.0)),
+            ('trace per country', lambda: per_country_stems(df)),
+        ]:
+            traces, kilobytes, seconds = measure(build)
+            print(f"{countries:>9} {label:<18} {traces:>7} {kilobytes:>11.1f} {seconds * 1000:>9.1f}")
+            failed |= label == 'two traces' and traces != 2
+    if failed:
+        print("build_jobs_by_country no longer has a constant number of traces")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/engine_equality.py
+"""
+Equality check of the query engines against the pandas engine.
+
+Runs --combinations random filter selections (a few values per column,
+every value of a column, or values missing from the catalog) against the
+current dataset and compares, for every installed engine of
+utils/query_engine.py, the filter masks, value counts, salary by country,
+summary, selected columns and salary statistics (with and without a row
+restriction) with PandasEngine. Also checks that the DuckDB and Polars
+engines answer without touching the pandas filter index.
+
+Exits with status 1 on the first difference.
+
+Usage:
+    python benchmarks/engine_equality.py [--combinations 200] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+COUNT_COLUMNS = ['job_title', 'work_type', 'company_location']
+STATS_COLUMNS = ['company_location', 'experience_level', 'industry']
+
+
+def random_selections(rng, options):
+    """Random filter selections over FILTER_COLUMNS and skills."""
+    selections = {}
+    for column, values in options.items():
+        draw = rng.random()
+        if draw < 0.4:
+            selections[column] = rng.sample(values, rng.randint(1, min(3, len(values))))
+        elif draw < 0.45:
+            selections[column] = list(values)
+        elif draw < 0.5:
+            selections[column] = ['nonexistent']
+    return selections
+
+
+def assert_frames_equal(expected, actual, label):
+    assert list(expected.columns) == list(actual.columns), f"{label}: columns {list(actual.columns)}"
+    assert len(expected) == len(actual), f"{label}: {len(actual)} rows instead of {len(expected)}"
+    for column in expected.columns:
+        x, y = expected[column].to_numpy(), actual[column].to_numpy()
+        if np.issubdtype(x.dtype, np.number) and np.issubdtype(y.dtype, np.number):
+            assert np.allclose(x.astype(float), y.astype(float), rtol=1e-9, equal_nan=True), f"{label}: {column}"
+        else:
+            assert [str(v) for v in x] == [str(v) for v in y], f"{label}: {column}"
+
+
+def index_lookups():
+    """Number of pandas filter index lookups so far."""
+    from utils.cache import cache_stats
+
+    counters = cache_stats()['namespaces'].get('filter_index', {})
+    return sum(counters.values())
+
+
+def compare(reference, engine, df, selections, rows):
+    """Assert that engine answers like reference for one selection."""
+    expected_masks = reference.selection_masks(df, selections)
+    expected = {
+        **{f'counts by {column}': reference.value_counts(df, column, selections) for column in COUNT_COLUMNS},
+        'salary by country': reference.group_salary(df, 'company_location', selections),
+        'columns': reference.columns(df, ['experience_level', 'salary_usd'], selections),
+        **{f'salary stats by {column}': reference.salary_stats(df, column, selections, rows) for column in STATS_COLUMNS},
+    }
+    expected_summary = reference.summary(df, selections)
+
+    lookups = index_lookups()
+    masks = engine.selection_masks(df, selections)
+    assert masks.keys() == expected_masks.keys(), f"mask columns {sorted(masks)}"
+    for column, mask in masks.items():
+        assert (mask == expected_masks[column]).all(), f"mask of {column}"
+    actual = {
+        **{f'counts by {column}': engine.value_counts(df, column, selections) for column in COUNT_COLUMNS},
+        'salary by country': engine.group_salary(df, 'company_location', selections),
+        'columns': engine.columns(df, ['experience_level', 'salary_usd'], selections),
+        **{f'salary stats by {column}': engine.salary_stats(df, column, selections, rows) for column in STATS_COLUMNS},
+    }
+    summary = engine.summary(df, selections)
+    assert index_lookups() == lookups, "the engine read the pandas filter index"
+
+    for label, frame in expected.items():
+        assert_frames_equal(frame, actual[label], label)
+    assert summary['jobs'] == expected_summary['jobs'], f"summary jobs {summary['jobs']}"
+    if expected_summary['avg_salary_usd'] is None:
+        assert summary['avg_salary_usd'] is None, "summary salary"
+    else:
+        assert np.isclose(summary['avg_salary_usd'], expected_summary['avg_salary_usd'], rtol=1e-9), "summary salary"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--combinations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    from utils.data_access import load_jobs
+    from utils.filter_engine import get_filter_index
+    from utils.query_engine import ENGINES, get_engine
+
+    df = load_jobs()
+    if df is None:
+        sys.exit("Dataset unavailable")
+    reference = get_engine('pandas')
+    options = get_filter_index(df).options
+
+    for name in ENGINES:
+        if name == reference.name:
+            continue
+        try:
+            engine = get_engine(name)
+        except ImportError:
+            print(f"{name:<8} skipped (not installed)")
+            continue
+        rng = random.Random(args.seed)
+        for combination in range(args.combinations):
+            selections = random_selections(rng, options) if combination else {}
+            rows = np.sort(rng.sample(range(len(df)), len(df) // 3)) if combination % 2 else None
+            try:
+                compare(reference, engine, df, selections, rows)
+            except AssertionError as e:
+                print(f"{name:<8} MISMATCH on combination {combination}: {e}\n  selections: {selections}")
+                sys.exit(1)
+        print(f"{name:<8} identical to pandas on {args.combinations} filter combinations")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/engines.py
+"""
+Query engine benchmark: pandas vs DuckDB vs Polars.
+
+For each --rows size, builds a synthetic posting CSV by resampling the
+repo dataset, then times in a scratch directory:
+
+- ingestion: data_loader.ingest_dataset with the pandas and polars engines
+  (CSV -> DataFrame with derived columns),
+- queries: each engine of utils/query_engine.py answering the Search Jobs
+  filter masks and the Dashboard aggregates over the published snapshot.
+
+Each timing is the minimum over --repeat runs, after one warm-up run so
+per-version indexes are already built. Engines whose package is not
+installed are skipped.
+
+Usage:
+    python benchmarks/engines.py [--rows 1000000 10000000] [--repeat 3]
+"""
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+# Keep the per-version indexes of the large datasets cached between runs
+os.environ.setdefault('JOB_CACHE_MEMORY_MB', '16384')
+
+DATASET = os.path.join('data', 'ai_job_dataset.csv')
+CHUNK_ROWS = 1_000_000
+
+# A typical Search Jobs request
+SELECTIONS = {
+    'experience_level': ['SE', 'EX'],
+    'company_location': ['Germany', 'United States', 'India'],
+    'skills': ['Python', 'SQL'],
+}
+
+QUERIES = {
+    'filter masks': lambda engine, df: engine.selection_masks(df, SELECTIONS),
+    'counts by job title': lambda engine, df: engine.value_counts(df, 'job_title'),
+    'salary by country': lambda engine, df: engine.group_salary(df, 'company_location'),
+    'filtered summary': lambda engine, df: engine.summary(df, SELECTIONS),
+    'filtered box plot columns': lambda engine, df: engine.columns(df, ['experience_level', 'salary_usd'], SELECTIONS),
+}
+
+
+def make_dataset(path, rows, seed=0):
+    """Write rows postings resampled from the repo dataset, in chunks."""
+    source = pd.read_csv(os.path.join(REPO_ROOT, DATASET))
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for start in range(0, rows, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, rows - start)
+        chunk = source.iloc[rng.integers(0, len(source), size)]
+        chunk = chunk.assign(job_id=[f'AI{i:09d}' for i in range(start, start + size)])
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def best_time(func, repeat):
+    """Minimum wall time of func() over repeat runs, after a warm-up run."""
+    func()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def available_engines(names):
+    from utils.query_engine import get_engine
+
+    engines = {}
+    for name in names:
+        try:
+            engines[name] = get_engine(name)
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+    return engines
+
+
+def run(rows, repeat, engine_names):
+    from utils.data_loader import ingest_dataset
+    from utils.snapshots import publish_snapshot, read_snapshot
+
+    make_dataset(DATASET, rows)
+    print(f"\n{rows:,} rows ({os.path.getsize(DATASET) / 2**20:,.0f} MB CSV)")
+
+    print(f"{'Ingestion':<30} " + ' '.join(f'{name:>10}' for name in ['pandas', 'polars']))
+    timings = []
+    for name in ['pandas', 'polars']:
+        if name == 'polars' and 'polars' not in engine_names:
+            timings.append(None)
+            continue
+        # One run each: ingestion is long enough to be stable and memory bound
+        start = time.perf_counter()
+        df, _ = ingest_dataset([DATASET], engine=name)
+        timings.append(time.perf_counter() - start)
+        del df
+        gc.collect()
+    print(f"{'CSV -> DataFrame (s)':<30} " + ' '.join(
+        f'{t:>10.2f}' if t is not None else f'{"-":>10}' for t in timings
+    ))
+
+    df, _ = ingest_dataset([DATASET], engine='pandas')
+    version = publish_snapshot(df)
+    del df
+    gc.collect()
+    df = read_snapshot(version)
+
+    engines = available_engines(engine_names)
+    print(f"{'Query (ms)':<30} " + ' '.join(f'{name:>10}' for name in engines))
+    for label, query in QUERIES.items():
+        times = [best_time(lambda: query(engine, df), repeat) for engine in engines.values()]
+        print(f"{label:<30} " + ' '.join(f'{t * 1000:>10.1f}' for t in times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per query timing (minimum is reported)")
+    parser.add_argument('--engines', nargs='+', default=['pandas', 'duckdb', 'polars'])
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    workdir = tempfile.mkdtemp(prefix='engines_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        for rows in args.rows:
+            run(rows, args.repeat, args.engines)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/ingest_schemas.py
+"""
+Regression check: ingesting posting files with differing schemas.
+
+Writes --rows postings of the repo dataset into four CSV files in a
+scratch directory: one complete file, and one each missing a categorical
+column (industry), a numeric column (benefits_score) and a date column
+(application_deadline). Ingests them with data_loader.ingest_dataset on
+the pandas and polars engines and checks that:
+
+- every file's rows are kept, with NA in the columns its file lacks,
+- categorical columns stay categorical across the merge,
+- both engines produce the same frame.
+
+Exits with status 1 on the first failure. Engines whose package is not
+installed are skipped.
+
+Usage:
+    python benchmarks/ingest_schemas.py [--rows 4000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DATASET = os.path.join('data', 'ai_job_dataset.csv')
+# File name -> column left out of it
+MISSING = {
+    'complete.csv': None,
+    'no_categorical.csv': 'industry',
+    'no_numeric.csv': 'benefits_score',
+    'no_date.csv': 'application_deadline',
+}
+
+
+def write_files(directory, rows):
+    """Split rows postings into the MISSING files; returns (paths, rows per file)."""
+    source = pd.read_csv(os.path.join(REPO_ROOT, DATASET), nrows=rows)
+    paths, sizes = [], {}
+    for i, (name, column) in enumerate(MISSING.items()):
+        part = source.iloc[i::len(MISSING)]
+        if column:
+            part = part.drop(columns=[column])
+        path = os.path.join(directory, name)
+        part.to_csv(path, index=False)
+        paths.append(path)
+        sizes[column] = len(part)
+    return paths, sizes
+
+
+def check(df, sizes, engine):
+    """Assert the merged frame of one engine; returns it with sorted columns."""
+    from utils.data_loader import CATEGORICAL_COLUMNS
+
+    assert len(df) == sum(sizes.values()), f"{engine}: {len(df)} rows instead of {sum(sizes.values())}"
+    for column, size in sizes.items():
+        if column:
+            missing = int(df[column].isna().sum())
+            assert missing == size, f"{engine}: {missing} missing {column} values instead of {size}"
+    for column in CATEGORICAL_COLUMNS:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype), f"{engine}: {column} is {df[column].dtype}"
+    key = ['job_id']
+    return df[sorted(df.columns)].sort_values(key).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=4000)
+    args = parser.parse_args()
+
+    from utils.data_loader import ingest_dataset
+
+    workdir = tempfile.mkdtemp(prefix='ingest_schemas_')
+    try:
+        paths, sizes = write_files(workdir, args.rows)
+        frames = {}
+        for engine in ['pandas', 'polars']:
+            try:
+                df, _ = ingest_dataset(paths, max_workers=1, engine=engine)
+            except ImportError:
+                print(f"{engine:<8} skipped (not installed)")
+                continue
+            except Exception as e:
+                print(f"{engine:<8} FAILED: {type(e).__name__}: {e}")
+                sys.exit(1)
+            try:
+                frames[engine] = check(df, sizes, engine)
+            except AssertionError as e:
+                print(f"{engine:<8} FAILED: {e}")
+                sys.exit(1)
+            print(f"{engine:<8} {len(df):,} rows from {len(paths)} files with differing schemas")
+
+        if len(frames) == 2:
+            try:
+                pd.testing.assert_frame_equal(frames['pandas'], frames['polars'], check_categorical=False)
+            except AssertionError as e:
+                print(f"Engines differ: {e}")
+                sys.exit(1)
+            print("pandas and polars frames are identical")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
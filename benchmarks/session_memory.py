@@ -0,0 +1,94 @@
+# benchmarks/session_memory.py
+"""
+Per-session memory benchmark for the Search Jobs page.
+
+Runs the page headlessly (streamlit.testing AppTest) in a scratch
+directory whose dataset has --companies distinct companies and
+--locations distinct locations, and reports for one session:
+
+- session state bytes: everything the session keeps in st.session_state,
+  measured with utils.cache.sizeof, excluding the option catalog shared by
+  all sessions (so only per-session copies count),
+- widget bytes: serialized size of the filter multiselects sent to the
+  browser on every rerun (options plus selected defaults).
+
+Both are reported for a fresh session and after picking two locations.
+Multiply by the expected number of concurrent sessions to size a server.
+
+Usage:
+    python benchmarks/session_memory.py [--companies 20000] [--locations 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+PAGE = os.path.join(REPO_ROOT, 'pages', '01_Search_Jobs.py')
+DATASET = os.path.join('data', 'ai_job_dataset.csv')
+
+
+def make_dataset(directory, companies, locations, seed=0):
+    """Copy of the repo dataset with high-cardinality company/location columns."""
+    df = pd.read_csv(os.path.join(REPO_ROOT, DATASET))
+    rng = np.random.default_rng(seed)
+    df['company_name'] = [f'Company {i:06d}' for i in rng.integers(0, companies, len(df))]
+    df['company_location'] = [f'Location {i:04d}' for i in rng.integers(0, locations, len(df))]
+    os.makedirs(os.path.join(directory, 'data'))
+    df.to_csv(os.path.join(directory, DATASET), index=False)
+
+
+def measure(at):
+    """(session state bytes, filter widget bytes) of an AppTest session."""
+    from utils.cache import sizeof
+    from utils.data_access import load_jobs
+    from utils.filter_engine import get_filter_index
+
+    index = get_filter_index(load_jobs())
+    shared = set()
+    sizeof(index.options, shared)
+    state = at.session_state._state.filtered_state
+    state_bytes = sum(sizeof(value, shared) for value in state.values())
+    widget_bytes = sum(widget.proto.ByteSize() for widget in at.multiselect)
+    return state_bytes, widget_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--companies', type=int, default=20000)
+    parser.add_argument('--locations', type=int, default=200)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    workdir = tempfile.mkdtemp(prefix='session_memory_')
+    cwd = os.getcwd()
+    try:
+        make_dataset(workdir, args.companies, args.locations)
+        os.chdir(workdir)
+        at = AppTest.from_file(PAGE, default_timeout=300).run()
+        if at.exception:
+            raise SystemExit(at.exception[0].value)
+
+        print(f"Search Jobs session ({args.companies:,} companies, {args.locations:,} locations)")
+        print(f"{'State':<30} {'session state KB':>17} {'widgets KB':>11}")
+        state_bytes, widget_bytes = measure(at)
+        print(f"{'fresh session':<30} {state_bytes / 1024:>17.1f} {widget_bytes / 1024:>11.1f}")
+
+        locations = at.multiselect(key='loc_filter').options[:2]
+        at.multiselect(key='loc_filter').set_value(locations).run()
+        state_bytes, widget_bytes = measure(at)
+        print(f"{'two locations selected':<30} {state_bytes / 1024:>17.1f} {widget_bytes / 1024:>11.1f}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
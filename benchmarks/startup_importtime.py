@@ -0,0 +1,124 @@
+# benchmarks/startup_importtime.py
+"""
+Startup import-time benchmark for the Streamlit pages.
+
+Uses ``python -X importtime`` in fresh interpreter processes to measure how
+long a new worker spends importing what each page needs before its first
+paint, and how much each lazily imported library adds once the code path
+that needs it runs (first chart, exchange-rate refresh, Kaggle download,
+multi-file ingestion, snapshot read).
+
+Each page's startup set is read from the page file itself: every module it
+imports outside of functions and classes, so the benchmark follows the
+pages as their imports change.
+
+Each measurement is the minimum over --repeat runs. Deferred costs are
+reported on top of the Dashboard startup set, i.e. what a worker pays
+in addition to what it has already imported.
+
+Usage:
+    python benchmarks/startup_importtime.py [--repeat 5]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ['Dashboard.py', 'pages/01_Search_Jobs.py', 'pages/02_About.py']
+
+# Libraries that are only imported when the code path needing them runs.
+# (plotly.graph_objects is not one: importing streamlit already loads it.)
+DEFERRED_SETS = {
+    'plotly.express (first bar chart renders)': ['plotly.express'],
+    'requests (exchange rates refresh)': ['requests'],
+    'utils.kaggle_download (dataset missing)': ['utils.kaggle_download'],
+    'process pool (multi-file ingestion)': ['concurrent.futures.process'],
+    'pyarrow.parquet (snapshot read)': ['pyarrow.parquet'],
+}
+
+
+MARKER = '--- deferred imports start ---'
+
+
+def page_imports(page):
+    """
+    Modules a page imports when its script runs, in order: import
+    statements anywhere outside function and class bodies.
+    """
+    with open(os.path.join(REPO_ROOT, page)) as f:
+        tree = ast.parse(f.read())
+    modules = []
+
+    def visit(node):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                continue
+            if isinstance(child, ast.Import):
+                modules.extend(alias.name for alias in child.names)
+            elif isinstance(child, ast.ImportFrom) and child.module and not child.level:
+                modules.append(child.module)
+            else:
+                visit(child)
+    visit(tree)
+    return list(dict.fromkeys(modules))
+
+
+def import_time_us(modules, repeat, after=()):
+    """
+    Import time in microseconds for importing modules in a fresh
+    interpreter (minimum over repeat runs).
+
+    Modules in `after` are imported first and excluded from the total, so
+    the result is the extra cost of `modules` for a process that already
+    has `after` loaded. Top-level cumulative times from -X importtime are
+    summed, which avoids the run-to-run noise of subtracting two totals.
+    """
+    code = '; '.join(f'import {module}' for module in after)
+    code += f"; import sys; sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush()"
+    code += ''.join(f'; import {module}' for module in modules)
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code.lstrip('; ')],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        lines = result.stderr.splitlines()
+        lines = lines[lines.index(MARKER) + 1:]
+        total = 0
+        for line in lines:
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            _, cumulative, name = line.split(':', 1)[1].split('|')
+            if not name.startswith('  '):
+                # Only top-level imports; nested ones are in their cumulative time
+                total += int(cumulative)
+        best = total if best is None else min(best, total)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement (minimum is reported)")
+    args = parser.parse_args()
+
+    startup_sets = {page: page_imports(page) for page in PAGES}
+    print(f"Startup imports (python -X importtime, best of {args.repeat})")
+    print(f"{'Page':<45} {'ms':>9}  modules")
+    for page, modules in startup_sets.items():
+        print(f"{page:<45} {import_time_us(modules, args.repeat) / 1000:>9.1f}  {', '.join(modules)}")
+
+    baseline_modules = startup_sets['Dashboard.py']
+    print()
+    print("Deferred imports (extra cost on top of the Dashboard startup set)")
+    print(f"{'Code path':<45} {'ms':>9}")
+    for label, modules in DEFERRED_SETS.items():
+        extra = import_time_us(modules, args.repeat, after=baseline_modules)
+        print(f"{label:<45} {extra / 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
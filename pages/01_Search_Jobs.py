@@ -1,10 +1,20 @@
 # pages/01_Search_Jobs.py
 import streamlit as st
-import pandas as pd
 import numpy as np
-import requests
+import pandas as pd
 from datetime import datetime, timedelta
 
+from utils.data_access import (
+    load_jobs, EXPERIENCE_LEVEL_MAP, EMPLOYMENT_TYPE_MAP, COMPANY_SIZE_MAP
+)
+from utils.filter_engine import (
+    get_filter_index, get_sorted_indexes, combine_masks, facet_counts, range_histograms, encode_selection, decode_selection, ALL
+)
+from utils.text_search import get_text_index, suggestions
+from utils.search import correct_skills, search_masks
+from utils.ranking import match_scores, top_k
+from utils.similarity import get_similarity_index, similar_jobs
+
 st.set_page_config(page_title="Search Jobs", page_icon="magnifying_glass", layout="wide")
 
 # Initialize session state
@@ -263,6 +273,9 @@ apply_theme()
 # Fetch currency rates
 @st.cache_data(ttl=3600)
 def fetch_currency_rates():
+    # Imported here so requests only loads when rates actually need fetching
+    import requests
+
     try:
         response = requests.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=5)
         if response.status_code == 200:
@@ -288,35 +301,6 @@ def convert_to_target_currency(amount_usd, target_currency='USD'):
         return amount_usd
     return amount_usd * CURRENCY_RATES.get(target_currency, 1.0)
 
-# Load real data from CSV
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv('data/ai_job_dataset.csv')
-        df['salary_usd'] = pd.to_numeric(df['salary_usd'], errors='coerce')
-        df['posting_date'] = pd.to_datetime(df['posting_date'], errors='coerce')
-        df = df.dropna(subset=['salary_usd', 'posting_date'])
-
-        def categorize_work_type(ratio):
-            if pd.isna(ratio):
-                return 'Unknown'
-            if ratio == 0:
-                return 'On-site'
-            elif ratio == 100:
-                return 'Remote'
-            else:
-                return 'Hybrid'
-
-        if 'remote_ratio' in df.columns:
-            df['work_type'] = df['remote_ratio'].apply(categorize_work_type)
-        else:
-            df['work_type'] = 'Unknown'
-
-        return df
-    except FileNotFoundError:
-        st.error("Dataset file not found at data/ai_job_dataset.csv")
-        return None
-
 # Sidebar settings
 with st.sidebar:
     st.markdown("### Display Settings")
@@ -364,248 +348,520 @@ st.title("Search and Filter Jobs")
 st.markdown("Find AI/ML jobs that match your criteria")
 
 with st.spinner("Loading job data..."):
-    df = load_data()
+    df = load_jobs()
 
 if df is None:
     st.stop()
 
-target_currency = st.session_state.default_currency
-df['salary_target'] = df['salary_usd'].apply(lambda x: convert_to_target_currency(x, target_currency))
-
 # Mapping dictionaries
-experience_level_map = {
-    'EN': 'Entry', 'MI': 'Mid', 'SE': 'Senior',
-    'CT': 'Contract', 'FL': 'Freelance', 'EX': 'Executive'
-}
-employment_type_map = {
-    'FT': 'Full-Time', 'PT': 'Part-Time', 'CT': 'Contract', 'FL': 'Freelance'
-}
-company_size_map = {
-    'S': 'Small', 'M': 'Medium', 'L': 'Large', 'E': 'Enterprise'
-}
-
-# Get all options for filters
-work_type_all = sorted(df['work_type'].unique().tolist())
-exp_all_options = sorted(df['experience_level'].unique().tolist())
+experience_level_map = EXPERIENCE_LEVEL_MAP
+employment_type_map = EMPLOYMENT_TYPE_MAP
+company_size_map = COMPANY_SIZE_MAP
+
+# Option catalog (sorted options, category codes and counts) is computed once
+# per dataset version and shared by all sessions
+filter_index = get_filter_index(df)
+text_index = get_text_index(df)
+similarity_index = get_similarity_index(df)
+filter_options = filter_index.options
+work_type_all = filter_options['work_type']
+exp_all_options = filter_options['experience_level']
 exp_full_options = [experience_level_map.get(opt, opt) for opt in exp_all_options]
-employment_all_options = sorted(df['employment_type'].unique().tolist())
+employment_all_options = filter_options['employment_type']
 employment_full_options = [employment_type_map.get(opt, opt) for opt in employment_all_options]
-loc_all_options = sorted(df['company_location'].unique().tolist())
-size_all_options = sorted(df['company_size'].unique().tolist())
+loc_all_options = filter_options['company_location']
+size_all_options = filter_options['company_size']
 size_full_options = [company_size_map.get(opt, opt) for opt in size_all_options]
-company_all_options = sorted(df['company_name'].unique().tolist())
-
-all_skills = set()
-if 'required_skills' in df.columns:
-    for skills in df['required_skills'].dropna():
-        all_skills.update([s.strip() for s in str(skills).split(',')])
-all_skills_list = sorted(all_skills)
-
-# Initialize filter session states with defaults if not present
-if 'filter_work_type' not in st.session_state:
-    st.session_state.filter_work_type = work_type_all
-if 'filter_experience' not in st.session_state:
-    st.session_state.filter_experience = exp_full_options
-if 'filter_employment' not in st.session_state:
-    st.session_state.filter_employment = employment_full_options
-if 'filter_location' not in st.session_state:
-    st.session_state.filter_location = loc_all_options
-if 'filter_size' not in st.session_state:
-    st.session_state.filter_size = size_full_options
-if 'filter_company' not in st.session_state:
-    st.session_state.filter_company = company_all_options
+company_all_options = filter_options['company_name']
+all_skills_list = filter_options['skills']
+# Lowest and highest value of the date and numeric range columns, for the
+# date pickers and sliders
+sorted_indexes = get_sorted_indexes(df)
+value_bounds = {column: index.bounds or (None, None) for column, index in sorted_indexes.items()}
+
+# Initialize filter session states with defaults if not present. Saved
+# selections are compact (see filter_engine.encode_selection): ALL for an
+# untouched filter, so sessions never hold copies of the option lists, and
+# an empty multiselect means "all options".
+for saved_key in ['filter_work_type', 'filter_experience', 'filter_employment', 'filter_location',
+                  'filter_size', 'filter_company', 'filter_skills']:
+    if saved_key not in st.session_state:
+        st.session_state[saved_key] = ALL
 if 'filter_min_salary' not in st.session_state:
     st.session_state.filter_min_salary = 0
-if 'filter_skills' not in st.session_state:
-    st.session_state.filter_skills = []
-
-# FILTERS IN EXPANDER - More compact
-with st.expander("Filters", expanded=True):
-    # Row 1
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        work_type_options = st.multiselect(
-            "Work Type",
-            options=work_type_all,
-            default=st.session_state.filter_work_type,
-            key='work_type_filter'
-        )
-
-    with col2:
-        experience_selection = st.multiselect(
-            "Career Level",
-            options=exp_full_options,
-            default=st.session_state.filter_experience,
-            key='exp_filter'
-        )
-
-    with col3:
-        employment_selection = st.multiselect(
-            "Job Type",
-            options=employment_full_options,
-            default=st.session_state.filter_employment,
-            key='employment_filter'
-        )
-
-    with col4:
-        location_options = st.multiselect(
-            "Company Location",
-            options=loc_all_options,
-            default=st.session_state.filter_location,
-            key='loc_filter',
-            help="Country where the company is headquartered"
-        )
-
-    # Row 2
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        company_size_selection = st.multiselect(
-            "Organization Size",
-            options=size_full_options,
-            default=st.session_state.filter_size,
-            key='size_filter'
-        )
-
-    with col2:
-        company_options = st.multiselect(
-            "Company",
-            options=company_all_options,
-            default=st.session_state.filter_company,
-            key='company_filter'
-        )
+if 'filter_text' not in st.session_state:
+    st.session_state.filter_text = ''
+# Date filters: () for a range without bounds, None for no "open on" day
+for saved_key in ['filter_posted', 'filter_deadline']:
+    if saved_key not in st.session_state:
+        st.session_state[saved_key] = ()
+if 'filter_open_on' not in st.session_state:
+    st.session_state.filter_open_on = None
+
+# Range sliders: column -> (widget key, saved session key, label, step).
+# Saved ranges are None while a slider covers the column's whole range.
+RANGE_WIDGETS = {
+    'years_experience': ('years_experience_filter', 'filter_years_experience', "Years of Experience", 1),
+    'benefits_score': ('benefits_filter', 'filter_benefits', "Benefits Score", 0.1),
+    'job_description_length': ('description_length_filter', 'filter_description_length', "Description Length (chars)", 1),
+}
+for _, saved_key, _, _ in RANGE_WIDGETS.values():
+    if saved_key not in st.session_state:
+        st.session_state[saved_key] = None
+
+# Filter widgets: column -> (widget key, saved session key, display label map)
+FILTER_WIDGETS = {
+    'work_type': ('work_type_filter', 'filter_work_type', {}),
+    'experience_level': ('exp_filter', 'filter_experience', experience_level_map),
+    'employment_type': ('employment_filter', 'filter_employment', employment_type_map),
+    'company_location': ('loc_filter', 'filter_location', {}),
+    'company_size': ('size_filter', 'filter_size', company_size_map),
+    'company_name': ('company_filter', 'filter_company', {}),
+    'skills': ('skills_filter', 'filter_skills', {}),
+}
 
-    with col3:
-        min_salary = st.number_input(
-            f"Min Salary ({target_currency})",
-            min_value=0,
-            value=st.session_state.filter_min_salary,
-            step=10000,
-            format="%d",
-            key='salary_filter'
-        )
+def to_raw_values(labels, label_map):
+    """Map display labels back to the raw values stored in the dataset."""
+    raw = {label: value for value, label in label_map.items()}
+    return [raw.get(label, label) for label in labels]
+
+def saved_labels(column):
+    """Display labels of a filter's saved selection ([] when all)."""
+    _, saved_key, label_map = FILTER_WIDGETS[column]
+    return [label_map.get(value, value) for value in decode_selection(filter_index, column, st.session_state[saved_key])]
+
+def range_bounds(dates):
+    """(start, end) of a date range picker value, None for a missing bound."""
+    dates = tuple(dates or ())
+    return (dates[0] if dates else None, dates[1] if len(dates) > 1 else None)
+
+def slider_range(column):
+    """Current (low, high) of a range slider, its saved range or the full range."""
+    widget_key, saved_key, _, _ = RANGE_WIDGETS[column]
+    value = st.session_state.get(widget_key, st.session_state[saved_key] or value_bounds[column])
+    if None in value:
+        return value
+    # Float slider steps can carry binary rounding noise (7.6000000000000005)
+    return tuple(round(bound, 6) for bound in value)
+
+def histogram_chart(column, counts):
+    """Small bar chart of a range column's distribution among the matching jobs."""
+    edges = sorted_indexes[column].edges
+    step = RANGE_WIDGETS[column][3]
+    starts = [f"{edge:,.0f}" if isinstance(step, int) else f"{edge:,.1f}" for edge in edges[:-1]]
+    st.bar_chart(
+        pd.DataFrame({'from': starts, 'jobs': counts}), x='from', y='jobs',
+        height=90, x_label="", y_label="", sort=False
+    )
 
-    with col4:
-        skills_options = st.multiselect(
-            "Required Skills",
-            options=all_skills_list,
-            default=st.session_state.filter_skills,
-            key='skills_filter'
-        )
+def facet_format(column, counts):
+    """format_func showing each option of a filter with its job count."""
+    label_map = FILTER_WIDGETS[column][2]
+    by_label = {
+        label_map.get(value, value): int(count)
+        for value, count in zip(filter_options[column], counts[column])
+    }
+    return lambda label: f"{label} ({by_label.get(label, 0):,})"
+
+# Best match ranking: remote preference -> preferred remote_ratio
+REMOTE_PREFERENCES = {'Any': None, 'On-site': 0, 'Hybrid': 50, 'Remote': 100}
+TOP_K_OPTIONS = [25, 100, 500]
+
+# Results table columns: source column -> header
+RESULT_COLUMNS = {
+    'match_score': 'Match %',
+    'similarity': 'Similarity %',
+    'job_title': 'Job Title',
+    'company_name': 'Company',
+    'experience_level': 'Career Level',
+    'employment_type': 'Job Type',
+    'work_type': 'Work Type',
+    'company_location': 'Company Location',
+    'company_size': 'Organization Size',
+    'salary_display': 'Salary',
+    'remote_ratio': 'Remote %'
+}
+RESULT_COLUMN_CONFIG = {
+    header: st.column_config.ProgressColumn(header, format=number_format, min_value=0, max_value=100)
+    for header, number_format in [('Remote %', "%d%%"), ('Match %', "%.0f%%"), ('Similarity %', "%.0f%%")]
+}
 
-# Update session state from widget values
-st.session_state.filter_work_type = work_type_options if work_type_options else work_type_all
-st.session_state.filter_experience = experience_selection if experience_selection else exp_full_options
-st.session_state.filter_employment = employment_selection if employment_selection else employment_full_options
-st.session_state.filter_location = location_options if location_options else loc_all_options
-st.session_state.filter_size = company_size_selection if company_size_selection else size_full_options
-st.session_state.filter_company = company_options if company_options else company_all_options
-st.session_state.filter_min_salary = min_salary
-st.session_state.filter_skills = skills_options
-
-# Convert selections back to raw values for filtering
-experience_options = [k for k, v in experience_level_map.items() if v in (experience_selection if experience_selection else exp_full_options)]
-if not experience_options:
-    experience_options = exp_all_options
-
-employment_options = [k for k, v in employment_type_map.items() if v in (employment_selection if employment_selection else employment_full_options)]
-if not employment_options:
-    employment_options = employment_all_options
-
-company_size_options = [k for k, v in company_size_map.items() if v in (company_size_selection if company_size_selection else size_full_options)]
-if not company_size_options:
-    company_size_options = size_all_options
-
-# Apply filters
-work_type_filter = work_type_options if work_type_options else work_type_all
-location_filter = location_options if location_options else loc_all_options
-company_filter = company_options if company_options else company_all_options
-
-# Filter data
-with st.spinner("Filtering jobs..."):
-    filtered_df = df.copy()
-
-    filtered_df = filtered_df[filtered_df['work_type'].isin(work_type_filter)]
-    filtered_df = filtered_df[filtered_df['experience_level'].isin(experience_options)]
-    filtered_df = filtered_df[filtered_df['employment_type'].isin(employment_options)]
-    filtered_df = filtered_df[filtered_df['company_location'].isin(location_filter)]
-    filtered_df = filtered_df[filtered_df['company_size'].isin(company_size_options)]
-    filtered_df = filtered_df[filtered_df['company_name'].isin(company_filter)]
-    filtered_df = filtered_df[filtered_df['salary_target'] >= min_salary]
-
-    if skills_options:
-        filtered_df = filtered_df[filtered_df['required_skills'].apply(
-            lambda x: any(skill in str(x) for skill in skills_options) if pd.notna(x) else False
-        )]
-
-# Display results count
-st.markdown(f"**Found {len(filtered_df):,} jobs** matching your criteria")
-if target_currency != 'USD':
-    st.caption(f"Salaries converted from USD to {target_currency} using ExchangeRate-API")
-
-# Display table
-if len(filtered_df) > 0:
-    display_df = filtered_df.copy()
+def results_table(frame, target_currency):
+    """Display copy of result rows: readable labels and formatted salaries."""
+    display_df = frame.copy()
     display_df['salary_display'] = display_df['salary_target'].apply(
         lambda x: f"{x:,.0f} {target_currency}"
     )
     if 'experience_level' in display_df.columns:
-        display_df['experience_level'] = display_df['experience_level'].map(experience_level_map).fillna(display_df['experience_level'])
+        display_df['experience_level'] = display_df['experience_level'].cat.rename_categories(lambda c: experience_level_map.get(c, c))
     if 'employment_type' in display_df.columns:
-        display_df['employment_type'] = display_df['employment_type'].map(employment_type_map).fillna(display_df['employment_type'])
+        display_df['employment_type'] = display_df['employment_type'].cat.rename_categories(lambda c: employment_type_map.get(c, c))
     if 'company_size' in display_df.columns:
-        display_df['company_size'] = display_df['company_size'].map(company_size_map).fillna(display_df['company_size'])
-
-    display_columns = {
-        'job_title': 'Job Title',
-        'company_name': 'Company',
-        'experience_level': 'Career Level',
-        'employment_type': 'Job Type',
-        'work_type': 'Work Type',
-        'company_location': 'Company Location',
-        'company_size': 'Organization Size',
-        'salary_display': f'Salary ({target_currency})',
-        'remote_ratio': 'Remote %'
+        display_df['company_size'] = display_df['company_size'].cat.rename_categories(lambda c: company_size_map.get(c, c))
+
+    available_cols = [col for col in RESULT_COLUMNS if col in display_df.columns]
+    headers = {col: RESULT_COLUMNS[col] for col in available_cols}
+    headers['salary_display'] = f'Salary ({target_currency})'
+    return display_df[available_cols].rename(columns=headers)
+
+# Filters and results run as a fragment: editing a filter reruns only this
+# section, not the theme, exchange-rate and data-loading code above it.
+# Theme and currency changes still trigger a full rerun via st.rerun().
+@st.fragment
+def search_jobs(df):
+    target_currency = st.session_state.default_currency
+    salary_target = convert_to_target_currency(df['salary_usd'], target_currency)
+
+    # Skills typed into the skills box that are not in the vocabulary (e.g.
+    # "pytorh") are replaced by their closest fuzzy match before it renders
+    skill_corrections = []
+    typed_skills = st.session_state.get('skills_filter', [])
+    if any(skill not in all_skills_list for skill in typed_skills):
+        st.session_state.skills_filter, skill_corrections = correct_skills(df, typed_skills)
+
+    # Masks are built from the current widget values (saved defaults before
+    # the first render) so facet counts are known before drawing the widgets
+    selections = {
+        column: to_raw_values(st.session_state.get(widget_key, saved_labels(column)), label_map)
+        for column, (widget_key, _, label_map) in FILTER_WIDGETS.items()
     }
+    text_query = st.session_state.get('text_filter', st.session_state.filter_text)
+    masks, similar_titles = search_masks(
+        df, selections, text_query,
+        salary=salary_target,
+        min_salary=st.session_state.get('salary_filter', st.session_state.filter_min_salary),
+        date_ranges={
+            'posting_date': range_bounds(st.session_state.get('posted_filter', st.session_state.filter_posted)),
+            'application_deadline': range_bounds(st.session_state.get('deadline_filter', st.session_state.filter_deadline)),
+        },
+        open_on=st.session_state.get('open_on_filter', st.session_state.filter_open_on),
+        ranges={column: slider_range(column) for column in RANGE_WIDGETS}
+    )
 
-    available_cols = [col for col in display_columns.keys() if col in display_df.columns]
-    display_columns_filtered = {col: display_columns[col] for col in available_cols}
-
-    st.dataframe(
-        display_df[available_cols].rename(columns=display_columns_filtered),
-        use_container_width=True,
-        height=500,
-        column_config={
-            "Remote %": st.column_config.ProgressColumn(
-                "Remote %",
-                format="%d%%",
+    # FILTERS IN EXPANDER - More compact
+    with st.expander("Filters", expanded=True):
+        col1, col2 = st.columns([3, 1])
+
+        with col1:
+            st.text_input(
+                "Search",
+                value=st.session_state.filter_text,
+                placeholder="Job title, company or industry, e.g. 'data sci' or 'health'",
+                key='text_filter'
+            )
+            completions = suggestions(text_index, text_query)
+            if similar_titles:
+                st.caption(f"No exact matches for '{text_query}'. Showing similar job titles: " + ", ".join(similar_titles))
+            elif completions:
+                st.caption("Matches: " + " · ".join(f"{value} ({count:,})" for _, value, count in completions))
+
+        with col2:
+            faceted = st.toggle(
+                "Show job counts per option", key='faceted_mode',
+                help="Each option shows how many jobs match it given the other active filters, "
+                     "and each range slider the distribution of those jobs"
+            )
+        if faceted:
+            counts = facet_counts(filter_index, masks)
+            option_format = {column: facet_format(column, counts) for column in FILTER_WIDGETS}
+            histograms = range_histograms(sorted_indexes, masks)
+        else:
+            histograms = {}
+            option_format = dict.fromkeys(FILTER_WIDGETS, str)
+
+        # Row 1
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            work_type_options = st.multiselect(
+                "Work Type",
+                options=work_type_all,
+                default=saved_labels('work_type'),
+                placeholder="All",
+                format_func=option_format['work_type'],
+                key='work_type_filter'
+            )
+
+        with col2:
+            experience_selection = st.multiselect(
+                "Career Level",
+                options=exp_full_options,
+                default=saved_labels('experience_level'),
+                placeholder="All",
+                format_func=option_format['experience_level'],
+                key='exp_filter'
+            )
+
+        with col3:
+            employment_selection = st.multiselect(
+                "Job Type",
+                options=employment_full_options,
+                default=saved_labels('employment_type'),
+                placeholder="All",
+                format_func=option_format['employment_type'],
+                key='employment_filter'
+            )
+
+        with col4:
+            location_options = st.multiselect(
+                "Company Location",
+                options=loc_all_options,
+                default=saved_labels('company_location'),
+                placeholder="All",
+                format_func=option_format['company_location'],
+                key='loc_filter',
+                help="Country where the company is headquartered"
+            )
+
+        # Row 2
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            company_size_selection = st.multiselect(
+                "Organization Size",
+                options=size_full_options,
+                default=saved_labels('company_size'),
+                placeholder="All",
+                format_func=option_format['company_size'],
+                key='size_filter'
+            )
+
+        with col2:
+            company_options = st.multiselect(
+                "Company",
+                options=company_all_options,
+                default=saved_labels('company_name'),
+                placeholder="All",
+                format_func=option_format['company_name'],
+                key='company_filter'
+            )
+
+        with col3:
+            min_salary = st.number_input(
+                f"Min Salary ({target_currency})",
                 min_value=0,
-                max_value=100,
-            ),
-        }
-    )
+                value=st.session_state.filter_min_salary,
+                step=10000,
+                format="%d",
+                key='salary_filter'
+            )
+
+        with col4:
+            skills_options = st.multiselect(
+                "Required Skills",
+                options=all_skills_list,
+                default=None if 'skills_filter' in st.session_state else saved_labels('skills'),
+                placeholder="Any",
+                format_func=option_format['skills'],
+                accept_new_options=True,
+                help="Type a skill and press Enter; misspellings are matched to the closest skill",
+                key='skills_filter'
+            )
+            for typed, skill in skill_corrections:
+                st.caption(f"'{typed}' matched {skill}" if skill else f"No skill similar to '{typed}'")
+
+        # Row 3 - Dates
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            posted_range = st.date_input(
+                "Posted Between",
+                value=st.session_state.filter_posted,
+                min_value=value_bounds['posting_date'][0],
+                max_value=value_bounds['posting_date'][1],
+                key='posted_filter'
+            )
+
+        with col2:
+            deadline_range = st.date_input(
+                "Application Deadline Between",
+                value=st.session_state.filter_deadline,
+                min_value=value_bounds['application_deadline'][0],
+                max_value=value_bounds['application_deadline'][1],
+                key='deadline_filter'
+            )
+
+        with col3:
+            open_on = st.date_input(
+                "Still Open On",
+                value=st.session_state.filter_open_on,
+                min_value=value_bounds['posting_date'][0],
+                max_value=value_bounds['application_deadline'][1],
+                key='open_on_filter',
+                help="Jobs posted on or before this day whose application deadline has not passed"
+            )
+
+        # Row 4 - Numeric ranges
+        range_values = {}
+        for column, col in zip(RANGE_WIDGETS, st.columns(4)):
+            widget_key, saved_key, label, step = RANGE_WIDGETS[column]
+            low, high = value_bounds[column]
+            if low is None:
+                continue
+            with col:
+                if column in histograms:
+                    histogram_chart(column, histograms[column])
+                range_values[column] = st.slider(
+                    label,
+                    min_value=low,
+                    max_value=high,
+                    value=st.session_state[saved_key] or (low, high),
+                    step=step,
+                    key=widget_key
+                )
+
+        # Row 5 - Best match ranking
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            result_order = st.radio(
+                "Order Results",
+                options=["Posting order", "Best match"],
+                horizontal=True,
+                key='order_filter',
+                help="Best match scores jobs by the selected skills (rare skills count more), closeness to the target salary and remote preference"
+            )
+        ranked = result_order == "Best match"
+
+        with col2:
+            target_salary = st.number_input(
+                f"Target Salary ({target_currency})",
+                min_value=0,
+                value=0,
+                step=10000,
+                format="%d",
+                disabled=not ranked,
+                key='target_salary_filter'
+            )
+
+        with col3:
+            remote_preference = st.selectbox(
+                "Remote Preference",
+                options=list(REMOTE_PREFERENCES),
+                disabled=not ranked,
+                key='remote_preference_filter'
+            )
+
+        with col4:
+            top_n = st.selectbox(
+                "Show Top",
+                options=TOP_K_OPTIONS,
+                index=1,
+                disabled=not ranked,
+                key='top_k_filter'
+            )
+
+    # Update session state from widget values
+    widget_values = {
+        'work_type': work_type_options, 'experience_level': experience_selection,
+        'employment_type': employment_selection, 'company_location': location_options,
+        'company_size': company_size_selection, 'company_name': company_options,
+        'skills': skills_options,
+    }
+    for column, labels in widget_values.items():
+        _, saved_key, label_map = FILTER_WIDGETS[column]
+        st.session_state[saved_key] = encode_selection(filter_index, column, to_raw_values(labels, label_map))
+    st.session_state.filter_min_salary = min_salary
+    st.session_state.filter_text = text_query
+    st.session_state.filter_posted = tuple(posted_range)
+    st.session_state.filter_deadline = tuple(deadline_range)
+    st.session_state.filter_open_on = open_on
+    for column, value in range_values.items():
+        value = tuple(round(bound, 6) for bound in value)
+        st.session_state[RANGE_WIDGETS[column][1]] = None if value == value_bounds[column] else value
+
+    # Filter data
+    with st.spinner("Filtering jobs..."):
+        mask = combine_masks(masks, filter_index.n_jobs)
+
+        # The shared dataset is read-only; per-session columns go on the filtered copy
+        filtered_df = df[mask].assign(salary_target=salary_target[mask])
+
+        # Row positions (in df) of the rows shown in the results table
+        result_rows = np.flatnonzero(mask)
+        if ranked:
+            # Score every match, then keep only the top k (argpartition, no full sort)
+            rate = 1.0 if target_currency == 'USD' else CURRENCY_RATES.get(target_currency, 1.0)
+            candidates = result_rows
+            scores = match_scores(
+                df, filter_index, candidates,
+                skills=skills_options,
+                target_salary_usd=target_salary / rate,
+                remote_ratio=REMOTE_PREFERENCES[remote_preference]
+            )
+            result_rows, row_scores = top_k(candidates, scores, top_n)
+            results_df = df.iloc[result_rows].assign(
+                salary_target=salary_target.to_numpy()[result_rows], match_score=row_scores * 100
+            )
+        else:
+            results_df = filtered_df
 
-    # Prepare full raw data for download
-    download_df = filtered_df.copy()
-    download_df['salary_converted'] = download_df['salary_target']
-    download_df['converted_currency'] = target_currency
+    # Display results count
+    st.markdown(f"**Found {len(filtered_df):,} jobs** matching your criteria")
+    if ranked and len(filtered_df) > 0:
+        if skills_options or target_salary or REMOTE_PREFERENCES[remote_preference] is not None:
+            st.caption(f"Showing the top {len(results_df):,} by best-match score")
+        else:
+            st.caption("Select skills, a target salary or a remote preference to rank the results")
+    if target_currency != 'USD':
+        st.caption(f"Salaries converted from USD to {target_currency} using ExchangeRate-API")
+
+    # Display table
+    if len(filtered_df) > 0:
+        event = st.dataframe(
+            results_table(results_df, target_currency),
+            use_container_width=True,
+            height=500,
+            column_config=RESULT_COLUMN_CONFIG,
+            on_select="rerun",
+            selection_mode="single-row",
+            key='results_table'
+        )
 
-    csv = download_df.to_csv(index=False).encode('utf-8')
+        # Similar jobs for the selected row
+        st.markdown("**Similar Jobs**")
+        selected = [position for position in event.selection.rows if position < len(result_rows)]
+        if selected:
+            row = result_rows[selected[0]]
+            job = df.iloc[row]
+            within_results = st.checkbox("Only show jobs matching the current filters", key='similar_within_filters')
+            similar_rows, similar_scores = similar_jobs(
+                similarity_index, row, k=10,
+                candidates=np.flatnonzero(mask) if within_results else None
+            )
+            st.caption(f"Postings most similar to {job['job_title']} at {job['company_name']}, by required skills and job attributes")
+            st.dataframe(
+                results_table(df.iloc[similar_rows].assign(
+                    salary_target=salary_target.to_numpy()[similar_rows], similarity=similar_scores * 100
+                ), target_currency),
+                use_container_width=True,
+                column_config=RESULT_COLUMN_CONFIG
+            )
+        else:
+            st.caption("Select a row in the table above to see similar jobs")
 
-    st.markdown("---")
-    st.markdown("**Download Complete Dataset**")
-    st.caption("The CSV includes ALL data fields for filtered jobs: required_skills, posting_date, salary_usd (original), salary_converted, and more fields not shown in the table above.")
-
-    st.download_button(
-        label="Download Filtered Data as CSV (All Fields)",
-        data=csv,
-        file_name="aiml_jobs_filtered_complete.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
-else:
-    st.warning("No jobs match your criteria. Try adjusting the filters.")
+        # Prepare full raw data for download
+        download_df = filtered_df.copy()
+        download_df['salary_converted'] = download_df['salary_target']
+        download_df['converted_currency'] = target_currency
+
+        csv = download_df.to_csv(index=False).encode('utf-8')
+
+        st.markdown("---")
+        st.markdown("**Download Complete Dataset**")
+        st.caption("The CSV includes ALL data fields for filtered jobs: required_skills, posting_date, salary_usd (original), salary_converted, and more fields not shown in the table above.")
+
+        st.download_button(
+            label="Download Filtered Data as CSV (All Fields)",
+            data=csv,
+            file_name="aiml_jobs_filtered_complete.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+    else:
+        st.warning("No jobs match your criteria. Try adjusting the filters.")
+
+search_jobs(df)
 
 # Footer
 st.markdown("---")
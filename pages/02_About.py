@@ -399,8 +399,8 @@ st.subheader("Dataset Information")
 st.markdown("""
 **Source:** Global AI Job Market Trend 2025
 
-**Description:** This dataset contains approximately 2,000+ AI/ML job postings collected between
-October 2024 and July 2025. It includes information about job titles, companies, locations,
+**Description:** This dataset contains 15,000 AI/ML job postings collected between
+January 2024 and April 2025. It includes information about job titles, companies, locations,
 salaries, required skills, and work arrangements.
 
 **Data Fields:**
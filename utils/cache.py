@@ -0,0 +1,420 @@
+# utils/cache.py
+"""
+Shared cache layer for datasets, derived indexes, aggregates and query results.
+
+Cached values live in a byte-accounted in-memory LRU (one per process)
+and, optionally, in an on-disk sqlite tier shared by every worker process
+on the machine:
+
+- MemoryCache measures each value (DataFrames with memory_usage(deep=True),
+  numpy arrays by nbytes, containers and dataclasses recursively) and
+  evicts least recently used entries once the total exceeds its budget.
+  Values larger than the whole budget are not kept; they are counted as
+  'oversize' and logged. Functions cached with pin=True (the dataset
+  itself) keep their latest value pinned outside the LRU and its budget,
+  so neither a large dataset nor a burst of index and response entries can
+  push it out and force a reload on every rerun.
+- SqliteCache stores pickled values with their size and last access time
+  and evicts the least recently used rows beyond its own budget. It lets a
+  freshly started process reuse indexes another process already built.
+
+Both implement the CacheBackend interface (get/set/stats/clear), and
+TieredCache combines them. Functions opt in with the @cached decorator;
+like st.cache_resource, arguments whose names start with an underscore are
+not part of the key, and callers must treat returned values as read-only.
+
+Usage from the command line (disk tier):
+    python -m utils.cache stats
+    python -m utils.cache clear
+
+Configuration (Streamlit secrets [cache] section, then environment):
+    memory_mb / JOB_CACHE_MEMORY_MB   In-memory budget (default 1024)
+    dir       / JOB_CACHE_DIR         Directory of the disk tier (off if unset)
+    disk_mb   / JOB_CACHE_DISK_MB     Disk tier budget (default 4096)
+"""
+import contextlib
+import dataclasses
+import functools
+import inspect
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_DISK_MB = 4096
+DISK_FILE = 'cache.sqlite'
+
+logger = logging.getLogger(__name__)
+
+
+def sizeof(value, seen=None):
+    """
+    Approximate memory footprint of a value in bytes.
+
+    Args:
+        value: Object to measure
+        seen (set): ids of objects not to count, e.g. shared catalogs;
+            updated with every object visited
+
+    Returns:
+        int: Size in bytes, counting shared objects once
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes if value.dtype != object else value.nbytes + sum(sizeof(v, seen) for v in value.ravel())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k, seen) + sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v, seen) for v in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sys.getsizeof(value) + sum(sizeof(getattr(value, f.name), seen) for f in dataclasses.fields(value))
+    return sys.getsizeof(value)
+
+
+class CacheBackend:
+    """Interface of cache tiers."""
+
+    def get(self, key):
+        """Return the cached value, or raise KeyError."""
+        raise NotImplementedError
+
+    def set(self, key, value, size, pin=None):
+        """
+        Store a value of the given size in bytes.
+
+        pin names a slot (e.g. a namespace) whose latest value is kept
+        regardless of the budget, where the tier supports it.
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Dict of counters for monitoring."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop every entry."""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache bounded by total value size, plus pinned values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._oversize = 0
+        # Pin slot -> (key, value, size), outside the LRU and its budget
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            for pinned_key, value, _ in self._pinned.values():
+                if pinned_key == key:
+                    return value
+            value, _ = self._entries[key]
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size, pin=None):
+        with self._lock:
+            if pin is not None:
+                # The previously pinned value of the slot (e.g. the old
+                # dataset version during a swap) becomes an ordinary entry
+                previous = self._pinned.get(pin)
+                self._pinned[pin] = (key, value, size)
+                self._discard(key)
+                if previous is None or previous[0] == key:
+                    return
+                key, value, size = previous
+            if size > self.max_bytes:
+                self._oversize += 1
+                logger.warning(
+                    "Not caching %s: %.0f MB exceeds the %.0f MB memory budget (JOB_CACHE_MEMORY_MB)",
+                    key[:120], size / 2**20, self.max_bytes / 2**20
+                )
+                return
+            self._discard(key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def _discard(self, key):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self._bytes,
+                'max_bytes': self.max_bytes, 'evictions': self._evictions,
+                'oversize': self._oversize,
+                'pinned': len(self._pinned), 'pinned_bytes': sum(size for _, _, size in self._pinned.values()),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self._bytes = 0
+
+
+class SqliteCache(CacheBackend):
+    """Pickled values in a sqlite file shared by all local processes."""
+
+    def __init__(self, directory, max_bytes):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, DISK_FILE)
+        self.max_bytes = max_bytes
+        self._evictions = 0
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)'
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this thread and
+        # process safe; sqlite serializes concurrent writers. The transaction
+        # is committed (or rolled back) and the connection closed on exit.
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key):
+        with self._connect() as db:
+            row = db.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+        return pickle.loads(row[0])
+
+    def set(self, key, value, size=None, pin=None):
+        # Pinning only applies to the memory tier. Disk usage is accounted by the pickled size, not the in-memory one
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        with self._connect() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                (key, blob, len(blob), time.time())
+            )
+            total = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            for evict_key, evict_size in db.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute('DELETE FROM entries WHERE key = ?', (evict_key,))
+                total -= evict_size
+                self._evictions += 1
+
+    def stats(self):
+        with self._connect() as db:
+            entries, total = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {
+            'entries': entries, 'bytes': total, 'max_bytes': self.max_bytes,
+            'evictions': self._evictions, 'path': self.path,
+        }
+
+    def clear(self):
+        with self._connect() as db:
+            db.execute('DELETE FROM entries')
+
+
+class TieredCache:
+    """Memory tier in front of an optional disk tier, with hit/miss counters."""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace, counter):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, {'hits': 0, 'disk_hits': 0, 'misses': 0})
+            counters[counter] += 1
+
+    def get(self, namespace, key, use_disk, count=True):
+        """Return (found, value), promoting disk hits to memory."""
+        found, value, counter = False, None, 'misses'
+        try:
+            found, value, counter = True, self.memory.get(key), 'hits'
+        except KeyError:
+            if use_disk and self.disk is not None:
+                try:
+                    found, value, counter = True, self.disk.get(key), 'disk_hits'
+                    self.memory.set(key, value, sizeof(value))
+                except KeyError:
+                    pass
+        if count:
+            self._count(namespace, counter)
+        return found, value
+
+    def set(self, key, value, use_disk, pin=None):
+        self.memory.set(key, value, sizeof(value), pin)
+        if use_disk and self.disk is not None:
+            self.disk.set(key, value, None)
+
+    def stats(self):
+        with self._lock:
+            namespaces = {name: dict(counters) for name, counters in self._counters.items()}
+        return {
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats() if self.disk is not None else None,
+            'namespaces': namespaces,
+        }
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def _setting(name, env_var, default):
+    try:
+        if hasattr(st, 'secrets') and 'cache' in st.secrets and name in st.secrets['cache']:
+            return st.secrets['cache'][name]
+    except FileNotFoundError:
+        # No secrets.toml at all
+        pass
+    return os.environ.get(env_var, default)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide TieredCache, configured on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            memory = MemoryCache(int(float(_setting('memory_mb', 'JOB_CACHE_MEMORY_MB', DEFAULT_MEMORY_MB)) * 2**20))
+            directory = _setting('dir', 'JOB_CACHE_DIR', None)
+            disk = None
+            if directory:
+                disk = SqliteCache(directory, int(float(_setting('disk_mb', 'JOB_CACHE_DISK_MB', DEFAULT_DISK_MB)) * 2**20))
+            _cache = TieredCache(memory, disk)
+        return _cache
+
+
+def cache_stats():
+    """Hit/miss counters per cached function and memory/disk usage."""
+    return get_cache().stats()
+
+
+# Key -> [lock, number of threads holding or waiting for it, computed value]
+_key_locks = {}
+_MISSING = object()
+_key_locks_lock = threading.Lock()
+
+
+def cached(namespace=None, disk=False, pin=False):
+    """
+    Decorator caching a function's results in the shared cache layer.
+
+    Arguments whose names start with '_' are excluded from the key, so
+    derived values are keyed by e.g. the dataset version rather than by
+    hashing a DataFrame. Concurrent calls with the same key compute the
+    value once, even when it cannot be kept in the cache.
+
+    Args:
+        namespace (str): Key prefix and stats label (defaults to the
+            function's qualified name)
+        disk (bool): Also store results in the shared disk tier when one is
+            configured; values must be picklable
+        pin (bool): Keep the most recent result pinned in memory, outside
+            the LRU and its budget (the previous one becomes an ordinary
+            entry)
+
+    Returns:
+        callable: Decorator
+    """
+    def decorate(func):
+        name = namespace or f'{func.__module__}.{func.__qualname__}'
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_args = tuple((k, v) for k, v in bound.arguments.items() if not k.startswith('_'))
+            key = f'{name}:{key_args!r}'
+
+            cache = get_cache()
+            found, value = cache.get(name, key, disk)
+            if found:
+                return value
+            with _key_locks_lock:
+                entry = _key_locks.setdefault(key, [threading.Lock(), 0, _MISSING])
+                entry[1] += 1
+            try:
+                with entry[0]:
+                    # Another thread may have computed it while we waited;
+                    # its result is also handed over through the entry, for
+                    # values the cache could not keep
+                    found, value = cache.get(name, key, disk, count=False)
+                    if not found and entry[2] is not _MISSING:
+                        found, value = True, entry[2]
+                    if not found:
+                        value = func(*args, **kwargs)
+                        cache.set(key, value, disk, pin=name if pin else None)
+                        entry[2] = value
+            finally:
+                # The entry is dropped only once no thread holds or waits for it
+                with _key_locks_lock:
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del _key_locks[key]
+            return value
+        return wrapper
+    return decorate
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the shared disk cache tier")
+    parser.add_argument('command', choices=['stats', 'clear'])
+    args = parser.parse_args()
+
+    disk = get_cache().disk
+    if disk is None:
+        parser.error("No disk tier configured (set JOB_CACHE_DIR or [cache] dir in secrets)")
+    if args.command == 'stats':
+        print(json.dumps(disk.stats(), indent=2))
+    else:
+        disk.clear()
+        print(f"Cleared {disk.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# utils/charts.py
+"""
+Chart helpers that keep plotly payloads bounded regardless of dataset size.
+
+Instead of handing plotly every raw value (which is serialized to JSON and
+shipped to the browser), charts are drawn from precomputed summaries such
+as box statistics. Where individual points are still useful (e.g. box plot
+outliers) they are downsampled on the server and drawn with WebGL
+(Scattergl).
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.sampling import weighted_quantiles
+
+# Upper bound on raw points any single trace sends to the browser
+MAX_POINTS_PER_TRACE = 200
+
+
+def box_summary(values, max_outliers=MAX_POINTS_PER_TRACE, seed=0, weights=None):
+    """
+    Precompute the statistics plotly needs to draw one box.
+
+    Fences follow plotly's default (Tukey) rule: the most extreme values
+    within 1.5 IQR of the quartiles.
+
+    Args:
+        values (array-like): Raw values of one group
+        max_outliers (int): Maximum outliers kept after downsampling
+        seed (int): Seed for the outlier sample, so reruns are stable
+        weights (array-like): Postings each value stands for, when values
+            are a weighted sample (see utils/sampling.py) or the centroids
+            of a quantile sketch (see utils/sketches.py)
+
+    Returns:
+        dict: q1, median, q3, lowerfence, upperfence, mean, sd, count and a
+        downsampled 'outliers' array; None for an empty group
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=float)
+    present = ~np.isnan(values)
+    values, weights = values[present], weights[present]
+    if values.size == 0:
+        return None
+
+    if (weights == 1).all():
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+    else:
+        q1, median, q3 = weighted_quantiles(values, weights, [0.25, 0.5, 0.75])
+    mean = np.average(values, weights=weights)
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': inside.min(), 'upperfence': inside.max(),
+        'mean': mean, 'sd': np.sqrt(np.average((values - mean) ** 2, weights=weights)),
+        'count': int(round(weights.sum())),
+        'outliers': downsample(outliers, max_outliers, seed),
+    }
+
+
+def downsample(values, max_points=MAX_POINTS_PER_TRACE, seed=0):
+    """
+    Return at most max_points values, sampled uniformly without replacement.
+
+    Args:
+        values (np.ndarray): Values to thin out
+        max_points (int): Size bound of the result
+        seed (int): Random seed for a stable sample across reruns
+
+    Returns:
+        np.ndarray: values itself if small enough, else a sorted sample
+    """
+    if len(values) <= max_points:
+        return values
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(values, size=max_points, replace=False))
+
+
+def add_summary_box(fig, summary, name, color):
+    """
+    Add a box drawn from precomputed statistics, plus its downsampled
+    outliers as a WebGL scatter, to a plotly figure.
+
+    Args:
+        fig (go.Figure): Figure to draw into
+        summary (dict): Output of box_summary
+        name (str): Category label on the x axis
+        color (str): Marker color
+    """
+    fig.add_trace(go.Box(
+        x=[name], name=name, marker_color=color, boxmean='sd', boxpoints=False,
+        q1=[summary['q1']], median=[summary['median']], q3=[summary['q3']],
+        lowerfence=[summary['lowerfence']], upperfence=[summary['upperfence']],
+        mean=[summary['mean']], sd=[summary['sd']]
+    ))
+    if len(summary['outliers']):
+        fig.add_trace(go.Scattergl(
+            x=[name] * len(summary['outliers']), y=summary['outliers'],
+            mode='markers', marker=dict(color=color, size=4, opacity=0.6),
+            name=name, showlegend=False,
+            hovertemplate='%{y:,.0f}<extra></extra>'
+        ))
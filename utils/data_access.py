@@ -0,0 +1,233 @@
+# utils/data_access.py
+"""
+Shared data access layer imported by every page.
+
+Owns loading, derived columns, lookup indexes and caching of the job
+dataset. The dataset is served from immutable versioned snapshots (see
+utils/snapshots.py) and everything here is cached in the shared cache
+layer (utils/cache.py) keyed by dataset version, so each process loads and
+derives a version once and all sessions and pages share the same objects;
+derived indexes can also be reused across processes through the disk tier.
+When a new snapshot is published, processes switch to it on their next
+rerun and the old version's entries age out of the size-bounded cache.
+
+Callers must treat returned frames and arrays as read-only and derive
+per-session values (e.g. converted salaries) into new objects instead of
+adding columns. Derived helpers take the loaded frame and read its version
+from ``df.attrs['dataset_version']``, so a rerun never mixes indexes from
+two different versions.
+"""
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+from utils.cache import cached
+from utils.data_loader import DEFAULT_SOURCE, download_kaggle_dataset
+from utils.rollups import build_rollups
+from utils.sampling import build_sample
+from utils.sketches import build_sketches
+from utils.snapshots import ensure_snapshot, read_manifest, read_snapshot, read_rollups, read_sample, read_sketches
+
+# Display labels for the coded columns of the Kaggle dataset
+EXPERIENCE_LEVEL_MAP = {
+    'EN': 'Entry', 'MI': 'Mid', 'SE': 'Senior',
+    'CT': 'Contract', 'FL': 'Freelance', 'EX': 'Executive'
+}
+EMPLOYMENT_TYPE_MAP = {
+    'FT': 'Full-Time', 'PT': 'Part-Time', 'CT': 'Contract', 'FL': 'Freelance'
+}
+COMPANY_SIZE_MAP = {
+    'S': 'Small', 'M': 'Medium', 'L': 'Large', 'E': 'Enterprise'
+}
+EXPERIENCE_ORDER = ['EN', 'MI', 'SE', 'EX']
+
+
+def current_dataset_version(source=DEFAULT_SOURCE):
+    """
+    Resolve the dataset version to serve for this rerun.
+
+    Publishes a new snapshot first if the source files changed (one process
+    does the work, the others wait and reuse it).
+
+    Returns:
+        str: Snapshot version, or None while the dataset is unavailable
+    """
+    # Resolved outside any cache so a missing or downloading dataset is
+    # never cached as None
+    files = download_kaggle_dataset(source=source)
+    if not files:
+        return None
+    return ensure_snapshot(files)
+
+
+def load_jobs(source=DEFAULT_SOURCE, version=None):
+    """
+    Load the current version of the AI job dataset, once per process.
+
+    Args:
+        source (str): CSV file, glob pattern (e.g. 'data/*.csv') or directory
+        version (str): Version already resolved with current_dataset_version
+            in this rerun (resolved here when None)
+
+    Returns:
+        pd.DataFrame: Shared, read-only dataset with derived columns;
+        ``df.attrs`` carries 'dataset_version' and 'ingest_stats'.
+        None while the dataset is unavailable (e.g. still downloading).
+    """
+    try:
+        version = version or current_dataset_version(source)
+        if version is None:
+            return None
+        return load_version(version)
+    except Exception as e:
+        st.error(f"Error loading dataset: {e}")
+        return None
+
+
+def dataset_rows(version):
+    """Number of postings in a snapshot version, read from its manifest."""
+    return read_manifest(version)['rows']
+
+
+@cached('dataset', pin=True)
+def load_version(version):
+    """Load one immutable snapshot version (old + new kept during a swap)."""
+    return read_snapshot(version)
+
+
+def get_rollups(df):
+    """
+    Daily/weekly/monthly posting and salary rollups of the dataset.
+
+    Returns:
+        pd.DataFrame: Rollup table stored with the snapshot (see
+        utils/rollups.py), rebuilt from df for snapshots without one
+    """
+    return _load_rollups(df, df.attrs['dataset_version'])
+
+
+@cached('rollups')
+def _load_rollups(_df, version):
+    rollups = read_rollups(version)
+    return build_rollups(_df) if rollups is None else rollups
+
+
+def get_sample(df):
+    """
+    Stratified reservoir sample of the dataset, for approximate queries.
+
+    Args:
+        df (pd.DataFrame): The dataset, or a sample from get_stored_sample
+            (returned as is)
+
+    Returns:
+        pd.DataFrame: Sample stored with the snapshot (see
+        utils/sampling.py), rebuilt from df for snapshots without one
+    """
+    if df.attrs.get('sample'):
+        return df
+    version = df.attrs['dataset_version']
+    sample = get_stored_sample(version)
+    return _build_sample(df, version) if sample is None else sample
+
+
+@cached('sample')
+def get_stored_sample(version):
+    """
+    Sample stored with a snapshot version, read without loading the dataset.
+
+    It stands in for the dataset in SampleEngine queries, so pages can
+    paint estimates while load_jobs is still reading the snapshot.
+
+    Returns:
+        pd.DataFrame: Sample with ``attrs['dataset_version']`` set, or None
+        for snapshots published before samples were stored
+    """
+    sample = read_sample(version)
+    if sample is not None:
+        sample.attrs.update(dataset_version=version, sample=True)
+    return sample
+
+
+@cached('built_sample')
+def _build_sample(_df, version):
+    return build_sample(_df)
+
+
+def get_salary_sketches(df):
+    """
+    Salary quantile sketches per experience level, location and job title.
+
+    Returns:
+        pd.DataFrame: Centroid table stored with the snapshot (see
+        utils/sketches.py), rebuilt from df for snapshots without one
+    """
+    return _load_sketches(df, df.attrs['dataset_version'])
+
+
+@cached('salary_sketches')
+def _load_sketches(_df, version):
+    sketches = read_sketches(version)
+    return build_sketches(_df) if sketches is None else sketches
+
+
+def get_skill_index(df):
+    """
+    Job x skill membership index built from required_skills.
+
+    Returns:
+        tuple: (sorted list of skills, bool ndarray of shape (jobs, skills))
+    """
+    return _build_skill_index(df, df.attrs['dataset_version'])
+
+
+@cached('skill_index', disk=True)
+def _build_skill_index(_df, version):
+    skills = (
+        _df['required_skills']
+        .fillna('')
+        .astype(str)
+        .str.replace(r'\s*,\s*', ',', regex=True)
+        .str.strip(', ')
+        .str.get_dummies(sep=',')
+    )
+    skills = skills.drop(columns=[''], errors='ignore').sort_index(axis=1)
+    return skills.columns.tolist(), skills.to_numpy(dtype=bool)
+
+
+def get_skill_demand(df):
+    """
+    Count how many jobs require each skill.
+
+    Returns:
+        pd.DataFrame: Columns skill, count and percentage (of all jobs),
+        sorted by count descending
+    """
+    return _build_skill_demand(df, df.attrs['dataset_version'])
+
+
+@cached('skill_demand', disk=True)
+def _build_skill_demand(_df, version):
+    vocabulary, matrix = get_skill_index(_df)
+    counts = matrix.sum(axis=0)
+    demand = pd.DataFrame({'skill': vocabulary, 'count': counts})
+    demand['percentage'] = (demand['count'] / max(len(matrix), 1) * 100).round(1)
+    return demand.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def skills_mask(df, selected_skills):
+    """
+    Boolean mask of jobs requiring any of the selected skills.
+
+    Args:
+        df (pd.DataFrame): Dataset returned by load_jobs
+        selected_skills (list): Skill names from the skill index vocabulary
+
+    Returns:
+        np.ndarray: True for every job requiring at least one selected skill
+    """
+    vocabulary, matrix = get_skill_index(df)
+    columns = [vocabulary.index(skill) for skill in selected_skills if skill in vocabulary]
+    if not columns:
+        return np.zeros(len(matrix), dtype=bool)
+    return matrix[:, columns].any(axis=1)
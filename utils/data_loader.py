@@ -2,79 +2,129 @@
 """
 Data loader module for securely fetching Kaggle datasets.
 Supports both local development and Streamlit Cloud deployment.
+
+The loader accepts a single CSV file, a glob pattern (e.g. ``data/*.csv``)
+or a directory of monthly posting files. Multiple files are parsed in
+parallel with a process pool and merged into one columnar DataFrame with
+shared categorical dictionaries.
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import glob
+import time
 import json
 from pathlib import Path
 
-def download_kaggle_dataset(dataset_id='pratyushpuri/global-ai-job-market-trend-2025'):
+from pandas.api.types import union_categoricals
+
+DEFAULT_SOURCE = 'data/ai_job_dataset.csv'
+DEFAULT_DATASET_ID = 'pratyushpuri/global-ai-job-market-trend-2025'
+
+# Low-cardinality text columns stored as pandas categoricals. Each worker
+# builds its own dictionary; the dictionaries are unified after the merge.
+CATEGORICAL_COLUMNS = [
+    'job_title', 'salary_currency', 'experience_level', 'employment_type',
+    'company_location', 'company_size', 'employee_residence',
+    'education_required', 'industry', 'company_name', 'work_type'
+]
+# Posting dates are stored at one fixed resolution, whatever pandas or polars
+# would infer, so both ingest engines produce identical frames
+DATETIME_DTYPE = 'datetime64[ns]'
+
+
+def resolve_dataset_files(source=DEFAULT_SOURCE):
     """
-    Download dataset from Kaggle using API credentials from Streamlit secrets.
-    Falls back to local file if already exists.
+    Expand a dataset source into the list of CSV files it refers to.
 
     Args:
-        dataset_id (str): Kaggle dataset identifier (owner/dataset-name)
+        source (str): A CSV file path, a glob pattern or a directory
 
     Returns:
-        str: Path to the dataset file, or None if download fails
+        list: Sorted list of matching CSV file paths (may be empty)
     """
-    dataset_path = 'data/ai_job_dataset.csv'
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '*.csv')))
+    if glob.has_magic(source):
+        return sorted(p for p in glob.glob(source) if os.path.isfile(p))
+    return [source] if os.path.isfile(source) else []
 
-    # If file already exists locally, use it
-    if os.path.exists(dataset_path):
-        return dataset_path
 
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
+def get_kaggle_credentials():
+    """
+    Find Kaggle API credentials without importing the kaggle package.
 
+    Checks Streamlit secrets (works on Streamlit Cloud), then the
+    KAGGLE_USERNAME/KAGGLE_KEY environment variables, then the local
+    ~/.kaggle/kaggle.json used for development.
+
+    Returns:
+        tuple: (username, key), or None if no credentials are configured
+    """
     try:
-        # Try to use Streamlit secrets (works on Streamlit Cloud)
         if hasattr(st, 'secrets') and 'kaggle' in st.secrets:
-            # Set up kaggle credentials from Streamlit secrets
-            os.environ['KAGGLE_USERNAME'] = st.secrets['kaggle']['username']
-            os.environ['KAGGLE_KEY'] = st.secrets['kaggle']['key']
+            return st.secrets['kaggle']['username'], st.secrets['kaggle']['key']
+    except FileNotFoundError:
+        # No secrets.toml at all
+        pass
 
-            # Import kaggle library
-            from kaggle.api.kaggle_api_extended import KaggleApi
+    if os.environ.get('KAGGLE_USERNAME') and os.environ.get('KAGGLE_KEY'):
+        return os.environ['KAGGLE_USERNAME'], os.environ['KAGGLE_KEY']
 
-            # Download dataset
-            api = KaggleApi()
-            api.authenticate()
+    kaggle_json_path = Path.home() / '.kaggle' / 'kaggle.json'
+    if kaggle_json_path.exists():
+        with open(kaggle_json_path) as f:
+            config = json.load(f)
+        return config['username'], config['key']
 
-            # Download the specific dataset
-            with st.spinner(f'Downloading dataset from Kaggle: {dataset_id}...'):
-                api.dataset_download_files(
-                    dataset_id,
-                    path='data/',
-                    unzip=True
-                )
+    return None
 
-            st.success("Dataset downloaded successfully!")
-            return dataset_path
-        else:
-            # Try to use local kaggle.json (for local development)
-            kaggle_json_path = Path.home() / '.kaggle' / 'kaggle.json'
-            if kaggle_json_path.exists():
-                from kaggle.api.kaggle_api_extended import KaggleApi
-                api = KaggleApi()
-                api.authenticate()
-
-                with st.spinner(f'Downloading dataset from Kaggle: {dataset_id}...'):
-                    api.dataset_download_files(
-                        dataset_id,
-                        path='data/',
-                        unzip=True
-                    )
-
-                st.success("Dataset downloaded successfully!")
-                return dataset_path
-            else:
-                raise Exception("Kaggle credentials not found. Please configure secrets or add kaggle.json")
-
-    except Exception as e:
-        st.error(f"Could not download dataset from Kaggle: {e}")
+
+def get_kaggle_api_base():
+    """
+    Kaggle API base URL override, e.g. a local fake endpoint for testing.
+
+    Checks the api_base key of the [kaggle] Streamlit secrets, then the
+    KAGGLE_API_BASE environment variable.
+
+    Returns:
+        str: The configured base URL, or None for the public Kaggle API
+    """
+    try:
+        if hasattr(st, 'secrets') and 'kaggle' in st.secrets and 'api_base' in st.secrets['kaggle']:
+            return st.secrets['kaggle']['api_base']
+    except FileNotFoundError:
+        # No secrets.toml at all
+        pass
+    return os.environ.get('KAGGLE_API_BASE') or None
+
+
+def download_kaggle_dataset(dataset_id=DEFAULT_DATASET_ID, source=DEFAULT_SOURCE):
+    """
+    Make sure the dataset is available locally, downloading it from Kaggle
+    in the background if needed.
+
+    The download never blocks the script thread: while it runs this renders
+    a progress bar that polls the shared download status and reruns the app
+    once the files are in place.
+
+    Args:
+        dataset_id (str): Kaggle dataset identifier (owner/dataset-name)
+        source (str): CSV file, glob pattern or directory the app reads from
+
+    Returns:
+        list: Paths to the dataset files, or None while they are unavailable
+    """
+    # If files already exist locally, use them
+    files = resolve_dataset_files(source)
+    if files:
+        return files
+
+    credentials = get_kaggle_credentials()
+    if credentials is None:
+        st.error("Could not download dataset from Kaggle: Kaggle credentials not found. "
+                 "Please configure secrets or add kaggle.json")
         st.info("Please ensure the dataset file is available in the data/ directory or configure Kaggle credentials")
         st.markdown("""
         **Setup Instructions:**
@@ -84,42 +134,253 @@ def download_kaggle_dataset(dataset_id='pratyushpuri/global-ai-job-market-trend-
         """)
         return None
 
-@st.cache_data(ttl=3600)
-def load_dataset():
+    # The download machinery is only imported when a download is needed
+    from utils.kaggle_download import KAGGLE_API_URL, start_download
+
+    base_url = get_kaggle_api_base() or KAGGLE_API_URL
+    status = start_download(dataset_id, credentials, dest_dir='data', base_url=base_url)
+    render_download_progress(status, dataset_id, credentials, base_url)
+    return None
+
+
+def render_download_progress(status, dataset_id, credentials, base_url):
     """
-    Load the AI job dataset with caching.
+    Render a self-refreshing progress bar for a background download.
+
+    Runs as a fragment every second so only the progress bar reruns while
+    the download is in flight; the whole app reruns once it is done.
     """
-    try:
-        # First, try to ensure dataset is available
-        dataset_path = download_kaggle_dataset()
-
-        if dataset_path and os.path.exists(dataset_path):
-            df = pd.read_csv(dataset_path)
-            df['salary_usd'] = pd.to_numeric(df['salary_usd'], errors='coerce')
-            df['posting_date'] = pd.to_datetime(df['posting_date'], errors='coerce')
-            df = df.dropna(subset=['salary_usd', 'posting_date'])
-
-            # Add work_type categorization
-            def categorize_work_type(ratio):
-                if pd.isna(ratio):
-                    return 'Unknown'
-                if ratio == 0:
-                    return 'On-site'
-                elif ratio == 100:
-                    return 'Remote'
-                else:
-                    return 'Hybrid'
-
-            if 'remote_ratio' in df.columns:
-                df['work_type'] = df['remote_ratio'].apply(categorize_work_type)
-            else:
-                df['work_type'] = 'Unknown'
-
-            return df
+    @st.fragment(run_every=1)
+    def _download_progress():
+        if status.state == 'done':
+            st.success("Dataset downloaded successfully!")
+            st.rerun()
+        elif status.state == 'failed':
+            st.error(f"Could not download dataset from Kaggle: {status.message}")
+            if st.button("Retry download", key='retry_kaggle_download'):
+                from utils.kaggle_download import start_download
+                start_download(dataset_id, credentials, dest_dir='data', base_url=base_url)
+                st.rerun()
         else:
-            st.error("Dataset file not found at data/ai_job_dataset.csv")
-            return None
+            st.progress(status.fraction, text=status.message)
 
-    except Exception as e:
-        st.error(f"Error loading dataset: {e}")
-        return None
+    _download_progress()
+
+
+def categorize_work_type(remote_ratio):
+    """
+    Vectorized work type categorization (hybrid = between 0% and 100% exclusive).
+
+    Args:
+        remote_ratio (pd.Series): Remote work percentage per posting
+
+    Returns:
+        np.ndarray: 'On-site', 'Remote', 'Hybrid' or 'Unknown' per posting
+    """
+    ratio = pd.to_numeric(remote_ratio, errors='coerce')
+    return np.select(
+        [ratio.isna(), ratio == 0, ratio == 100],
+        ['Unknown', 'On-site', 'Remote'],
+        default='Hybrid'
+    )
+
+
+def _read_posting_file(path):
+    """
+    Parse and derive a single posting file. Runs inside a pool worker.
+
+    Returns:
+        dict: The parsed frame plus timing information for throughput stats
+    """
+    start = time.perf_counter()
+    df = pd.read_csv(path)
+    df['salary_usd'] = pd.to_numeric(df['salary_usd'], errors='coerce')
+    df['posting_date'] = pd.to_datetime(df['posting_date'], errors='coerce').astype(DATETIME_DTYPE)
+    df = df.dropna(subset=['salary_usd', 'posting_date'])
+
+    if 'remote_ratio' in df.columns:
+        df['work_type'] = categorize_work_type(df['remote_ratio'])
+    else:
+        df['work_type'] = 'Unknown'
+
+    # Categoricals keep the frame small when it is pickled back to the parent
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    return {
+        'path': path,
+        'df': df.reset_index(drop=True),
+        'rows': len(df),
+        'seconds': time.perf_counter() - start,
+        'worker': os.getpid(),
+    }
+
+
+def _unify_frames(frames):
+    """
+    Concatenate frames with differing schemas into one DataFrame.
+
+    Columns missing from a file are filled with NA and categorical columns
+    are merged with union_categoricals so all rows share one dictionary.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = []
+    for frame in frames:
+        columns.extend(col for col in frame.columns if col not in columns)
+
+    merged = {}
+    for col in columns:
+        reference = next(frame[col] for frame in frames if col in frame.columns)
+        # Integers cannot hold NA; other columns keep their dtype (text,
+        # dates and categoricals alike)
+        if pd.api.types.is_numeric_dtype(reference):
+            missing_dtype = 'float64'
+        else:
+            missing_dtype = reference.dtype
+        parts = [
+            frame[col] if col in frame.columns else pd.Series(index=frame.index, dtype=missing_dtype)
+            for frame in frames
+        ]
+        if col in CATEGORICAL_COLUMNS:
+            # union_categoricals needs one category dtype, but a column left
+            # empty in a file is parsed as float
+            categories = reference.astype('category').cat.categories.dtype
+            parts = [part.astype('category') for part in parts]
+            parts = [part.cat.rename_categories(part.cat.categories.astype(categories)) for part in parts]
+            merged[col] = pd.Series(union_categoricals(parts, sort_categories=True, ignore_order=True))
+        else:
+            merged[col] = pd.concat(parts, ignore_index=True)
+
+    return pd.DataFrame(merged)
+
+
+def ingest_dataset(files, max_workers=None, engine=None):
+    """
+    Parse posting files in parallel and merge them into one dataset.
+
+    Args:
+        files (list): CSV file paths to ingest
+        max_workers (int): Process pool size, defaults to the CPU count
+        engine (str): 'pandas' or 'polars'; defaults to polars when it is the
+            configured query engine (see utils/query_engine.py)
+
+    Returns:
+        tuple: (DataFrame, stats dict with rows/sec reported per worker)
+    """
+    if engine is None:
+        from utils.query_engine import engine_name
+        engine = 'polars' if engine_name() == 'polars' else 'pandas'
+    if engine == 'polars':
+        return _ingest_polars(files)
+
+    start = time.perf_counter()
+    workers = max(1, min(len(files), max_workers or os.cpu_count() or 1))
+
+    if workers == 1:
+        results = [_read_posting_file(path) for path in files]
+    else:
+        # Imported lazily: multiprocessing is only needed for multi-file sources
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_posting_file, files))
+
+    df = _unify_frames([result['df'] for result in results])
+
+    per_worker = {}
+    for result in results:
+        worker = per_worker.setdefault(result['worker'], {'files': 0, 'rows': 0, 'seconds': 0.0})
+        worker['files'] += 1
+        worker['rows'] += result['rows']
+        worker['seconds'] += result['seconds']
+    for worker in per_worker.values():
+        worker['rows_per_sec'] = worker['rows'] / worker['seconds'] if worker['seconds'] else 0.0
+
+    wall_seconds = time.perf_counter() - start
+    stats = {
+        'engine': 'pandas',
+        'files': len(files),
+        'rows': len(df),
+        'pool_size': workers,
+        'wall_seconds': wall_seconds,
+        'rows_per_sec': len(df) / wall_seconds if wall_seconds else 0.0,
+        'workers': per_worker,
+    }
+    return df, stats
+
+
+def _ingest_polars(files):
+    """
+    Polars version of ingest_dataset producing the same DataFrame.
+
+    Every file is scanned as a lazy frame with the parsing and derivations
+    of _read_posting_file expressed as polars expressions; the combined
+    query runs on polars' multi-threaded engine and is converted to pandas
+    (categoricals included) once at the end.
+    """
+    import polars as pl
+
+    start = time.perf_counter()
+    frames = []
+    for path in files:
+        frame = pl.scan_csv(path, infer_schema_length=10000)
+        schema = frame.collect_schema()
+        salary = pl.col('salary_usd')
+        if not schema['salary_usd'].is_numeric():
+            salary = salary.cast(pl.Float64, strict=False)
+        frame = frame.with_columns(
+            salary,
+            pl.col('posting_date').cast(pl.String).str.to_datetime(strict=False),
+        ).drop_nulls(['salary_usd', 'posting_date'])
+        if 'remote_ratio' in schema:
+            ratio = pl.col('remote_ratio').cast(pl.Float64, strict=False)
+            work_type = (
+                pl.when(ratio.is_null()).then(pl.lit('Unknown'))
+                .when(ratio == 0).then(pl.lit('On-site'))
+                .when(ratio == 100).then(pl.lit('Remote'))
+                .otherwise(pl.lit('Hybrid'))
+            )
+        else:
+            work_type = pl.lit('Unknown')
+        frames.append(frame.with_columns(work_type.alias('work_type')))
+
+    df = pl.concat(frames, how='diagonal_relaxed').collect().to_pandas()
+    df['posting_date'] = df['posting_date'].astype(DATETIME_DTYPE)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    wall_seconds = time.perf_counter() - start
+    rows_per_sec = len(df) / wall_seconds if wall_seconds else 0.0
+    stats = {
+        'engine': 'polars',
+        'files': len(files),
+        'rows': len(df),
+        'pool_size': pl.thread_pool_size(),
+        'wall_seconds': wall_seconds,
+        'rows_per_sec': rows_per_sec,
+        'workers': {os.getpid(): {
+            'files': len(files), 'rows': len(df), 'seconds': wall_seconds, 'rows_per_sec': rows_per_sec,
+        }},
+    }
+    return df, stats
+
+
+def load_dataset(source=DEFAULT_SOURCE):
+    """
+    Load the AI job dataset with caching.
+
+    Kept for existing callers; loading and caching are owned by
+    utils.data_access.load_jobs so every page shares one copy per process.
+
+    Args:
+        source (str): CSV file, glob pattern (e.g. 'data/*.csv') or directory
+
+    Returns:
+        pd.DataFrame: Combined dataset, or None if loading fails
+    """
+    from utils.data_access import load_jobs
+    return load_jobs(source)
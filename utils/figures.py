@@ -0,0 +1,299 @@
+# utils/figures.py
+"""
+Cached Dashboard figures.
+
+Figures are built in two cached steps:
+
+1. The base figure (aggregations and traces) is keyed by chart kind, dataset
+   version, filter state and, for salary charts only, the exchange-rate
+   version and display currency.
+   Chart options (e.g. trend frequency and segment) are part of the key.
+2. The themed figure is a copy of the base with theme colors applied, keyed
+   additionally by theme.
+
+A rerun where nothing relevant changed reuses the themed figure as is,
+switching theme only re-applies layout colors to the cached base figures,
+and changing currency leaves the charts that don't show salaries untouched.
+Both caches are bounded by FIGURE_CACHE_SIZE entries. Cached figures are
+shared across sessions and must not be modified by callers.
+
+Charts in APPROXIMATE_FIGURES also accept approximate=True (as a chart
+option, so estimates are cached separately): they are then drawn from the
+stratified sample's estimates with 95% error bars (see
+query_engine.SampleEngine), for instant Dashboard previews. The salary
+box plot needs no preview: it is drawn from the snapshot's salary quantile
+sketches (see utils/sketches.py).
+
+plotly.express is imported inside the builders that use it, so its import
+(about 90 ms) is only paid once such a chart is built; plotly.graph_objects
+is imported at module level, since importing streamlit already loads it.
+"""
+import hashlib
+import json
+
+import plotly.graph_objects as go
+import streamlit as st
+import numpy as np
+
+from utils.charts import box_summary, add_summary_box
+from utils.data_access import (
+    get_rollups, get_salary_sketches, get_skill_demand, EXPERIENCE_LEVEL_MAP, EXPERIENCE_ORDER
+)
+from utils.query_engine import get_engine, get_sample_engine
+from utils.rollups import trend_series
+from utils.sketches import group_sketches
+
+FIGURE_CACHE_SIZE = 64
+
+THEME_COLORS = {
+    'dark': {'bg': '#0e1117', 'paper_bg': '#262730', 'text': '#fafafa', 'grid': '#3b3b3b'},
+    'light': {'bg': '#ffffff', 'paper_bg': '#f8f9fa', 'text': '#1a1a2e', 'grid': '#cbd5e0'},
+}
+BLUE_SCALES = {
+    'dark': [[0, '#1e3a8a'], [0.5, '#3b82f6'], [1, '#60a5fa']],  # Dark theme: darker to lighter blue
+    'light': [[0, '#2563eb'], [0.5, '#1e40af'], [1, '#1e3a8a']],  # Light theme: vibrant to dark blue
+}
+
+# Trace/layout meta tags marking what style_figure recolors per theme
+THEMED_TEXT = 'themed_text'
+THEMED_SCALE = 'themed_scale'
+
+
+def rates_version(rates):
+    """Short content hash identifying a set of exchange rates."""
+    return hashlib.md5(json.dumps(rates, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def figure_for(kind, df, currency, rates, theme, filter_state=(), options=None):
+    """
+    Return the cached, themed figure for a Dashboard chart.
+
+    Args:
+        kind (str): Chart name, one of FIGURES
+        df (pd.DataFrame): Dataset (already filtered, if filter_state is set)
+        currency (str): Display currency code
+        rates (dict): Exchange rates from USD
+        theme (str): 'light' or 'dark'
+        filter_state (tuple): Hashable description of the filters applied to df
+        options (dict): Keyword arguments passed on to the chart builder
+
+    Returns:
+        go.Figure: Shared figure, do not modify
+    """
+    build, uses_salary = FIGURES[kind]
+    if uses_salary:
+        key = (rates_version(rates), currency)
+        rate = 1.0 if currency == 'USD' else rates.get(currency, 1.0)
+    else:
+        key, rate = (None, None), 1.0
+    options = tuple(sorted((options or {}).items()))
+    return _themed_figure(kind, df, df.attrs['dataset_version'], *key, rate, tuple(filter_state), options, theme)
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def _themed_figure(kind, _df, dataset_version, rates_key, currency, _rate, filter_state, options, theme):
+    base = _base_figure(kind, _df, dataset_version, rates_key, currency, _rate, filter_state, options)
+    fig = go.Figure(base)
+    style_figure(fig, theme)
+    return fig
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_SIZE)
+def _base_figure(kind, _df, dataset_version, rates_key, currency, _rate, filter_state, options):
+    build, _ = FIGURES[kind]
+    return build(_df, currency, _rate, **dict(options))
+
+
+def style_figure(fig, theme):
+    """Apply theme colors to a figure in place."""
+    colors = THEME_COLORS[theme]
+    fig.update_layout(
+        plot_bgcolor=colors['paper_bg'], paper_bgcolor=colors['bg'],
+        font=dict(color=colors['text']),
+        xaxis=dict(gridcolor=colors['grid']), yaxis=dict(gridcolor=colors['grid'])
+    )
+    fig.update_traces(textfont_color=colors['text'], selector=dict(meta=THEMED_TEXT))
+    fig.update_traces(marker_colorscale=BLUE_SCALES[theme], selector=dict(meta=THEMED_SCALE))
+    if fig.layout.meta == THEMED_SCALE:
+        fig.update_coloraxes(colorscale=BLUE_SCALES[theme])
+
+
+TREND_COLORS = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6']
+TREND_PERIOD_LABELS = {'daily': 'Day', 'weekly': 'Week', 'monthly': 'Month'}
+
+
+def build_posting_trend(df, currency, rate, frequency='monthly', segment='all'):
+    return _trend_figure(df, frequency, segment, 'postings', 'Number of Postings')
+
+
+def build_salary_trend(df, currency, rate, frequency='monthly', segment='all'):
+    return _trend_figure(df, frequency, segment, 'avg_salary_usd', f'Average Salary ({currency})', rate)
+
+
+def _trend_figure(df, frequency, segment, metric, axis_title, rate=1.0):
+    """Line chart of one rollup metric, one line per segment value."""
+    # Trends read the per-snapshot rollup table instead of the postings
+    series = trend_series(get_rollups(df), frequency, segment)
+    if segment == 'experience_level':
+        series['value'] = series['value'].map(EXPERIENCE_LEVEL_MAP).fillna(series['value'])
+    values = series[metric] * rate
+
+    fig = go.Figure()
+    mode = 'lines+markers' if frequency == 'monthly' else 'lines'
+    for (label, group), color in zip(values.groupby(series['value'], sort=False), TREND_COLORS):
+        fig.add_trace(go.Scatter(
+            x=series.loc[group.index, 'period'], y=group,
+            mode=mode, name='Job Postings' if segment == 'all' else label,
+            line=dict(color=color, width=3 if segment == 'all' else 2), marker=dict(size=8)
+        ))
+    fig.update_layout(
+        xaxis_title=TREND_PERIOD_LABELS[frequency], yaxis_title=axis_title,
+        height=350, hovermode='x unified', showlegend=segment != 'all'
+    )
+    return fig
+
+
+def _engine(approximate):
+    return get_sample_engine() if approximate else get_engine()
+
+
+def build_salary_by_experience(df, currency, rate):
+    # Boxes come from the snapshot's salary sketches merged per level (the
+    # postings are never read); outliers are the centroids beyond the fences
+    sketches = group_sketches(get_salary_sketches(df), by='experience_level')
+    fig = go.Figure()
+    colors = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444']
+
+    for exp, color in zip(EXPERIENCE_ORDER, colors):
+        if exp in sketches:
+            sketch = sketches[exp]
+            summary = box_summary(sketch.means * rate, weights=sketch.weights)
+            add_summary_box(fig, summary, EXPERIENCE_LEVEL_MAP[exp], color)
+
+    fig.update_layout(
+        yaxis_title=f'Salary ({currency})', xaxis_title='Experience Level',
+        height=350, showlegend=False
+    )
+    return fig
+
+
+def build_job_titles(df, currency, rate, approximate=False):
+    import plotly.express as px
+
+    job_dist = _engine(approximate).value_counts(df, 'job_title')
+
+    fig = px.bar(job_dist, y='job_title', x='count', orientation='h',
+                 error_x='margin' if approximate else None,
+                 color='count', color_continuous_scale=BLUE_SCALES['light'])
+    fig.update_layout(
+        height=max(350, 24 * len(job_dist)), showlegend=False,
+        xaxis_title='Number of Jobs', yaxis_title='Job Title',
+        meta=THEMED_SCALE
+    )
+    return fig
+
+
+def build_work_types(df, currency, rate, approximate=False):
+    import plotly.express as px
+
+    work_type_dist = _engine(approximate).value_counts(df, 'work_type')
+
+    fig = px.pie(work_type_dist, values='count', names='work_type', hole=0.4,
+                 color_discrete_sequence=['#3B82F6', '#10B981', '#F59E0B'])
+    fig.update_traces(textposition='inside', textinfo='percent+label', textfont=dict(color='white'))
+    fig.update_layout(height=300)
+    return fig
+
+
+def build_jobs_by_country(df, currency, rate, approximate=False):
+    loc_dist = _engine(approximate).value_counts(df, 'company_location')
+    loc_dist = loc_dist.rename(columns={'company_location': 'location'})
+    loc_dist['percentage'] = (loc_dist['count'] / loc_dist['count'].sum() * 100).round(1)
+    loc_dist = loc_dist.sort_values('count', ascending=True, kind='stable')
+
+    # All stems go into one line trace as (0, count, gap) segments, so the
+    # figure has two traces no matter how many countries there are
+    n_locations = len(loc_dist)
+    locations = loc_dist['location'].astype(object).to_numpy()
+    stem_x = np.column_stack([
+        np.zeros(n_locations), loc_dist['count'].to_numpy(dtype=float), np.full(n_locations, np.nan)
+    ]).ravel()
+    stem_y = np.column_stack([locations, locations, np.full(n_locations, None)]).ravel()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=stem_x, y=stem_y,
+        mode='lines', line=dict(color='lightgray', width=2),
+        showlegend=False, hoverinfo='skip'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=loc_dist['count'], y=loc_dist['location'],
+        mode='markers+text', marker=dict(size=12, color='#3B82F6'),
+        text=[f"{p:.1f}%" for p in loc_dist['percentage']],
+        textposition='middle right', meta=THEMED_TEXT,
+        error_x=dict(array=loc_dist['margin'], color='#3B82F6') if approximate else None,
+        showlegend=False, hovertemplate='<b>%{y}</b><br>Jobs: %{x}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        height=max(300, 24 * len(loc_dist)), xaxis_title='Number of Jobs', yaxis_title='',
+        margin=dict(l=0, r=80, t=20, b=40)
+    )
+    return fig
+
+
+def build_skill_demand(df, currency, rate, approximate=False):
+    import plotly.express as px
+
+    skills_count = get_sample_engine().skill_demand(df) if approximate else get_skill_demand(df)
+
+    fig = px.bar(skills_count.head(10), y='skill', x='percentage', orientation='h',
+                 error_x='margin' if approximate else None,
+                 text='percentage', labels={'percentage': 'Percentage of Jobs (%)', 'skill': 'Skill'},
+                 color='percentage', color_continuous_scale='Viridis')
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside', meta=THEMED_TEXT)
+    fig.update_layout(height=400, showlegend=False)
+    return fig
+
+
+def build_salary_by_country(df, currency, rate, approximate=False):
+    # Get both converted salaries and the original posting currency for display
+    salary_by_location = _engine(approximate).group_salary(df, 'company_location').rename(columns={
+        'company_location': 'location', 'avg_salary_usd': 'salary_target', 'salary_currency': 'currency'
+    })
+    salary_by_location['salary_target'] *= rate
+    salary_by_location = salary_by_location.sort_values('salary_target', ascending=True, kind='stable')
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=salary_by_location['location'], x=salary_by_location['salary_target'],
+        orientation='h', text=[f"{sal:,.0f}" for sal in salary_by_location['salary_target']],
+        textposition='auto', textfont=dict(color='white'), meta=THEMED_SCALE,
+        marker=dict(color=salary_by_location['salary_target'], colorscale=BLUE_SCALES['light'], showscale=False),
+        hovertemplate='<b>%{y}</b><br>Converted: %{x:,.0f} ' + currency + '<br>Original Currency: %{customdata}<extra></extra>',
+        customdata=salary_by_location['currency'],
+        error_x=dict(array=salary_by_location['margin'] * rate, color='#9CA3AF') if approximate else None
+    ))
+
+    fig.update_layout(
+        xaxis_title=f'Average Salary ({currency})', yaxis_title='Country',
+        height=max(350, 24 * len(salary_by_location)), margin=dict(l=0, r=20, t=20, b=40)
+    )
+    return fig
+
+
+# Charts that can be previewed from sample estimates (approximate=True)
+APPROXIMATE_FIGURES = {'job_titles', 'work_types', 'jobs_by_country', 'skill_demand', 'salary_by_country'}
+
+# Chart kind -> (builder, whether it depends on currency/exchange rates)
+FIGURES = {
+    'posting_trend': (build_posting_trend, False),
+    'salary_trend': (build_salary_trend, True),
+    'salary_by_experience': (build_salary_by_experience, True),
+    'job_titles': (build_job_titles, False),
+    'work_types': (build_work_types, False),
+    'jobs_by_country': (build_jobs_by_country, False),
+    'skill_demand': (build_skill_demand, False),
+    'salary_by_country': (build_salary_by_country, True),
+}
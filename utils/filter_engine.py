@@ -0,0 +1,429 @@
+# utils/filter_engine.py
+"""
+Vectorized filter engine and option catalog for the Search Jobs page.
+
+Every filterable column is indexed once per dataset version as integer
+category codes over its sorted options, and skills as the job x skill
+membership matrix from the skill index. A selection becomes a boolean
+lookup table over a column's options, so applying it is a single gather
+over the codes instead of an isin over strings.
+
+Facet counts (how many jobs each option would match given all *other*
+active filters) are np.bincount over the codes of the jobs passing those
+other filters. The "all other filters" masks are built from prefix and
+suffix products of the per-filter masks, so all facets are counted in one
+pass without rescanning the dataset per option.
+
+Date and numeric range columns are indexed as the row positions sorted
+by value, so a range is two binary searches (np.searchsorted) plus a
+scatter of the matching positions into a mask: O(log n + matches) instead
+of comparing every posting's value. The resulting masks combine with the
+others like any filter. Numeric columns also keep a histogram bin code
+per job, so their distribution under the other active filters is one
+bincount.
+"""
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import cached
+from utils.data_access import get_skill_index
+
+FILTER_COLUMNS = [
+    'work_type', 'experience_level', 'employment_type',
+    'company_location', 'company_size', 'company_name'
+]
+SKILLS = 'skills'
+# Encoded selection of a filter with nothing selected, i.e. no filtering
+ALL = 'all'
+DATE_COLUMNS = ['posting_date', 'application_deadline']
+RANGE_COLUMNS = ['years_experience', 'benefits_score', 'job_description_length']
+# Bins of the distribution histograms of RANGE_COLUMNS
+HISTOGRAM_BINS = 20
+
+
+@dataclass(frozen=True)
+class FilterIndex:
+    """Per-version filter structures shared by all sessions (read-only)."""
+    options: dict
+    codes: dict
+    skill_matrix: np.ndarray
+    counts: dict
+
+    @property
+    def n_jobs(self):
+        return len(self.skill_matrix)
+
+    @cached_property
+    def positions(self):
+        """Column name -> {option value: position in options[column]}."""
+        return {column: {value: i for i, value in enumerate(values)} for column, values in self.options.items()}
+
+
+def get_filter_index(df):
+    """
+    Return the cached filter index for the dataset version of df.
+
+    Returns:
+        FilterIndex: options (column -> sorted values, plus 'skills'),
+        codes (column -> int array, len(options) for missing values),
+        skill_matrix and total counts per option
+    """
+    return _build_filter_index(df, df.attrs['dataset_version'])
+
+
+@cached('filter_index', disk=True)
+def _build_filter_index(_df, version):
+    options, codes, counts = {}, {}, {}
+    for column in FILTER_COLUMNS:
+        values, column_codes = encode_column(_df[column])
+        options[column], codes[column] = values, column_codes
+        counts[column] = np.bincount(column_codes, minlength=len(values) + 1)[:len(values)]
+
+    options[SKILLS], skill_matrix = get_skill_index(_df)
+    counts[SKILLS] = skill_matrix.sum(axis=0)
+    return FilterIndex(options, codes, skill_matrix, counts)
+
+
+@dataclass(frozen=True)
+class SortedIndex:
+    """
+    Row positions of a column in value order (read-only).
+
+    Numeric range columns also carry histogram bins: edges (ascending bin
+    boundaries) and bins (bin code per job, len(edges) - 1 for missing
+    values), so distribution counts are a bincount like the facet counts.
+    """
+    values: np.ndarray
+    rows: np.ndarray
+    n_jobs: int
+    edges: np.ndarray = None
+    bins: np.ndarray = None
+
+    @property
+    def bounds(self):
+        """(lowest, highest) value, None when the column has no values."""
+        return (self.values[0].item(), self.values[-1].item()) if len(self.values) else None
+
+
+def get_sorted_indexes(df):
+    """
+    Return the cached sorted indexes for the dataset version of df.
+
+    Returns:
+        dict: Column name (DATE_COLUMNS and RANGE_COLUMNS) -> SortedIndex.
+        Dates are indexed by day (datetime64[D]); missing values are left
+        out of values and rows
+    """
+    return _build_sorted_indexes(df, df.attrs['dataset_version'])
+
+
+@cached('sorted_index', disk=True)
+def _build_sorted_indexes(_df, version):
+    indexes = {}
+    for column in DATE_COLUMNS:
+        days = pd.to_datetime(_df[column], errors='coerce').to_numpy().astype('datetime64[D]')
+        indexes[column] = _sorted_index(days, ~np.isnat(days))
+    for column in RANGE_COLUMNS:
+        values = pd.to_numeric(_df[column], errors='coerce').to_numpy()
+        present = ~np.isnan(values.astype(float))
+        index = _sorted_index(values, present)
+        if index.bounds is not None:
+            edges = histogram_edges(values[present], HISTOGRAM_BINS)
+            bins = np.full(len(values), len(edges) - 1, dtype=np.int16)
+            # Right-closed last bin, like np.histogram
+            bins[present] = np.clip(np.searchsorted(edges, values[present], side='right') - 1, 0, len(edges) - 2)
+            index = SortedIndex(index.values, index.rows, index.n_jobs, edges, bins)
+        indexes[column] = index
+    return indexes
+
+
+def _sorted_index(values, present):
+    rows = np.flatnonzero(present)
+    rows = rows[np.argsort(values[rows], kind='stable')].astype(np.int32)
+    return SortedIndex(values[rows], rows, len(values))
+
+
+def histogram_edges(values, max_bins):
+    """
+    Bin edges for a distribution histogram.
+
+    Integer columns with few distinct values get one bin per integer,
+    everything else max_bins equal-width bins.
+
+    Returns:
+        np.ndarray: Ascending edges, one more than the number of bins
+    """
+    low, high = values.min(), values.max()
+    if np.issubdtype(values.dtype, np.integer) and high - low < max_bins:
+        return np.arange(low, high + 2, dtype=float)
+    return np.histogram_bin_edges(values, bins=max_bins, range=(low, high if high > low else low + 1))
+
+
+def sorted_positions(index, low=None, high=None):
+    """
+    Row positions with a value in [low, high] (inclusive).
+
+    Args:
+        index (SortedIndex): From get_sorted_indexes
+        low, high: Bounds comparable with index.values; None leaves that
+            side open
+
+    Returns:
+        np.ndarray: Row positions in value order (a view, do not modify)
+    """
+    lo = 0 if low is None else np.searchsorted(index.values, low, side='left')
+    hi = len(index.values) if high is None else np.searchsorted(index.values, high, side='right')
+    return index.rows[lo:max(lo, hi)]
+
+
+def range_mask(index, low=None, high=None):
+    """Boolean mask of the jobs with a value in [low, high] (see sorted_positions)."""
+    mask = np.zeros(index.n_jobs, dtype=bool)
+    mask[sorted_positions(index, low, high)] = True
+    return mask
+
+
+def _day(value):
+    return None if value is None else np.datetime64(value, 'D')
+
+
+def date_masks(sorted_indexes, date_ranges=None, open_on=None):
+    """
+    Boolean masks for date filters.
+
+    Args:
+        sorted_indexes (dict): From get_sorted_indexes
+        date_ranges (dict): Column name (DATE_COLUMNS) -> (start, end),
+            whole days (anything np.datetime64 accepts, e.g.
+            datetime.date); either bound may be None, (None, None) is not a
+            filter
+        open_on: Day on which matching jobs are still open, i.e. posted on
+            or before it and with an application deadline on or after it
+
+    Returns:
+        dict: Mask per active filter, keyed by column name and 'open'
+    """
+    masks = {}
+    for column, (start, end) in (date_ranges or {}).items():
+        if start is not None or end is not None:
+            masks[column] = range_mask(sorted_indexes[column], _day(start), _day(end))
+    if open_on is not None:
+        masks['open'] = (
+            range_mask(sorted_indexes['posting_date'], high=_day(open_on))
+            & range_mask(sorted_indexes['application_deadline'], low=_day(open_on))
+        )
+    return masks
+
+
+def range_masks(sorted_indexes, ranges=None):
+    """
+    Boolean masks for numeric range filters.
+
+    Args:
+        sorted_indexes (dict): From get_sorted_indexes
+        ranges (dict): Column name (RANGE_COLUMNS) -> inclusive (low,
+            high), either may be None. A range covering every value of the
+            column is not a filter.
+
+    Returns:
+        dict: Column name -> bool ndarray, for active filters only
+    """
+    masks = {}
+    for column, (low, high) in (ranges or {}).items():
+        index = sorted_indexes[column]
+        if index.bounds is None:
+            continue
+        lowest, highest = index.bounds
+        if (low is None or low <= lowest) and (high is None or high >= highest):
+            continue
+        masks[column] = range_mask(index, low, high)
+    return masks
+
+
+def range_histograms(sorted_indexes, masks):
+    """
+    Distribution of each range column over the jobs passing the filters.
+
+    Like facet_counts, a column's own range filter is left out, so the
+    histogram shows where the rest of the matching jobs lie.
+
+    Args:
+        sorted_indexes (dict): From get_sorted_indexes
+        masks (dict): Active filter masks
+
+    Returns:
+        dict: Column name (RANGE_COLUMNS with values) -> int ndarray of
+        job counts per bin of sorted_indexes[column].edges
+    """
+    histograms = {}
+    for column in RANGE_COLUMNS:
+        index = sorted_indexes[column]
+        if index.bins is None:
+            continue
+        others = combine_masks({name: mask for name, mask in masks.items() if name != column}, index.n_jobs)
+        n_bins = len(index.edges) - 1
+        histograms[column] = np.bincount(index.bins[others], minlength=n_bins + 1)[:n_bins]
+    return histograms
+
+
+def encode_column(series):
+    """
+    Encode a column as integer codes over its sorted distinct values.
+
+    Returns:
+        tuple: (sorted list of values, int32 ndarray of codes); missing
+        values get the trailing code len(values), so np.bincount and lookup
+        tables of size len(values) + 1 stay valid
+    """
+    values = sorted(series.dropna().unique().tolist())
+    codes = pd.Categorical(series, categories=values).codes.astype(np.int32)
+    codes[codes < 0] = len(values)
+    return values, codes
+
+
+def get_option_catalog(df):
+    """
+    Option catalog for the Search Jobs filters.
+
+    Returns:
+        dict: Column name (FILTER_COLUMNS and 'skills') -> pd.Series of job
+        counts indexed by the sorted option values
+    """
+    index = get_filter_index(df)
+    return {
+        column: pd.Series(index.counts[column], index=index.options[column], name='count')
+        for column in index.options
+    }
+
+
+def selection_masks(index, selections):
+    """
+    Boolean masks for the active selections.
+
+    Args:
+        index (FilterIndex): From get_filter_index
+        selections (dict): Column name -> selected raw values. An empty
+            selection, or one covering every option, is not a filter.
+            'skills' matches jobs requiring any of the selected skills.
+
+    Returns:
+        dict: Column name -> bool ndarray, for active filters only
+    """
+    masks = {}
+    for column, positions in active_selections(index.options, selections).items():
+        if column == SKILLS:
+            masks[column] = index.skill_matrix[:, positions].any(axis=1)
+        else:
+            allowed = np.zeros(len(index.options[column]) + 1, dtype=bool)
+            allowed[positions] = True
+            masks[column] = allowed[index.codes[column]]
+    return masks
+
+
+def active_selections(options, selections):
+    """
+    Selections that actually filter, as option positions.
+
+    Values missing from the catalog are ignored; a selection left empty by
+    that, or covering every option of a column other than skills, is
+    dropped (see selection_masks).
+
+    Args:
+        options (dict): Column name -> option values, e.g. FilterIndex.options
+            or a query engine's catalog read from the snapshot
+        selections (dict): Column name -> selected raw values
+
+    Returns:
+        dict: Column name -> sorted positions in options[column]
+    """
+    active = {}
+    for column, selected in selections.items():
+        column_options, selected = options[column], set(selected or ())
+        positions = [i for i, value in enumerate(column_options) if value in selected]
+        if positions and (column == SKILLS or len(positions) < len(column_options)):
+            active[column] = positions
+    return active
+
+
+def encode_selection(index, column, values):
+    """
+    Compact form of a filter selection for session state.
+
+    Args:
+        index (FilterIndex): From get_filter_index
+        column (str): Filter column or 'skills'
+        values (list): Selected raw values
+
+    Returns:
+        ALL when nothing is selected (or every option, except for skills),
+        otherwise a tuple of the selected values found in the catalog, in
+        selection order. The values are looked up in index.options, so the
+        tuple holds references to the catalog's own objects rather than
+        copies, and nothing at all for the default "all" state.
+    """
+    if not values or (column != SKILLS and len(set(values)) >= len(index.options[column])):
+        return ALL
+    options, positions = index.options[column], index.positions[column]
+    return tuple(options[positions[value]] for value in values if value in positions)
+
+
+def decode_selection(index, column, selection):
+    """
+    Selected raw values of an encoded selection ([] for ALL).
+
+    Values missing from the current option catalog (e.g. a company dropped
+    by a newer dataset version) are skipped.
+    """
+    if selection == ALL:
+        return []
+    options = set(index.options[column])
+    return [value for value in selection if value in options]
+
+
+def combine_masks(masks, n_jobs):
+    """AND all masks together; all True when there are none."""
+    combined = np.ones(n_jobs, dtype=bool)
+    for mask in masks.values():
+        combined &= mask
+    return combined
+
+
+def facet_counts(index, masks):
+    """
+    Per-option job counts given every active filter except the option's own.
+
+    Args:
+        index (FilterIndex): From get_filter_index
+        masks (dict): Active filter masks, e.g. from selection_masks. Keys
+            that are not filter columns (such as a salary mask) constrain
+            every facet.
+
+    Returns:
+        dict: Column name (FILTER_COLUMNS and 'skills') -> int ndarray of
+        counts aligned with index.options[column]
+    """
+    names = list(masks)
+    prefix = [np.ones(index.n_jobs, dtype=bool)]
+    for name in names:
+        prefix.append(prefix[-1] & masks[name])
+    suffix = [np.ones(index.n_jobs, dtype=bool)]
+    for name in reversed(names):
+        suffix.append(suffix[-1] & masks[name])
+    suffix.reverse()
+
+    counts = {}
+    for column in index.options:
+        if column in masks:
+            position = names.index(column)
+            others = prefix[position] & suffix[position + 1]
+        else:
+            others = prefix[-1]
+        if column == SKILLS:
+            counts[column] = np.count_nonzero(index.skill_matrix[others], axis=0)
+        else:
+            n_options = len(index.options[column])
+            counts[column] = np.bincount(index.codes[column][others], minlength=n_options + 1)[:n_options]
+    return counts
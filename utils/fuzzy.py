@@ -0,0 +1,109 @@
+# utils/fuzzy.py
+"""
+Typo-tolerant matching against small vocabularies (skills, job titles).
+
+Terms are compared by their character trigrams after lowercasing and
+dropping spaces and punctuation, so "tensor flow" equals "TensorFlow" and
+"pytorh" still shares most trigrams with "PyTorch". A trigram inverted
+index maps each trigram to the terms containing it; a lookup gathers the
+postings of the query's trigrams and counts shared trigrams per term with
+np.bincount. The cost depends on the vocabulary only, never on the number
+of postings.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.cache import cached
+from utils.data_access import get_skill_index
+
+MIN_SCORE = 0.35
+NORMALIZE_PATTERN = re.compile(r'[^a-z0-9+#]')
+
+
+def trigrams(text):
+    """Set of character trigrams of the normalized text."""
+    normalized = NORMALIZE_PATTERN.sub('', str(text).lower())
+    if not normalized:
+        return set()
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class TrigramIndex:
+    """Trigram postings over a vocabulary of terms (read-only)."""
+    terms: list
+    postings: dict
+    sizes: np.ndarray
+
+
+def build_trigram_index(terms):
+    """
+    Build a trigram index over a vocabulary.
+
+    Args:
+        terms (list): Distinct terms, e.g. the skill vocabulary
+
+    Returns:
+        TrigramIndex: Terms, trigram -> int array of term ids, and the number
+        of trigrams per term
+    """
+    postings, sizes = {}, []
+    for term_id, term in enumerate(terms):
+        grams = trigrams(term)
+        sizes.append(len(grams))
+        for gram in grams:
+            postings.setdefault(gram, []).append(term_id)
+    postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+    return TrigramIndex(list(terms), postings, np.array(sizes, dtype=np.int32))
+
+
+def fuzzy_matches(index, query, limit=5, min_score=MIN_SCORE):
+    """
+    Rank vocabulary terms by trigram similarity to a query.
+
+    The score averages the Dice coefficient (overall similarity) with the
+    share of the query's trigrams found in the term, so a partial query
+    such as "machine lern" still ranks the longer titles containing it.
+
+    Args:
+        index (TrigramIndex): From build_trigram_index
+        query (str): Text typed by the user
+        limit (int): Maximum number of matches returned
+        min_score (float): Matches scoring below this are dropped
+
+    Returns:
+        list: (term, score) tuples, best first
+    """
+    query_grams = trigrams(query)
+    hits = [index.postings[gram] for gram in query_grams if gram in index.postings]
+    if not hits:
+        return []
+
+    shared = np.bincount(np.concatenate(hits), minlength=len(index.terms))
+    dice = 2 * shared / (len(query_grams) + index.sizes)
+    coverage = shared / len(query_grams)
+    scores = (dice + coverage) / 2
+
+    candidates = np.flatnonzero(scores >= min_score)
+    best = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+    return [(index.terms[i], float(scores[i])) for i in best]
+
+
+def get_fuzzy_indexes(df):
+    """
+    Trigram indexes over the skill vocabulary and the job titles of df.
+
+    Returns:
+        dict: 'skills' and 'job_title' -> TrigramIndex, cached per version
+    """
+    return _build_fuzzy_indexes(df, df.attrs['dataset_version'])
+
+
+@cached('fuzzy_indexes', disk=True)
+def _build_fuzzy_indexes(_df, version):
+    skills, _ = get_skill_index(_df)
+    titles = sorted(_df['job_title'].dropna().unique().tolist())
+    return {'skills': build_trigram_index(skills), 'job_title': build_trigram_index(titles)}
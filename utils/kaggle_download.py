@@ -0,0 +1,261 @@
+# utils/kaggle_download.py
+"""
+Background Kaggle dataset downloads.
+
+The download runs in a worker thread so no Streamlit script thread blocks
+on the network. The archive is streamed into a ``.part`` file that is
+resumed with HTTP Range requests after a failure, verified (SHA-256 when
+known, otherwise the MD5 advertised by the storage backend and the zip CRCs)
+and only then extracted into the data directory. Failed attempts are
+retried with exponential backoff up to a fixed bound.
+
+Pages poll the shared DownloadStatus returned by start_download() to render
+progress. The base URL is configurable (api_base in the [kaggle] secrets or
+KAGGLE_API_BASE, see data_loader.get_kaggle_api_base), so the whole app
+flow can be exercised offline against a local HTTP server that mimics the
+Kaggle endpoint.
+"""
+import base64
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+
+KAGGLE_API_URL = 'https://www.kaggle.com/api/v1'
+CHUNK_SIZE = 64 * 1024
+
+
+class ChecksumError(Exception):
+    """Raised when a downloaded archive does not match its checksum."""
+
+
+@dataclass
+class DownloadStatus:
+    """Progress of one background download, shared by all sessions."""
+    dataset_id: str
+    state: str = 'pending'  # pending, downloading, retrying, verifying, extracting, done, failed
+    bytes_done: int = 0
+    bytes_total: int = 0
+    attempt: int = 0
+    max_attempts: int = 0
+    error: str = None
+    files: list = field(default_factory=list)
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed')
+
+    @property
+    def fraction(self):
+        """Completed fraction in [0, 1], or 0 while the size is unknown."""
+        if self.state == 'done':
+            return 1.0
+        if not self.bytes_total:
+            return 0.0
+        return min(self.bytes_done / self.bytes_total, 1.0)
+
+    @property
+    def message(self):
+        if self.state == 'downloading':
+            done_mb = self.bytes_done / 1e6
+            if self.bytes_total:
+                return f"Downloading {self.dataset_id}: {done_mb:.1f} / {self.bytes_total / 1e6:.1f} MB"
+            return f"Downloading {self.dataset_id}: {done_mb:.1f} MB"
+        if self.state == 'retrying':
+            return f"Retrying download (attempt {self.attempt + 1} of {self.max_attempts}): {self.error}"
+        if self.state == 'failed':
+            return f"Download failed after {self.attempt} attempts: {self.error}"
+        return f"{self.state.capitalize()} {self.dataset_id}..."
+
+
+_downloads = {}
+_downloads_lock = threading.Lock()
+
+
+def get_download_status(dataset_id, dest_dir='data'):
+    """Return the DownloadStatus for a dataset, or None if none was started."""
+    with _downloads_lock:
+        entry = _downloads.get((dataset_id, dest_dir))
+    return entry[0] if entry else None
+
+
+def start_download(dataset_id, credentials, dest_dir='data', base_url=KAGGLE_API_URL,
+                   expected_sha256=None, max_attempts=4, backoff=1.0):
+    """
+    Start downloading a Kaggle dataset in a background thread.
+
+    Only one download per dataset runs per process; later callers get the
+    status of the running (or finished) download. A failed download is
+    restarted by the next call, resuming from the partial file.
+
+    Args:
+        dataset_id (str): Kaggle dataset identifier (owner/dataset-name)
+        credentials (tuple): (username, key) for HTTP basic auth
+        dest_dir (str): Directory the archive is extracted into
+        base_url (str): Kaggle API base URL (point at a local server for tests)
+        expected_sha256 (str): Optional SHA-256 hex digest of the archive
+        max_attempts (int): Attempts before the download is marked failed
+        backoff (float): Initial delay in seconds, doubled after every failure
+
+    Returns:
+        DownloadStatus: Live status object to poll for progress
+    """
+    key = (dataset_id, dest_dir)
+    with _downloads_lock:
+        entry = _downloads.get(key)
+        if entry and entry[0].state != 'failed':
+            return entry[0]
+
+        status = DownloadStatus(dataset_id=dataset_id, max_attempts=max_attempts)
+        worker = threading.Thread(
+            target=_run_download,
+            args=(status, credentials, dest_dir, base_url, expected_sha256, max_attempts, backoff),
+            name=f'kaggle-download-{dataset_id}',
+            daemon=True,
+        )
+        _downloads[key] = (status, worker)
+        worker.start()
+    return status
+
+
+def _run_download(status, credentials, dest_dir, base_url, expected_sha256, max_attempts, backoff):
+    """Worker thread body: bounded retries around fetch, verify and extract."""
+    import requests
+
+    os.makedirs(dest_dir, exist_ok=True)
+    slug = status.dataset_id.replace('/', '__')
+    part_path = os.path.join(dest_dir, f'.{slug}.zip.part')
+    url = f"{base_url.rstrip('/')}/datasets/download/{status.dataset_id}"
+
+    for attempt in range(1, max_attempts + 1):
+        status.attempt = attempt
+        try:
+            status.state = 'downloading'
+            advertised_md5 = _fetch(url, part_path, credentials, status)
+
+            status.state = 'verifying'
+            _verify(part_path, expected_sha256, advertised_md5)
+
+            status.state = 'extracting'
+            status.files = _extract(part_path, dest_dir)
+            os.remove(part_path)
+
+            status.error = None
+            status.state = 'done'
+            return
+        except (requests.RequestException, OSError, ChecksumError, zipfile.BadZipFile) as e:
+            status.error = str(e)
+            if isinstance(e, (ChecksumError, zipfile.BadZipFile)) and os.path.exists(part_path):
+                # A corrupt archive cannot be resumed, start over
+                os.remove(part_path)
+                status.bytes_done = 0
+            if attempt == max_attempts:
+                break
+            status.state = 'retrying'
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.8, 1.2))
+        except Exception as e:
+            # Anything unexpected (e.g. a malformed Content-Length) is not
+            # retried, but must not leave the status stuck in 'downloading':
+            # failing lets the next start_download call restart it
+            status.error = f"{type(e).__name__}: {e}"
+            break
+
+    status.state = 'failed'
+
+
+def _fetch(url, part_path, credentials, status):
+    """
+    Stream the archive into part_path, resuming from its current size.
+
+    Returns:
+        str: Base64 MD5 advertised by the server (x-goog-hash), if any
+    """
+    import requests
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+    with requests.get(url, auth=credentials, headers=headers, stream=True, timeout=30) as response:
+        if response.status_code == 416:
+            # Requested range not satisfiable: the partial file is already complete
+            status.bytes_done = status.bytes_total = offset
+            return _advertised_md5(response.headers)
+        response.raise_for_status()
+
+        if response.status_code == 206:
+            mode = 'ab'
+            content_range = response.headers.get('Content-Range', '')
+            total = content_range.rsplit('/', 1)[-1]
+            status.bytes_total = int(total) if total.isdigit() else 0
+        else:
+            # Server ignored the Range header, restart from scratch
+            mode, offset = 'wb', 0
+            status.bytes_total = int(response.headers.get('Content-Length', 0))
+
+        status.bytes_done = offset
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                status.bytes_done += len(chunk)
+
+        if status.bytes_total and status.bytes_done < status.bytes_total:
+            raise requests.ConnectionError(
+                f"Connection closed after {status.bytes_done} of {status.bytes_total} bytes"
+            )
+        return _advertised_md5(response.headers)
+
+
+def _advertised_md5(headers):
+    for part in headers.get('x-goog-hash', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name == 'md5':
+            return value
+    return None
+
+
+def _verify(part_path, expected_sha256=None, advertised_md5=None):
+    """Check the archive against the known digests and its zip CRCs."""
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    with open(part_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+            md5.update(chunk)
+
+    if expected_sha256 and sha256.hexdigest() != expected_sha256.lower():
+        raise ChecksumError(f"SHA-256 mismatch: expected {expected_sha256}, got {sha256.hexdigest()}")
+    if advertised_md5 and base64.b64encode(md5.digest()).decode() != advertised_md5:
+        raise ChecksumError("MD5 mismatch against the server's x-goog-hash header")
+
+    with zipfile.ZipFile(part_path) as archive:
+        bad_member = archive.testzip()
+        if bad_member:
+            raise ChecksumError(f"CRC check failed for {bad_member}")
+
+
+def _extract(part_path, dest_dir):
+    """
+    Extract the archive next to dest_dir and move files into place.
+
+    Each file is renamed into dest_dir only after it is fully written, so
+    readers never see a half-extracted CSV.
+    """
+    staging = tempfile.mkdtemp(prefix='.extract-', dir=dest_dir)
+    try:
+        with zipfile.ZipFile(part_path) as archive:
+            archive.extractall(staging)
+        files = []
+        for root, _, names in os.walk(staging):
+            for name in names:
+                src = os.path.join(root, name)
+                dst = os.path.join(dest_dir, os.path.relpath(src, staging))
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.replace(src, dst)
+                files.append(dst)
+        return sorted(files)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,658 @@
+# utils/query_engine.py
+"""
+Pluggable query engines for the Search Jobs filters and Dashboard aggregates.
+
+All engines answer the same questions about the current dataset version
+and return identical results:
+
+- PandasEngine (default) works on the in-memory dataset and the code
+  indexes of utils/filter_engine.py.
+- DuckDBEngine queries the version's columnar parquet snapshot through an
+  embedded, in-process DuckDB. Only the referenced columns are read,
+  filters are pushed down into the parquet scan (skipping partition files
+  and row groups that cannot match, see utils/snapshots.py) and scans run in parallel on all cores, so the
+  aggregates do not depend on pandas holding and scanning the postings.
+- PolarsEngine scans the same snapshot as a Polars lazy frame; the query
+  optimizer prunes columns and pushes filters into the scan, and the
+  collected plan runs on Polars' multi-threaded engine. Selecting it also
+  switches dataset ingestion to Polars (see data_loader.ingest_dataset).
+
+Every query can be restricted by filter selections (column -> raw values,
+as for filter_engine.selection_masks). Aggregates are returned in a
+deterministic order so the two engines can be compared row for row.
+
+SampleEngine answers the Dashboard's aggregates approximately from the
+dataset's stratified sample (see utils/sampling.py), adding 95% margins.
+It is a preview helper rather than an engine (no filter masks or salary
+statistics): the Dashboard uses it for instant previews on large datasets
+before drawing the exact results of the configured engine.
+
+Configuration (Streamlit secrets [query] section, then environment):
+    engine / JOB_QUERY_ENGINE   'pandas' (default), 'duckdb' or 'polars'
+    approximate_rows / JOB_APPROXIMATE_ROWS
+                                Dataset size from which the Dashboard shows
+                                sample estimates first (default 1000000,
+                                0 to always preview)
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cache import cached
+from utils.data_access import get_sample
+from utils.filter_engine import (
+    FILTER_COLUMNS, SKILLS, get_filter_index, active_selections, selection_masks, combine_masks
+)
+from utils.sampling import STRATUM_COLUMN, estimate_counts, estimate_means, strata_sizes
+from utils.snapshots import PARTITION_COLUMNS, ROW_COLUMN, data_path
+
+DEFAULT_ENGINE = 'pandas'
+DEFAULT_APPROXIMATE_ROWS = 1_000_000
+
+
+class QueryEngine:
+    """Interface of query engines; df is a dataset returned by load_jobs."""
+
+    name = None
+
+    def selection_masks(self, df, selections):
+        """Boolean mask per active filter (see filter_engine.selection_masks)."""
+        raise NotImplementedError
+
+    def value_counts(self, df, column, selections=None):
+        """
+        Job counts per value of a column.
+
+        Returns:
+            pd.DataFrame: Columns column and 'count', most frequent first
+            (ties by value), values without jobs left out
+        """
+        raise NotImplementedError
+
+    def group_salary(self, df, column, selections=None):
+        """
+        Average salary and most common posting currency per column value.
+
+        Returns:
+            pd.DataFrame: Columns column, 'avg_salary_usd' and
+            'salary_currency' (ties resolved to the first currency
+            alphabetically), ordered by value
+        """
+        raise NotImplementedError
+
+    def salary_stats(self, df, column, selections=None, rows=None):
+        """
+        Job count and salary statistics per column value.
+
+        Args:
+            rows (np.ndarray): Optional dataset positions the jobs must also
+                be among, for filters that are not selections (text search,
+                dates, ranges)
+
+        Returns:
+            pd.DataFrame: Columns column, 'jobs' (postings with a salary),
+            'avg_salary_usd', 'median_salary_usd', 'min_salary_usd' and
+            'max_salary_usd', most jobs first (ties by value)
+        """
+        raise NotImplementedError
+
+    def summary(self, df, selections=None):
+        """
+        Headline numbers of the matching jobs.
+
+        Returns:
+            dict: 'jobs' and 'avg_salary_usd' (None without jobs)
+        """
+        raise NotImplementedError
+
+    def columns(self, df, columns, selections=None):
+        """
+        Selected columns of the matching jobs, in dataset order.
+
+        Returns:
+            pd.DataFrame: One row per matching job, default index
+        """
+        raise NotImplementedError
+
+
+class PandasEngine(QueryEngine):
+    """Queries the shared in-memory dataset."""
+
+    name = 'pandas'
+
+    def selection_masks(self, df, selections):
+        return selection_masks(get_filter_index(df), selections)
+
+    def _matching(self, df, selections):
+        if not selections:
+            return df
+        return df.loc[combine_masks(self.selection_masks(df, selections), len(df))]
+
+    def value_counts(self, df, column, selections=None):
+        counts = self._matching(df, selections)[column].astype(object).value_counts().reset_index()
+        counts.columns = [column, 'count']
+        return counts.sort_values(['count', column], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+    def group_salary(self, df, column, selections=None):
+        matched = self._matching(df, selections)
+        frame = pd.DataFrame({
+            column: matched[column].astype(object),
+            'salary_usd': matched['salary_usd'],
+            'salary_currency': matched['salary_currency'].astype(object),
+        }).dropna(subset=[column])
+        salary = frame.groupby(column)['salary_usd'].mean().rename('avg_salary_usd').reset_index()
+        currency = (
+            frame.dropna(subset=['salary_currency'])
+            .groupby([column, 'salary_currency']).size().rename('n').reset_index()
+            .sort_values([column, 'n', 'salary_currency'], ascending=[True, False, True], kind='stable')
+            .drop_duplicates(column)[[column, 'salary_currency']]
+        )
+        return salary.merge(currency, on=column, how='left').sort_values(column, kind='stable').reset_index(drop=True)
+
+    def salary_stats(self, df, column, selections=None, rows=None):
+        mask = combine_masks(self.selection_masks(df, selections or {}), len(df))
+        if rows is not None:
+            among = np.zeros(len(df), dtype=bool)
+            among[rows] = True
+            mask &= among
+        frame = pd.DataFrame({
+            column: df[column].astype(object).to_numpy()[mask],
+            'salary_usd': df['salary_usd'].to_numpy(dtype=float)[mask],
+        }).dropna(subset=[column])
+        stats = frame.groupby(column)['salary_usd'].agg(
+            jobs='count', avg_salary_usd='mean', median_salary_usd='median',
+            min_salary_usd='min', max_salary_usd='max'
+        ).reset_index()
+        return stats.sort_values(['jobs', column], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+    def summary(self, df, selections=None):
+        matched = self._matching(df, selections)
+        return {
+            'jobs': len(matched),
+            'avg_salary_usd': float(matched['salary_usd'].mean()) if len(matched) else None,
+        }
+
+    def columns(self, df, columns, selections=None):
+        return self._matching(df, selections)[columns].reset_index(drop=True)
+
+
+# Skills of a posting as a list, normalized like data_access._build_skill_index
+SKILL_LIST_SQL = "string_split(trim(regexp_replace(coalesce(required_skills, ''), '\\s*,\\s*', ',', 'g'), ', '), ',')"
+
+
+class DuckDBEngine(QueryEngine):
+    """Queries the version's parquet snapshot with an embedded DuckDB."""
+
+    name = 'duckdb'
+
+    def __init__(self):
+        import duckdb
+
+        self._connection = duckdb.connect()
+
+    def _query(self, sql, params=()):
+        # A cursor per query: one DuckDB connection must not be used by
+        # several threads at once
+        return self._connection.cursor().execute(sql, list(params))
+
+    def _source(self, df):
+        """Snapshot scan with a _row position column (partitioned or not)."""
+        path, partitioned = data_path(df.attrs['dataset_version'])
+        path = path.replace("'", "''")
+        if partitioned:
+            # Filters on the partition columns skip non-matching files
+            types = ', '.join(f"'{column}': VARCHAR" for column in PARTITION_COLUMNS)
+            return f"read_parquet('{path}', hive_partitioning = true, hive_types = {{{types}}})"
+        return f"(SELECT *, file_row_number AS {ROW_COLUMN} FROM read_parquet('{path}', file_row_number = true))"
+
+    def options(self, df):
+        """Filter options (see filter_engine.get_filter_index) read from the snapshot."""
+        return _scan_options(self.name, df.attrs['dataset_version'], self, df)
+
+    def _read_options(self, df):
+        source = self._source(df)
+        options = {
+            column: sorted(value for (value,) in self._query(
+                f'SELECT DISTINCT "{column}"::VARCHAR FROM {source} WHERE "{column}" IS NOT NULL'
+            ).fetchall())
+            for column in FILTER_COLUMNS
+        }
+        options[SKILLS] = sorted(value for (value,) in self._query(
+            f"SELECT DISTINCT skill FROM (SELECT unnest({SKILL_LIST_SQL}) AS skill FROM {source}) WHERE skill <> ''"
+        ).fetchall())
+        return options
+
+    def _conditions(self, df, selections):
+        """(SQL condition, parameters) per active selection."""
+        options = self.options(df)
+        conditions = {}
+        for column, positions in active_selections(options, selections or {}).items():
+            values = [options[column][i] for i in positions]
+            if column == SKILLS:
+                conditions[column] = (f'list_has_any({SKILL_LIST_SQL}, ?::VARCHAR[])', [values])
+            else:
+                # A plain IN list of constants is pushed into the parquet scan
+                placeholders = ', '.join('?' * len(values))
+                conditions[column] = (f'"{column}" IN ({placeholders})', values)
+        return conditions
+
+    def _where(self, df, selections):
+        conditions = self._conditions(df, selections)
+        if not conditions:
+            return '', []
+        sql = 'WHERE ' + ' AND '.join(condition for condition, _ in conditions.values())
+        return sql, [param for _, params in conditions.values() for param in params]
+
+    def selection_masks(self, df, selections):
+        conditions = self._conditions(df, selections)
+        if not conditions:
+            return {}
+        result = self._query(
+            f"SELECT {ROW_COLUMN}, "
+            f"{', '.join(f'coalesce({sql}, false) AS m{i}' for i, (sql, _) in enumerate(conditions.values()))} "
+            f"FROM {self._source(df)}",
+            [param for _, params in conditions.values() for param in params]
+        ).fetchnumpy()
+        rows = result[ROW_COLUMN]
+        masks = {}
+        for column, values in zip(conditions, list(result.values())[1:]):
+            mask = np.zeros(len(df), dtype=bool)
+            mask[rows] = values
+            masks[column] = mask
+        return masks
+
+    def value_counts(self, df, column, selections=None):
+        where, params = self._where(df, selections)
+        return self._query(
+            f'SELECT "{column}"::VARCHAR AS "{column}", count(*) AS count FROM {self._source(df)} {where} '
+            f'GROUP BY 1 HAVING "{column}" IS NOT NULL ORDER BY count DESC, "{column}"',
+            params
+        ).df()
+
+    def group_salary(self, df, column, selections=None):
+        where, params = self._where(df, selections)
+        return self._query(f'''
+            WITH jobs AS (
+                SELECT "{column}"::VARCHAR AS "{column}", salary_usd, salary_currency::VARCHAR AS salary_currency
+                FROM {self._source(df)} {where}
+            ),
+            salary AS (
+                SELECT "{column}", avg(salary_usd) AS avg_salary_usd
+                FROM jobs WHERE "{column}" IS NOT NULL GROUP BY 1
+            ),
+            currency AS (
+                SELECT "{column}", salary_currency,
+                       row_number() OVER (PARTITION BY "{column}" ORDER BY count(*) DESC, salary_currency) AS rank
+                FROM jobs WHERE "{column}" IS NOT NULL AND salary_currency IS NOT NULL GROUP BY 1, 2
+            )
+            SELECT salary."{column}", avg_salary_usd, salary_currency
+            FROM salary LEFT JOIN currency ON currency."{column}" = salary."{column}" AND rank = 1
+            ORDER BY 1
+        ''', params).df()
+
+    def salary_stats(self, df, column, selections=None, rows=None):
+        where, params = self._where(df, selections)
+        cursor = self._connection.cursor()
+        if rows is not None:
+            # Matching positions as a registered relation, semi-joined on _row
+            cursor.register('matched_rows', pd.DataFrame({ROW_COLUMN: np.asarray(rows, dtype=np.int64)}))
+            where = f"{where + ' AND' if where else 'WHERE'} {ROW_COLUMN} IN (SELECT {ROW_COLUMN} FROM matched_rows)"
+        return cursor.execute(f'''
+            SELECT "{column}"::VARCHAR AS "{column}", count(salary_usd) AS jobs,
+                   avg(salary_usd) AS avg_salary_usd, median(salary_usd::DOUBLE) AS median_salary_usd,
+                   min(salary_usd)::DOUBLE AS min_salary_usd, max(salary_usd)::DOUBLE AS max_salary_usd
+            FROM {self._source(df)} {where}
+            GROUP BY 1 HAVING "{column}" IS NOT NULL ORDER BY jobs DESC, 1
+        ''', params).df()
+
+    def summary(self, df, selections=None):
+        where, params = self._where(df, selections)
+        jobs, avg_salary = self._query(
+            f'SELECT count(*), avg(salary_usd) FROM {self._source(df)} {where}', params
+        ).fetchone()
+        return {'jobs': int(jobs), 'avg_salary_usd': None if avg_salary is None else float(avg_salary)}
+
+    def columns(self, df, columns, selections=None):
+        where, params = self._where(df, selections)
+        select = ', '.join(f'"{column}"' for column in columns)
+        return self._query(f'SELECT {select} FROM {self._source(df)} {where} ORDER BY {ROW_COLUMN}', params).df()
+
+
+class PolarsEngine(QueryEngine):
+    """Queries the version's parquet snapshot as a Polars lazy frame."""
+
+    name = 'polars'
+
+    def __init__(self):
+        import polars
+
+        self._pl = polars
+
+    def _scan(self, df, selections=None):
+        """Lazy frame of the snapshot with a _row position column, filtered."""
+        pl = self._pl
+        path, partitioned = data_path(df.attrs['dataset_version'])
+        if partitioned:
+            # Filters on the partition columns skip non-matching files
+            frame = pl.scan_parquet(
+                path, hive_partitioning=True, hive_schema={column: pl.String for column in PARTITION_COLUMNS}
+            )
+        else:
+            frame = pl.scan_parquet(path).with_row_index(ROW_COLUMN).with_columns(pl.col(ROW_COLUMN).cast(pl.Int64))
+        # Unfiltered scans (e.g. reading the options) skip the conditions,
+        # which need the options themselves
+        conditions = self._conditions(df, selections) if selections else {}
+        if conditions:
+            frame = frame.filter(pl.all_horizontal(list(conditions.values())))
+        return frame
+
+    def _skills(self):
+        """Skills of a posting as a list, normalized like data_access._build_skill_index."""
+        return (
+            self._pl.col('required_skills').fill_null('')
+            .str.replace_all(r'\s*,\s*', ',').str.strip_chars(', ').str.split(',')
+        )
+
+    def options(self, df):
+        """Filter options (see filter_engine.get_filter_index) read from the snapshot."""
+        return _scan_options(self.name, df.attrs['dataset_version'], self, df)
+
+    def _read_options(self, df):
+        pl = self._pl
+        frame = self._scan(df)
+        options = {
+            column: sorted(
+                frame.select(pl.col(column).cast(pl.String)).drop_nulls().unique().collect().to_series().to_list()
+            )
+            for column in FILTER_COLUMNS
+        }
+        skills = frame.select(self._skills().alias(SKILLS)).explode(SKILLS).unique().collect().to_series()
+        options[SKILLS] = sorted(skill for skill in skills.to_list() if skill)
+        return options
+
+    def _conditions(self, df, selections):
+        """Polars boolean expression per active selection."""
+        pl = self._pl
+        options = self.options(df)
+        conditions = {}
+        for column, positions in active_selections(options, selections or {}).items():
+            values = [options[column][i] for i in positions]
+            if column == SKILLS:
+                conditions[column] = self._skills().list.eval(pl.element().is_in(values)).list.any()
+            else:
+                conditions[column] = pl.col(column).cast(pl.String).is_in(values).fill_null(False)
+        return conditions
+
+    def selection_masks(self, df, selections):
+        conditions = self._conditions(df, selections)
+        if not conditions:
+            return {}
+        result = self._scan(df).select(
+            ROW_COLUMN, *(condition.alias(column) for column, condition in conditions.items())
+        ).collect()
+        rows = result[ROW_COLUMN].to_numpy()
+        masks = {}
+        for column in conditions:
+            mask = np.zeros(len(df), dtype=bool)
+            mask[rows] = result[column].to_numpy()
+            masks[column] = mask
+        return masks
+
+    def value_counts(self, df, column, selections=None):
+        pl = self._pl
+        return (
+            self._scan(df, selections)
+            .select(pl.col(column).cast(pl.String))
+            .drop_nulls()
+            .group_by(column).agg(pl.len().cast(pl.Int64).alias('count'))
+            .sort(['count', column], descending=[True, False])
+            .collect().to_pandas()
+        )
+
+    def group_salary(self, df, column, selections=None):
+        pl = self._pl
+        jobs = self._scan(df, selections).select(
+            pl.col(column).cast(pl.String), 'salary_usd', pl.col('salary_currency').cast(pl.String)
+        ).drop_nulls(column)
+        salary = jobs.group_by(column).agg(pl.col('salary_usd').mean().alias('avg_salary_usd'))
+        currency = (
+            jobs.drop_nulls('salary_currency')
+            .group_by([column, 'salary_currency']).len()
+            .sort([column, 'len', 'salary_currency'], descending=[False, True, False])
+            .unique(column, keep='first', maintain_order=True)
+            .select(column, 'salary_currency')
+        )
+        return salary.join(currency, on=column, how='left').sort(column).collect().to_pandas()
+
+    def salary_stats(self, df, column, selections=None, rows=None):
+        pl = self._pl
+        frame = self._scan(df, selections)
+        if rows is not None:
+            frame = frame.filter(pl.col(ROW_COLUMN).is_in(pl.Series(np.asarray(rows, dtype=np.int64))))
+        salary = pl.col('salary_usd').cast(pl.Float64)
+        return (
+            frame.select(pl.col(column).cast(pl.String), 'salary_usd')
+            .drop_nulls(column)
+            .group_by(column).agg(
+                salary.count().cast(pl.Int64).alias('jobs'), salary.mean().alias('avg_salary_usd'),
+                salary.median().alias('median_salary_usd'), salary.min().alias('min_salary_usd'),
+                salary.max().alias('max_salary_usd')
+            )
+            .sort(['jobs', column], descending=[True, False])
+            .collect().to_pandas()
+        )
+
+    def summary(self, df, selections=None):
+        pl = self._pl
+        jobs, avg_salary = self._scan(df, selections).select(
+            pl.len(), pl.col('salary_usd').mean()
+        ).collect().row(0)
+        return {'jobs': int(jobs), 'avg_salary_usd': None if avg_salary is None else float(avg_salary)}
+
+    def columns(self, df, columns, selections=None):
+        frame = self._scan(df, selections).sort(ROW_COLUMN).select(columns).collect().to_pandas()
+        for column in columns:
+            # Categoricals come back as object columns like the other engines
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(object)
+        return frame
+
+
+class SampleEngine:
+    """
+    Estimates from the dataset's stratified sample, with 95% margins.
+
+    A preview helper for the Dashboard KPIs and approximate charts, not a
+    QueryEngine: it is not in ENGINES and only answers value_counts,
+    group_salary, summary, columns and skill_demand. A sample has no
+    per-job filter masks or exact salary statistics, so Search Jobs and
+    the API always use an exact engine.
+
+    Results have the columns of the exact engines plus 'margin' (the
+    confidence half-width of 'count' or 'avg_salary_usd'); summary adds
+    'jobs_margin' and 'avg_salary_margin', and columns returns sampled
+    jobs with the 'weight' (number of jobs) each stands for.
+    """
+
+    def _matching(self, df, selections):
+        """(sample, bool mask of the sampled jobs matching the selections)."""
+        sample = get_sample(df)
+        mask = np.ones(len(sample), dtype=bool)
+        # Matched against the sample directly: previews must not wait for
+        # indexes over the full dataset. Empty selections are not filters.
+        for column, values in (selections or {}).items():
+            if not values:
+                continue
+            if column == SKILLS:
+                rows, skills = sample_skills(df)
+                mask &= np.isin(np.arange(len(sample)), rows[np.isin(skills, values)])
+            else:
+                mask &= sample[column].astype(object).isin(values).to_numpy()
+        return sample, mask
+
+    def value_counts(self, df, column, selections=None):
+        sample, mask = self._matching(df, selections)
+        codes, values = pd.factorize(sample[column].astype(object))
+        keep = mask & (codes >= 0)
+        count, margin = estimate_counts(sample, sample[STRATUM_COLUMN].to_numpy()[keep], codes[keep], len(values))
+        counts = pd.DataFrame({column: list(values), 'count': np.round(count).astype(np.int64), 'margin': margin})
+        counts = counts[counts['count'] > 0]
+        return counts.sort_values(['count', column], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+    def group_salary(self, df, column, selections=None):
+        sample, mask = self._matching(df, selections)
+        codes, values = pd.factorize(sample[column].astype(object))
+        keep = mask & (codes >= 0)
+        strata = sample[STRATUM_COLUMN].to_numpy()
+        salary, margin = estimate_means(
+            sample, strata[keep], codes[keep], len(values), sample['salary_usd'].to_numpy()[keep]
+        )
+        # Most common currency by estimated number of jobs
+        currency = (
+            pd.DataFrame({
+                column: sample[column].astype(object), 'salary_currency': sample['salary_currency'].astype(object),
+                'jobs': sample_weights(sample),
+            })[keep].dropna()
+            .groupby([column, 'salary_currency'])['jobs'].sum().reset_index()
+            .sort_values([column, 'jobs', 'salary_currency'], ascending=[True, False, True], kind='stable')
+            .drop_duplicates(column)[[column, 'salary_currency']]
+        )
+        result = pd.DataFrame({column: list(values), 'avg_salary_usd': salary, 'margin': margin}).dropna(subset=['avg_salary_usd'])
+        result = result.merge(currency, on=column, how='left')
+        return result[[column, 'avg_salary_usd', 'salary_currency', 'margin']].sort_values(column, kind='stable').reset_index(drop=True)
+
+    def summary(self, df, selections=None):
+        sample, mask = self._matching(df, selections)
+        strata = sample[STRATUM_COLUMN].to_numpy()[mask]
+        domains = np.zeros(len(strata), dtype=np.int64)
+        (jobs,), (jobs_margin,) = estimate_counts(sample, strata, domains, 1)
+        (salary,), (salary_margin,) = estimate_means(sample, strata, domains, 1, sample['salary_usd'].to_numpy()[mask])
+        found = bool(mask.any())
+        return {
+            'jobs': int(round(jobs)), 'jobs_margin': float(jobs_margin),
+            'avg_salary_usd': float(salary) if found else None,
+            'avg_salary_margin': float(salary_margin) if found else None,
+        }
+
+    def columns(self, df, columns, selections=None):
+        sample, mask = self._matching(df, selections)
+        return sample.loc[mask, columns].assign(weight=sample_weights(sample)[mask]).reset_index(drop=True)
+
+    def skill_demand(self, df):
+        """
+        Estimated skill demand (see data_access.get_skill_demand).
+
+        Returns:
+            pd.DataFrame: Columns skill, count, percentage (of all jobs)
+            and margin (of the percentage, in points), by count descending
+        """
+        sample = get_sample(df)
+        rows, skills = sample_skills(df)
+        codes, vocabulary = pd.factorize(skills)
+        count, margin = estimate_counts(sample, sample[STRATUM_COLUMN].to_numpy()[rows], codes, len(vocabulary))
+        jobs = max(strata_sizes(sample)[1].sum(), 1)
+        demand = pd.DataFrame({
+            'skill': list(vocabulary), 'count': np.round(count).astype(np.int64),
+            'percentage': (count / jobs * 100).round(1), 'margin': margin / jobs * 100,
+        })
+        return demand.sort_values(['count', 'skill'], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+
+@cached('scan_options', disk=True)
+def _scan_options(engine_name, version, _engine, _df):
+    # Built from the parquet scan, so the DuckDB and Polars engines never
+    # need the pandas filter index of the dataset
+    return _engine._read_options(_df)
+
+
+def sample_weights(sample):
+    """Number of jobs each sampled job stands for (population / sample size of its stratum)."""
+    sizes, populations = strata_sizes(sample)
+    strata = sample[STRATUM_COLUMN].to_numpy()
+    return populations[strata] / sizes[strata]
+
+
+def sample_skills(df):
+    """
+    (row, skill) pairs of the sampled jobs of df's version, normalized like
+    data_access._build_skill_index.
+
+    Returns:
+        tuple: (int ndarray of sample rows, object ndarray of skills)
+    """
+    return _sample_skills(df, df.attrs['dataset_version'])
+
+
+@cached('sample_skills')
+def _sample_skills(_df, version):
+    skills = (
+        get_sample(_df)['required_skills'].fillna('').astype(str)
+        .str.replace(r'\s*,\s*', ',', regex=True).str.strip(', ')
+        .str.split(',').explode()
+    )
+    pairs = pd.DataFrame({'row': skills.index.to_numpy(), 'skill': skills.to_numpy()})
+    pairs = pairs[pairs['skill'] != ''].drop_duplicates()
+    return pairs['row'].to_numpy(), pairs['skill'].to_numpy(dtype=object)
+
+
+ENGINES = {'pandas': PandasEngine, 'duckdb': DuckDBEngine, 'polars': PolarsEngine}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _setting(name, env_var, default):
+    try:
+        if hasattr(st, 'secrets') and 'query' in st.secrets and name in st.secrets['query']:
+            return st.secrets['query'][name]
+    except FileNotFoundError:
+        # No secrets.toml at all
+        pass
+    return os.environ.get(env_var, default)
+
+
+def engine_name():
+    """Name of the configured query engine."""
+    return str(_setting('engine', 'JOB_QUERY_ENGINE', DEFAULT_ENGINE)).lower()
+
+
+def approximate_rows():
+    """Dataset size from which the Dashboard previews sample estimates."""
+    return int(_setting('approximate_rows', 'JOB_APPROXIMATE_ROWS', DEFAULT_APPROXIMATE_ROWS))
+
+
+_sample_engine = SampleEngine()
+
+
+def get_sample_engine():
+    """Return the SampleEngine for approximate answers."""
+    return _sample_engine
+
+
+def get_engine(name=None):
+    """
+    Return the configured query engine (one instance per process).
+
+    Args:
+        name (str): Engine name overriding the configuration
+
+    Returns:
+        QueryEngine: PandasEngine, DuckDBEngine or PolarsEngine
+
+    Raises:
+        ValueError: For an unknown engine name
+        ImportError: When an engine's package is not installed
+    """
+    name = (name or engine_name()).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown query engine '{name}', expected one of: {', '.join(ENGINES)}")
+    with _engines_lock:
+        if name not in _engines:
+            try:
+                _engines[name] = ENGINES[name]()
+            except ImportError as e:
+                raise ImportError(f"The '{name}' query engine needs an extra package: pip install {name}") from e
+        return _engines[name]
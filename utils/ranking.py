@@ -0,0 +1,93 @@
+# utils/ranking.py
+"""
+"Best match" relevance ranking for Search Jobs.
+
+Each candidate job gets a score in [0, 1] from up to three components,
+weighted by DEFAULT_WEIGHTS and renormalized over the active ones:
+
+- skills: share of the selected skills the job requires, each skill
+  weighted by its rarity (smoothed inverse document frequency), so
+  matching a rare skill counts more than matching Python,
+- salary: closeness of salary_usd to a target salary, falling linearly to
+  0 at a distance of 100% of the target,
+- remote: closeness of remote_ratio to the preferred remote ratio.
+
+Only the best k candidates are selected, with np.argpartition, and only
+those k are sorted, so ranking large result sets costs O(n + k log k).
+"""
+import numpy as np
+
+from utils.filter_engine import SKILLS
+
+DEFAULT_WEIGHTS = {'skills': 0.6, 'salary': 0.25, 'remote': 0.15}
+
+
+def skill_idf(index):
+    """
+    Rarity weight per skill of the skill vocabulary.
+
+    Args:
+        index (FilterIndex): From filter_engine.get_filter_index
+
+    Returns:
+        np.ndarray: Smoothed idf, aligned with index.options['skills']
+    """
+    return np.log((1 + index.n_jobs) / (1 + index.counts[SKILLS])) + 1
+
+
+def match_scores(df, index, candidates, skills=(), target_salary_usd=None,
+                 remote_ratio=None, weights=DEFAULT_WEIGHTS):
+    """
+    Relevance score of each candidate job.
+
+    Args:
+        df (pd.DataFrame): Dataset the index was built from
+        index (FilterIndex): From filter_engine.get_filter_index
+        candidates (np.ndarray): Row positions of the jobs to score
+        skills (list): Selected skill names (ignored when empty)
+        target_salary_usd (float): Target salary (ignored when None or 0)
+        remote_ratio (int): Preferred remote ratio 0-100 (ignored when None)
+        weights (dict): Weight per component
+
+    Returns:
+        np.ndarray: Scores in [0, 1] aligned with candidates; all zeros when
+        no component is active
+    """
+    components = {}
+    vocabulary = index.options[SKILLS]
+    skill_ids = [vocabulary.index(skill) for skill in skills if skill in vocabulary]
+    if skill_ids:
+        idf = skill_idf(index)[skill_ids]
+        required = index.skill_matrix[np.ix_(candidates, skill_ids)]
+        components['skills'] = required.astype(np.float32) @ (idf / idf.sum())
+    if target_salary_usd:
+        salary = df['salary_usd'].to_numpy(dtype=float)[candidates]
+        components['salary'] = np.clip(1 - np.abs(salary - target_salary_usd) / target_salary_usd, 0, 1)
+    if remote_ratio is not None:
+        ratio = df['remote_ratio'].to_numpy(dtype=float)[candidates]
+        components['remote'] = 1 - np.abs(ratio - remote_ratio) / 100
+
+    if not components:
+        return np.zeros(len(candidates))
+    total_weight = sum(weights[name] for name in components)
+    return sum(weights[name] * score for name, score in components.items()) / total_weight
+
+
+def top_k(candidates, scores, k):
+    """
+    Best k candidates by score, best first.
+
+    Selected candidates with equal scores are ordered by row position.
+
+    Returns:
+        tuple: (row positions, scores), both of length min(k, len(candidates))
+    """
+    k = min(k, len(candidates))
+    if k == 0:
+        return candidates[:0], scores[:0]
+    if k < len(candidates):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(candidates))
+    best = best[np.lexsort((candidates[best], -scores[best]))]
+    return candidates[best], scores[best]
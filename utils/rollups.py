@@ -0,0 +1,88 @@
+# utils/rollups.py
+"""
+Precomputed posting-count and salary rollups for trend charts.
+
+Rollups are built once per snapshot at publish time and stored next to it,
+so trend charts read a small table instead of scanning every posting on
+each rerun. The table is in long format with one row per
+(frequency, period, segment, value):
+
+    frequency     'daily', 'weekly' or 'monthly'
+    period        Start date of the day / week (Monday) / month
+    segment       'all' or the segmenting column (job_title, ...)
+    value         Segment value ('All' for the overall series)
+    postings      Number of postings
+    salary_sum    Sum of salary_usd
+    salary_sq_sum Sum of squared salary_usd
+
+Counts and sums are additive, so rollups of different files or segments
+can be combined with a plain groupby-sum, and mean/standard deviation are
+derived from them on read.
+"""
+import numpy as np
+import pandas as pd
+
+FREQUENCIES = {'daily': 'D', 'weekly': 'W-SUN', 'monthly': 'M'}
+SEGMENT_COLUMNS = ['job_title', 'company_location', 'experience_level']
+
+
+def build_rollups(df):
+    """
+    Build the rollup table for a dataset.
+
+    Args:
+        df (pd.DataFrame): Dataset with posting_date and salary_usd
+
+    Returns:
+        pd.DataFrame: Long-format rollup table (see module docstring)
+    """
+    salary = df['salary_usd'].astype(float)
+    base = pd.DataFrame({'salary_sum': salary, 'salary_sq_sum': salary ** 2})
+    base['postings'] = 1
+
+    tables = []
+    for frequency, code in FREQUENCIES.items():
+        period = df['posting_date'].dt.to_period(code).dt.start_time.rename('period')
+        segments = [('all', pd.Series('All', index=df.index, name='value'))]
+        segments += [
+            (column, df[column].astype(str).rename('value'))
+            for column in SEGMENT_COLUMNS if column in df.columns
+        ]
+        for segment, values in segments:
+            table = base.groupby([period, values], sort=True).sum().reset_index()
+            table.insert(0, 'segment', segment)
+            table.insert(0, 'frequency', frequency)
+            tables.append(table)
+
+    rollups = pd.concat(tables, ignore_index=True)
+    for column in ['frequency', 'segment', 'value']:
+        rollups[column] = rollups[column].astype('category')
+    return rollups[['frequency', 'period', 'segment', 'value', 'postings', 'salary_sum', 'salary_sq_sum']]
+
+
+def trend_series(rollups, frequency='monthly', segment='all', top_n=5):
+    """
+    Extract trend lines from the rollup table.
+
+    Args:
+        rollups (pd.DataFrame): Table from build_rollups
+        frequency (str): 'daily', 'weekly' or 'monthly'
+        segment (str): 'all' or one of SEGMENT_COLUMNS
+        top_n (int): Keep only the segment values with the most postings
+
+    Returns:
+        pd.DataFrame: period, value, postings, avg_salary_usd and
+        salary_std_usd (population), sorted by value then period
+    """
+    rows = rollups[(rollups['frequency'] == frequency) & (rollups['segment'] == segment)]
+    rows = rows[['period', 'value', 'postings', 'salary_sum', 'salary_sq_sum']].copy()
+    rows['value'] = rows['value'].astype(str)
+
+    if top_n and rows['value'].nunique() > top_n:
+        top = rows.groupby('value')['postings'].sum().nlargest(top_n).index
+        rows = rows[rows['value'].isin(top)]
+
+    rows['avg_salary_usd'] = rows['salary_sum'] / rows['postings']
+    variance = rows['salary_sq_sum'] / rows['postings'] - rows['avg_salary_usd'] ** 2
+    rows['salary_std_usd'] = np.sqrt(variance.clip(lower=0))
+    return rows.drop(columns=['salary_sum', 'salary_sq_sum']).sort_values(['value', 'period']).reset_index(drop=True)
@@ -0,0 +1,207 @@
+# utils/sampling.py
+"""
+Stratified reservoir sample of the postings and estimators with error bounds.
+
+The Dashboard's approximate mode (see utils/query_engine.py SampleEngine)
+first draws its KPIs and charts from a small sample, then refines them to
+exact values. The sample is built when a snapshot is published, by
+streaming the postings through a StratifiedReservoir in chunks, and is
+stored next to the snapshot like the rollups.
+
+Postings are stratified by company location and experience level. Every
+stratum keeps a uniform reservoir (Algorithm R) of up to RESERVOIR_SIZE
+postings, so small strata are sampled completely and large ones are capped;
+each stratum's population size is stored with its rows. Estimates weight
+each sampled posting by population / sample size of its stratum:
+
+- totals (job counts per value) use the stratified estimator, with
+  variance sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h,
+- means (average salary per value) are ratios of two totals, with the
+  linearized (Taylor) variance of the ratio,
+
+and margins are 95% normal confidence half-widths. Fully sampled strata
+contribute no variance, so on small datasets the estimates are exact.
+"""
+import numpy as np
+
+STRATUM_COLUMNS = ['company_location', 'experience_level']
+# Maximum sampled postings per stratum
+RESERVOIR_SIZE = 1000
+# Postings fed to the reservoir at a time when building a sample
+CHUNK_ROWS = 1_000_000
+# Sample columns holding each row's stratum (0..strata-1) and its population
+STRATUM_COLUMN = '_stratum'
+POPULATION_COLUMN = '_population'
+# Two-sided 95% normal quantile
+Z_95 = 1.959963984540054
+
+
+class StratifiedReservoir:
+    """Uniform reservoir of row positions per stratum, fed in chunks."""
+
+    def __init__(self, size=RESERVOIR_SIZE, seed=0):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._seen = {}
+        self._slots = {}
+
+    def add(self, strata, offset=0):
+        """
+        Offer a chunk of rows to the reservoir.
+
+        Args:
+            strata (dict): Stratum key -> ascending positions of the chunk's
+                rows in that stratum (e.g. DataFrame.groupby(...).indices)
+            offset (int): Position of the chunk's first row in the dataset
+        """
+        for key, positions in strata.items():
+            positions = np.asarray(positions, dtype=np.int64) + offset
+            seen = self._seen.get(key, 0)
+            slots = self._slots.setdefault(key, np.empty(0, dtype=np.int64))
+
+            # Rows that arrive while the reservoir is not full are all kept
+            free = max(0, min(self.size - seen, len(positions)))
+            if free:
+                slots = np.concatenate([slots, positions[:free]])
+            # Algorithm R: the t-th row seen (0-based) replaces a random slot
+            # with probability size / (t + 1)
+            rest = positions[free:]
+            if len(rest):
+                seen_before = seen + free + np.arange(len(rest))
+                draws = self._rng.integers(0, seen_before + 1)
+                keep = draws < self.size
+                # Sequential replacement: a later row wins a contested slot
+                targets, rows = draws[keep][::-1], rest[keep][::-1]
+                targets, first = np.unique(targets, return_index=True)
+                slots[targets] = rows[first]
+            self._slots[key] = slots
+            self._seen[key] = seen + len(positions)
+
+    def sample(self, df):
+        """
+        The sampled rows of df (the frame the positions refer to).
+
+        Returns:
+            pd.DataFrame: Sampled rows in dataset order, plus STRATUM_COLUMN
+            and POPULATION_COLUMN
+        """
+        keys = sorted(self._slots, key=str)
+        rows = np.concatenate([self._slots[key] for key in keys]) if keys else np.empty(0, dtype=np.int64)
+        strata = np.repeat(np.arange(len(keys), dtype=np.int32), [len(self._slots[key]) for key in keys])
+        populations = np.repeat([self._seen[key] for key in keys], [len(self._slots[key]) for key in keys])
+        order = np.argsort(rows, kind='stable')
+        return df.iloc[rows[order]].reset_index(drop=True).assign(**{
+            STRATUM_COLUMN: strata[order],
+            POPULATION_COLUMN: np.asarray(populations, dtype=np.int64)[order],
+        })
+
+
+def build_sample(df, size=RESERVOIR_SIZE, seed=0):
+    """
+    Stratified reservoir sample of a dataset.
+
+    Args:
+        df (pd.DataFrame): Dataset with the STRATUM_COLUMNS
+        size (int): Maximum sampled postings per stratum
+        seed (int): Random seed, so republishing a dataset gives the same sample
+
+    Returns:
+        pd.DataFrame: See StratifiedReservoir.sample
+    """
+    reservoir = StratifiedReservoir(size, seed)
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        keys = [chunk[column].astype(object).fillna('') for column in STRATUM_COLUMNS]
+        reservoir.add(chunk.groupby(keys, sort=False).indices, offset=start)
+    return reservoir.sample(df)
+
+
+def strata_sizes(sample):
+    """
+    (sample size, population size) per stratum, as float arrays.
+    """
+    codes = sample[STRATUM_COLUMN].to_numpy()
+    n_strata = int(codes.max()) + 1 if len(codes) else 0
+    sizes = np.bincount(codes, minlength=n_strata).astype(float)
+    populations = np.zeros(n_strata)
+    populations[codes] = sample[POPULATION_COLUMN].to_numpy()
+    return sizes, populations
+
+
+def _total_variance(sizes, populations, sums, squares):
+    """Stratified variance of estimated totals from per-stratum sums (strata x domains)."""
+    n, N = sizes[:, None], populations[:, None]
+    mean = sums / n
+    spread = np.where(n > 1, (squares - n * mean ** 2) / np.maximum(n - 1, 1), 0.0)
+    return (N ** 2 * (1 - n / N) * np.maximum(spread, 0) / n).sum(axis=0)
+
+
+def _per_stratum(strata, domains, n_strata, n_domains, weights=None):
+    key = strata.astype(np.int64) * n_domains + domains
+    return np.bincount(key, weights=weights, minlength=n_strata * n_domains).reshape(n_strata, n_domains)
+
+
+def estimate_counts(sample, strata, domains, n_domains):
+    """
+    Estimated number of postings per domain, with 95% margins.
+
+    Args:
+        sample (pd.DataFrame): From build_sample (for the strata sizes)
+        strata (np.ndarray): Stratum of each entry
+        domains (np.ndarray): Domain (0..n_domains-1) of each entry. Entries
+            are sampled postings, or (posting, value) pairs for multi-valued
+            columns such as skills; a posting counts at most once per domain.
+        n_domains (int): Number of domains
+
+    Returns:
+        tuple: (estimated counts, margins), float arrays of n_domains
+    """
+    sizes, populations = strata_sizes(sample)
+    counts = _per_stratum(strata, domains, len(sizes), n_domains)
+    estimate = (populations[:, None] * counts / sizes[:, None]).sum(axis=0)
+    # Indicator variables: sums of squares equal the counts
+    return estimate, Z_95 * np.sqrt(_total_variance(sizes, populations, counts, counts))
+
+
+def estimate_means(sample, strata, domains, n_domains, values):
+    """
+    Estimated mean of values per domain (ratio estimator), with 95% margins.
+
+    Args:
+        values (np.ndarray): Value of each entry; see estimate_counts for
+            the other arguments
+
+    Returns:
+        tuple: (estimated means, margins), NaN for domains without entries
+    """
+    sizes, populations = strata_sizes(sample)
+    values = np.asarray(values, dtype=float)
+    counts = _per_stratum(strata, domains, len(sizes), n_domains)
+    sums = _per_stratum(strata, domains, len(sizes), n_domains, values)
+    squares = _per_stratum(strata, domains, len(sizes), n_domains, values ** 2)
+
+    scale = populations[:, None] / sizes[:, None]
+    jobs, total = (scale * counts).sum(axis=0), (scale * sums).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = total / jobs
+    # Linearized variable z = value - ratio over the domain's entries
+    safe = np.nan_to_num(ratio)
+    z_sums = sums - safe * counts
+    z_squares = squares - 2 * safe * sums + safe ** 2 * counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        margin = Z_95 * np.sqrt(_total_variance(sizes, populations, z_sums, z_squares)) / jobs
+    return ratio, margin
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+    Quantiles of values where each value stands for weight postings.
+
+    Interpolates the weighted empirical CDF between the midpoints of each
+    value's weight.
+    """
+    values, weights = np.asarray(values, dtype=float), np.asarray(weights, dtype=float)
+    order = np.argsort(values, kind='stable')
+    values, weights = values[order], weights[order]
+    cumulative = np.cumsum(weights) - weights / 2
+    return np.interp(np.asarray(quantiles) * weights.sum(), cumulative, values)
@@ -0,0 +1,88 @@
+# utils/search.py
+"""
+Job search shared by the Search Jobs page and the HTTP API.
+
+Turns a search request (filter selections, free-text query, minimum
+salary, date and numeric ranges) into the filter masks of utils/filter_engine.py (computed by the
+configured query engine, see utils/query_engine.py), applying the same
+typo tolerance everywhere: unknown skills are replaced by their closest
+fuzzy match, and a text query without exact matches falls back to similar
+job titles.
+"""
+import numpy as np
+
+from utils.filter_engine import get_filter_index, get_sorted_indexes, date_masks, range_masks, SKILLS
+from utils.fuzzy import get_fuzzy_indexes, fuzzy_matches
+from utils.query_engine import get_engine
+from utils.text_search import get_text_index, text_mask, value_mask
+
+
+def correct_skills(df, skills):
+    """
+    Replace skills missing from the vocabulary by their closest match.
+
+    Args:
+        df (pd.DataFrame): Dataset returned by load_jobs
+        skills (list): Skill names as entered by the user
+
+    Returns:
+        tuple: (corrected skill list without duplicates, list of
+        (entered, matched skill or None) for every replaced entry)
+    """
+    vocabulary = get_filter_index(df).options[SKILLS]
+    corrected, corrections = [], []
+    for skill in skills:
+        if skill not in vocabulary:
+            match = fuzzy_matches(get_fuzzy_indexes(df)['skills'], skill, limit=1)
+            corrections.append((skill, match[0][0] if match else None))
+            skill = match[0][0] if match else None
+        if skill and skill not in corrected:
+            corrected.append(skill)
+    return corrected, corrections
+
+
+def search_masks(df, selections, text_query='', salary=None, min_salary=0, date_ranges=None, open_on=None,
+                 ranges=None):
+    """
+    Filter masks for a search request.
+
+    Args:
+        df (pd.DataFrame): Dataset returned by load_jobs
+        selections (dict): Column name -> selected raw values (see
+            filter_engine.selection_masks)
+        text_query (str): Free-text query over title, company and industry
+        salary (array-like): Salaries to compare with min_salary, e.g.
+            converted to the display currency (defaults to salary_usd)
+        min_salary (float): Minimum salary, ignored when 0
+        date_ranges (dict): 'posting_date' and/or 'application_deadline'
+            -> inclusive (start, end) days, either may be None
+        open_on (date): Only jobs still open on that day (posted on or
+            before it, deadline on or after it)
+        ranges (dict): Numeric column (filter_engine.RANGE_COLUMNS) ->
+            inclusive (low, high), either may be None
+
+    Returns:
+        tuple: (dict of active masks for filter_engine.combine_masks and
+        facet_counts, list of similar job titles used when the text query
+        had no exact match)
+    """
+    masks = get_engine().selection_masks(df, selections)
+
+    text_index = get_text_index(df)
+    query_mask = text_mask(text_index, text_query)
+    similar_titles = []
+    if query_mask is not None and not query_mask.any():
+        # Nothing matches exactly: fall back to typo-tolerant job title matches
+        similar_titles = [title for title, _ in fuzzy_matches(get_fuzzy_indexes(df)['job_title'], text_query)]
+        if similar_titles:
+            query_mask = value_mask(text_index, 'job_title', similar_titles)
+    if query_mask is not None:
+        masks['text'] = query_mask
+
+    if min_salary > 0:
+        salary = df['salary_usd'] if salary is None else salary
+        masks['salary'] = np.asarray(salary >= min_salary)
+    sorted_indexes = get_sorted_indexes(df)
+    masks.update(date_masks(sorted_indexes, date_ranges, open_on))
+    masks.update(range_masks(sorted_indexes, ranges))
+    return masks, similar_titles
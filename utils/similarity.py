@@ -0,0 +1,104 @@
+# utils/similarity.py
+"""
+"Similar jobs" lookup over skill sets and categorical features.
+
+Similarity between a reference job and every other posting combines:
+
+- the Jaccard similarity of their required skill sets, computed on skill
+  sets packed into bitmaps (np.packbits), so intersections and unions are
+  byte-wise AND/OR plus a popcount lookup table over a few bytes per job,
+- the weighted share of categorical features (job title, experience level,
+  industry, ...) they have in common, compared as integer codes.
+
+The whole dataset is scored in one vectorized pass and the nearest jobs
+are selected with ranking.top_k, so a lookup stays well under a second at
+millions of postings without an approximate (MinHash/LSH) index.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.cache import cached
+from utils.data_access import get_skill_index
+from utils.filter_engine import encode_column
+from utils.ranking import top_k
+
+SKILL_WEIGHT = 0.6
+FEATURE_WEIGHTS = {
+    'job_title': 0.35, 'experience_level': 0.2, 'industry': 0.15,
+    'employment_type': 0.1, 'work_type': 0.1, 'company_size': 0.1,
+}
+
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+@dataclass(frozen=True)
+class SimilarityIndex:
+    """Per-version similarity features shared by all sessions (read-only)."""
+    skill_bits: np.ndarray
+    skill_counts: np.ndarray
+    codes: dict
+
+
+def get_similarity_index(df):
+    """
+    Return the cached similarity index for the dataset version of df.
+
+    Returns:
+        SimilarityIndex: Packed skill bitmaps (jobs x bytes), skills per job
+        and integer codes of each of FEATURE_WEIGHTS
+    """
+    return _build_similarity_index(df, df.attrs['dataset_version'])
+
+
+@cached('similarity_index', disk=True)
+def _build_similarity_index(_df, version):
+    _, skill_matrix = get_skill_index(_df)
+    codes = {column: encode_column(_df[column])[1] for column in FEATURE_WEIGHTS if column in _df.columns}
+    return SimilarityIndex(
+        skill_bits=np.packbits(skill_matrix, axis=1),
+        skill_counts=skill_matrix.sum(axis=1).astype(np.int32),
+        codes=codes,
+    )
+
+
+def similarity_scores(index, row):
+    """
+    Similarity of every job to the job at position row.
+
+    Returns:
+        np.ndarray: Scores in [0, 1]; the reference job itself scores 1
+    """
+    bits = index.skill_bits
+    shared = POPCOUNT[bits & bits[row]].sum(axis=1, dtype=np.int32)
+    union = index.skill_counts + index.skill_counts[row] - shared
+    jaccard = np.divide(shared, union, out=np.ones(len(bits)), where=union > 0)
+
+    features = np.zeros(len(bits))
+    for column, column_codes in index.codes.items():
+        features += FEATURE_WEIGHTS[column] * (column_codes == column_codes[row])
+    features /= sum(FEATURE_WEIGHTS[column] for column in index.codes) or 1
+
+    return SKILL_WEIGHT * jaccard + (1 - SKILL_WEIGHT) * features
+
+
+def similar_jobs(index, row, k=10, candidates=None):
+    """
+    The k jobs most similar to the job at position row.
+
+    Args:
+        index (SimilarityIndex): From get_similarity_index
+        row (int): Row position of the reference job
+        k (int): Number of similar jobs to return
+        candidates (np.ndarray): Optional row positions to search within
+            (e.g. the current filter matches); defaults to all jobs
+
+    Returns:
+        tuple: (row positions, scores), most similar first, excluding row
+    """
+    scores = similarity_scores(index, row)
+    if candidates is None:
+        candidates = np.arange(len(scores))
+    candidates = candidates[candidates != row]
+    return top_k(candidates, scores[candidates], k)
@@ -0,0 +1,176 @@
+# utils/sketches.py
+"""
+Mergeable quantile sketches of salaries per group.
+
+Salary percentiles (box plots, median KPIs) would otherwise sort whole
+groups of postings on every request. Instead, salaries are summarized once
+per snapshot into t-digest style sketches: each group's values become a
+few dozen centroids (mean, weight), small near the tails and larger in the
+middle (the k1 arcsine scale function), so quantiles are accurate to a
+fraction of a percent of rank with tails better than the middle.
+
+Sketches are kept per cell of SKETCH_COLUMNS (experience level x company
+location x job title). Centroids of any set of cells can be concatenated
+and re-compressed, so the sketch of a whole experience level, of a filter
+selection such as "Senior jobs in Germany or India", or of the entire
+dataset is a merge of cell sketches without touching the postings. The
+first and last centroid of every sketch are single values, so minimum and
+maximum stay exact through merges.
+
+Sketches are built at publish time by streaming the postings in chunks
+(each chunk compressed, then merged into the running sketches) and stored
+next to the snapshot as a long table: one row per centroid with the cell's
+SKETCH_COLUMNS values, 'mean' and 'weight'.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.sampling import weighted_quantiles
+
+SKETCH_COLUMNS = ['experience_level', 'company_location', 'job_title']
+SKETCH_VALUE = 'salary_usd'
+# t-digest compression: at most about this many centroids per sketch
+COMPRESSION = 100
+CHUNK_ROWS = 1_000_000
+
+
+@dataclass(frozen=True)
+class QuantileSketch:
+    """Centroids of one sketch, sorted by mean (read-only)."""
+    means: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+
+def compress(cells, means, weights, compression=COMPRESSION):
+    """
+    Merge the centroids of each cell into at most about compression
+    centroids (t-digest with the k1 scale function).
+
+    Args:
+        cells (np.ndarray): Integer cell of each centroid
+        means (np.ndarray): Centroid means (raw values for a new sketch)
+        weights (np.ndarray): Centroid weights (1 for raw values)
+        compression (int): Size bound, see COMPRESSION
+
+    Returns:
+        tuple: (cells, means, weights) sorted by cell, then mean
+    """
+    order = np.lexsort((means, cells))
+    cells, means, weights = cells[order], np.asarray(means, dtype=float)[order], np.asarray(weights, dtype=float)[order]
+    if not len(cells):
+        return cells, means, weights
+
+    new_cell = np.r_[True, cells[1:] != cells[:-1]]
+    starts = np.flatnonzero(new_cell)
+    ends = np.r_[starts[1:], len(cells)] - 1
+    sizes = np.diff(np.r_[starts, len(cells)])
+    before = np.cumsum(weights) - weights
+    offset = np.repeat(before[starts], sizes)
+    total = np.repeat(np.add.reduceat(weights, starts), sizes)
+
+    # Bucket of each centroid on the k scale (integers within +-compression/4);
+    # a bucket's centroids merge into one
+    q = (before - offset + weights / 2) / total
+    bucket = np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1)).astype(np.int64)
+    # Minimum and maximum of every cell stay single centroids
+    bucket[starts] = -compression
+    bucket[ends] = compression
+
+    boundaries = np.flatnonzero(new_cell | np.r_[True, bucket[1:] != bucket[:-1]])
+    merged_weights = np.add.reduceat(weights, boundaries)
+    merged_means = np.add.reduceat(means * weights, boundaries) / merged_weights
+    return cells[boundaries], merged_means, merged_weights
+
+
+def build_sketches(df, compression=COMPRESSION):
+    """
+    Salary sketches per cell of SKETCH_COLUMNS, built in chunks.
+
+    Returns:
+        pd.DataFrame: One row per centroid: SKETCH_COLUMNS (categorical),
+        'mean' and 'weight'
+    """
+    keys, cells, means, weights = {}, [], [], []
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        values = pd.to_numeric(chunk[SKETCH_VALUE], errors='coerce').to_numpy(dtype=float)
+        grouped = chunk.groupby([chunk[column].astype(object).fillna('') for column in SKETCH_COLUMNS], sort=False)
+        # Chunk-local groups -> cells shared by all chunks
+        cell_of_group = np.array([keys.setdefault(key, len(keys)) for key in grouped.size().index], dtype=np.int64)
+        chunk_cells = cell_of_group[grouped.ngroup().to_numpy()]
+        present = ~np.isnan(values)
+        chunk_cells, chunk_means, chunk_weights = compress(
+            chunk_cells[present], values[present], np.ones(present.sum()), compression
+        )
+        # Merge into the running sketches
+        cells, means, weights = compress(
+            np.concatenate([cells, chunk_cells]).astype(np.int64),
+            np.concatenate([means, chunk_means]),
+            np.concatenate([weights, chunk_weights]),
+            compression
+        )
+
+    key_table = pd.DataFrame(list(keys), columns=SKETCH_COLUMNS) if keys else pd.DataFrame(columns=SKETCH_COLUMNS)
+    table = key_table.iloc[np.asarray(cells, dtype=np.int64)].reset_index(drop=True)
+    for column in SKETCH_COLUMNS:
+        table[column] = table[column].astype('category')
+    table['mean'] = np.asarray(means, dtype=float)
+    table['weight'] = np.asarray(weights, dtype=float)
+    return table
+
+
+def group_sketches(sketches, by=None, selections=None, compression=COMPRESSION):
+    """
+    Merge cell sketches into one sketch per group.
+
+    Args:
+        sketches (pd.DataFrame): Table from build_sketches
+        by (str): One of SKETCH_COLUMNS to group by, or None for a single
+            sketch of everything selected
+        selections (dict): SKETCH_COLUMNS -> raw values to keep (empty or
+            missing: all), like filter selections
+        compression (int): Size bound of the merged sketches
+
+    Returns:
+        dict: Group value (None without by) -> QuantileSketch; groups
+        without postings are left out
+    """
+    keep = np.ones(len(sketches), dtype=bool)
+    for column, values in (selections or {}).items():
+        if values:
+            keep &= sketches[column].astype(object).isin(values).to_numpy()
+    selected = sketches[keep]
+    if by is None:
+        codes, groups = np.zeros(len(selected), dtype=np.int64), [None]
+    else:
+        codes, groups = pd.factorize(selected[by].astype(object))
+    cells, means, weights = compress(codes, selected['mean'].to_numpy(), selected['weight'].to_numpy(), compression)
+    starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]]) if len(cells) else np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(cells)]
+    return {
+        groups[cells[start]]: QuantileSketch(means[start:end], weights[start:end])
+        for start, end in zip(starts, ends)
+    }
+
+
+def sketch_quantiles(sketch, quantiles):
+    """
+    Estimated quantiles of a sketch.
+
+    Interpolates between centroid means placed at the middle of their
+    weight; the single-value end centroids pin the exact minimum and maximum.
+
+    Args:
+        sketch (QuantileSketch): From group_sketches
+        quantiles (list): Quantiles in [0, 1]
+
+    Returns:
+        np.ndarray: One value per quantile
+    """
+    return weighted_quantiles(sketch.means, sketch.weights, quantiles)
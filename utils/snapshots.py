@@ -0,0 +1,466 @@
+# utils/snapshots.py
+"""
+Immutable, versioned dataset snapshots with an atomic "current" pointer.
+
+Ingested datasets are published as read-only parquet snapshots under
+data/snapshots/<version>/. Postings are stored Hive-style, partitioned by
+posting month and company location:
+
+    <version>/jobs/posting_month=2024-05/company_location=Germany/part-0.parquet
+
+so readers restricted to a few locations or a date range (read_partitions,
+and the DuckDB/Polars query engines) only open the matching files. A
+_row column keeps each posting's position in the full dataset, which
+read_snapshot restores. Snapshots published before the partitioned
+layout (a single jobs.parquet) are still read.
+
+A snapshot is written into a temporary directory
+and renamed into place, then the CURRENT pointer file is replaced with
+os.replace, so readers always see either the old or the new version and
+never a half-written one. Each snapshot also stores the precomputed trend
+rollups (see utils/rollups.py), a stratified sample of the postings
+(see utils/sampling.py) and salary quantile sketches (see
+utils/sketches.py) built at publish time. Running app processes read the pointer on every
+rerun and switch to a new version on their next rerun without a restart.
+
+Publishing is serialized across processes with a lock file, so when the
+source CSVs change exactly one process re-ingests them and every other
+process simply picks up the new pointer.
+
+Usage from the command line:
+    python -m utils.snapshots publish [SOURCE]
+    python -m utils.snapshots list
+    python -m utils.snapshots prune --keep 3
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.rollups import build_rollups
+from utils.sampling import build_sample
+from utils.sketches import build_sketches
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_DIR = 'data/snapshots'
+POINTER_FILE = 'CURRENT'
+DATA_FILE = 'jobs.parquet'
+PARTITIONS_DIR = 'jobs'
+PARTITION_COLUMNS = ['posting_month', 'company_location']
+ROW_COLUMN = '_row'
+ROLLUPS_FILE = 'rollups.parquet'
+SAMPLE_FILE = 'sample.parquet'
+SKETCHES_FILE = 'sketches.parquet'
+MANIFEST_FILE = 'manifest.json'
+
+# Source files modified more recently than this are assumed to still be
+# being written; the current snapshot keeps being served until they settle.
+SETTLE_SECONDS = 5
+
+
+def source_fingerprint(files):
+    """
+    Cheap fingerprint of the source files (path, size and mtime).
+
+    Args:
+        files (list): Source CSV paths
+
+    Returns:
+        str: Hex digest identifying this exact set of file contents
+    """
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        stat = os.stat(path)
+        digest.update(f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+
+def current_version(snapshot_dir=SNAPSHOT_DIR):
+    """Return the version the CURRENT pointer refers to, or None."""
+    try:
+        with open(os.path.join(snapshot_dir, POINTER_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(version, snapshot_dir=SNAPSHOT_DIR):
+    """Return the manifest dict stored with a snapshot version."""
+    with open(os.path.join(snapshot_dir, version, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def data_path(version, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Location of a snapshot version's postings.
+
+    Returns:
+        tuple: (path, partitioned). For partitioned snapshots path is a
+        glob over the Hive partition files, otherwise the single parquet
+        file of older snapshots.
+    """
+    directory = os.path.join(snapshot_dir, version, PARTITIONS_DIR)
+    if os.path.isdir(directory):
+        return os.path.join(directory, '**', '*.parquet'), True
+    return os.path.join(snapshot_dir, version, DATA_FILE), False
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+
+    return pds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive')
+
+
+def _write_partitions(df, directory):
+    """Write df as a Hive-partitioned parquet dataset under directory."""
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+
+    table = pa.Table.from_pandas(df.assign(**{
+        ROW_COLUMN: np.arange(len(df), dtype=np.int64),
+        'posting_month': df['posting_date'].dt.strftime('%Y-%m'),
+        'company_location': df['company_location'].astype(object),
+    }), preserve_index=False)
+    pds.write_dataset(
+        table, directory, format='parquet', partitioning=_partitioning(),
+        basename_template='part-{i}.parquet', max_partitions=1_000_000
+    )
+
+
+def read_partitions(version, snapshot_dir=SNAPSHOT_DIR, locations=None, start=None, end=None):
+    """
+    Read the postings of some locations and/or a posting date range,
+    opening only the partition files that can contain them.
+
+    Args:
+        version (str): Snapshot version
+        snapshot_dir (str): Root directory holding all snapshots
+        locations (list): company_location values, None for all
+        start, end: Inclusive posting_date bounds (anything pd.Timestamp
+            accepts), None for open-ended
+
+    Returns:
+        pd.DataFrame: Matching postings in dataset order, with the column
+        order and categorical columns of the published dataset
+    """
+    import pyarrow.dataset as pds
+
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    path, partitioned = data_path(version, snapshot_dir)
+
+    if not partitioned:
+        df = pd.read_parquet(path)
+        if locations is None and start is None and end is None:
+            return df
+        mask = np.ones(len(df), dtype=bool)
+        if locations is not None:
+            mask &= df['company_location'].isin(locations).to_numpy()
+        if start is not None:
+            mask &= (df['posting_date'] >= start).to_numpy()
+        if end is not None:
+            mask &= (df['posting_date'] <= end).to_numpy()
+        return df[mask].reset_index(drop=True)
+
+    # Conditions on partition columns prune whole files; the posting_date
+    # bounds then filter rows within the boundary months
+    conditions = []
+    if locations is not None:
+        conditions.append(pds.field('company_location').isin([str(location) for location in locations]))
+    if start is not None:
+        conditions.append(pds.field('posting_month') >= f'{start:%Y-%m}')
+        conditions.append(pds.field('posting_date') >= start.to_datetime64())
+    if end is not None:
+        conditions.append(pds.field('posting_month') <= f'{end:%Y-%m}')
+        conditions.append(pds.field('posting_date') <= end.to_datetime64())
+    condition = None
+    for clause in conditions:
+        condition = clause if condition is None else condition & clause
+
+    dataset = pds.dataset(
+        os.path.join(snapshot_dir, version, PARTITIONS_DIR), format='parquet', partitioning=_partitioning()
+    )
+    manifest = read_manifest(version, snapshot_dir)
+    df = dataset.to_table(filter=condition).sort_by(ROW_COLUMN).to_pandas()[manifest['columns']]
+    for column in manifest['categorical_columns']:
+        # Partition files each carry their own dictionary; restore one
+        # sorted dictionary per column like the ingested dataset
+        df[column] = df[column].astype(object).astype('category')
+    return df
+
+
+def read_snapshot(version, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load a snapshot version.
+
+    Returns:
+        pd.DataFrame: The dataset, with ``attrs['dataset_version']`` and
+        ``attrs['ingest_stats']`` set from the manifest
+    """
+    df = read_partitions(version, snapshot_dir)
+    df.attrs['dataset_version'] = version
+    df.attrs['ingest_stats'] = read_manifest(version, snapshot_dir).get('ingest_stats', {})
+    return df
+
+
+def read_rollups(version, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load the trend rollups stored with a snapshot version.
+
+    Returns:
+        pd.DataFrame: Rollup table, or None for snapshots published before
+        rollups were stored
+    """
+    path = os.path.join(snapshot_dir, version, ROLLUPS_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def read_sample(version, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load the stratified sample stored with a snapshot version.
+
+    Returns:
+        pd.DataFrame: Sample (see sampling.build_sample), or None for
+        snapshots published before samples were stored
+    """
+    path = os.path.join(snapshot_dir, version, SAMPLE_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def read_sketches(version, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load the salary quantile sketches stored with a snapshot version.
+
+    Returns:
+        pd.DataFrame: Centroid table (see sketches.build_sketches), or None
+        for snapshots published before sketches were stored
+    """
+    path = os.path.join(snapshot_dir, version, SKETCHES_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def list_versions(snapshot_dir=SNAPSHOT_DIR):
+    """Return all published versions, oldest first."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(snapshot_dir)
+        if os.path.isfile(os.path.join(snapshot_dir, name, MANIFEST_FILE))
+    )
+
+
+def publish_snapshot(df, snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """
+    Write df, its trend rollups, stratified sample and salary sketches as a
+    new immutable snapshot and point CURRENT at it.
+
+    Args:
+        df (pd.DataFrame): Dataset to publish
+        snapshot_dir (str): Root directory holding all snapshots
+        manifest (dict): Extra metadata stored in manifest.json
+
+    Returns:
+        str: The new version identifier
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    manifest = dict(manifest or {})
+    created = datetime.now(timezone.utc)
+    content_id = hashlib.sha256(
+        f"{manifest.get('source_fingerprint', '')}|{len(df)}|{uuid.uuid4()}".encode()
+    ).hexdigest()[:8]
+    version = f"v{created:%Y%m%dT%H%M%S}-{content_id}"
+
+    staging = os.path.join(snapshot_dir, f'.tmp-{uuid.uuid4().hex}')
+    os.makedirs(staging)
+    try:
+        _write_partitions(df, os.path.join(staging, PARTITIONS_DIR))
+        build_rollups(df).to_parquet(os.path.join(staging, ROLLUPS_FILE), index=False)
+        sample = build_sample(df)
+        sample.to_parquet(os.path.join(staging, SAMPLE_FILE), index=False)
+        sketches = build_sketches(df)
+        sketches.to_parquet(os.path.join(staging, SKETCHES_FILE), index=False)
+        manifest.update({
+            'version': version, 'created': created.isoformat(), 'rows': len(df),
+            'layout': 'hive', 'partition_columns': PARTITION_COLUMNS,
+            'columns': list(df.columns),
+            'categorical_columns': [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)],
+            'sample_rows': len(sample),
+            'sketch_centroids': len(sketches),
+        })
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.rename(staging, os.path.join(snapshot_dir, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_pointer(version, snapshot_dir)
+    return version
+
+
+def _write_pointer(version, snapshot_dir):
+    tmp_pointer = os.path.join(snapshot_dir, f'.{POINTER_FILE}.{uuid.uuid4().hex}')
+    with open(tmp_pointer, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, os.path.join(snapshot_dir, POINTER_FILE))
+
+
+def prune_snapshots(keep=3, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Delete old snapshots, keeping the newest `keep` and the current one.
+
+    Processes still serving a pruned version keep their in-memory copy;
+    only versions that are never read again should be pruned.
+
+    Returns:
+        list: Removed versions
+    """
+    current = current_version(snapshot_dir)
+    versions = list_versions(snapshot_dir)
+    removed = [v for v in versions[:-keep] if v != current] if keep else [v for v in versions if v != current]
+    for version in removed:
+        shutil.rmtree(os.path.join(snapshot_dir, version), ignore_errors=True)
+    return removed
+
+
+@contextmanager
+def _publish_lock(snapshot_dir):
+    """Exclusive inter-process lock around ingest + publish."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(os.path.join(snapshot_dir, '.lock'), 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def ensure_snapshot(files, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Return the snapshot version for the given source files, ingesting and
+    publishing a new snapshot first if the sources changed.
+
+    Args:
+        files (list): Source CSV paths
+        snapshot_dir (str): Root directory holding all snapshots
+
+    Returns:
+        str: Dataset version to serve
+    """
+    fingerprint = source_fingerprint(files)
+    version = current_version(snapshot_dir)
+    if version and _manifest_fingerprint(version, snapshot_dir) == fingerprint:
+        return version
+
+    newest_mtime = max(os.stat(path).st_mtime for path in files)
+    if version and time.time() - newest_mtime < SETTLE_SECONDS:
+        # Sources are still being written; keep serving the current snapshot
+        return version
+
+    with _publish_lock(snapshot_dir):
+        # Another process may have published while we waited for the lock
+        version = current_version(snapshot_dir)
+        if version and _manifest_fingerprint(version, snapshot_dir) == fingerprint:
+            return version
+
+        from utils.data_loader import ingest_dataset
+        df, stats = ingest_dataset(files)
+        return publish_snapshot(df, snapshot_dir, manifest={
+            'source_files': sorted(files),
+            'source_fingerprint': fingerprint,
+            'ingest_stats': stats,
+        })
+
+
+_fingerprints = {}
+
+
+def _manifest_fingerprint(version, snapshot_dir):
+    # Manifests are immutable, so each one is read at most once per process
+    key = (snapshot_dir, version)
+    if key not in _fingerprints:
+        try:
+            _fingerprints[key] = read_manifest(version, snapshot_dir).get('source_fingerprint')
+        except FileNotFoundError:
+            return None
+    return _fingerprints[key]
+
+
+def describe_ingest(stats):
+    """One-line summary of a manifest's ingest_stats, with rows/sec per worker."""
+    workers = ', '.join(f"{worker['rows_per_sec']:,.0f}" for worker in stats.get('workers', {}).values())
+    # Manifests written before the polars ingest engine carry no 'engine'
+    return (
+        f"ingest {stats['rows_per_sec']:,.0f} rows/s on {stats.get('engine', 'pandas')}, "
+        f"per worker: {workers or 'n/a'}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned job dataset snapshots")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="Ingest SOURCE and publish it as the current snapshot")
+    publish.add_argument('source', nargs='?', default='data/ai_job_dataset.csv',
+                         help="CSV file, quoted glob pattern or directory")
+    commands.add_parser('list', help="List published versions")
+    prune = commands.add_parser('prune', help="Delete old versions")
+    prune.add_argument('--keep', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        from utils.data_loader import ingest_dataset, resolve_dataset_files
+        files = resolve_dataset_files(args.source)
+        if not files:
+            parser.error(f"No CSV files found at {args.source}")
+        with _publish_lock(args.snapshot_dir):
+            df, stats = ingest_dataset(files)
+            version = publish_snapshot(df, args.snapshot_dir, manifest={
+                'source_files': sorted(files),
+                'source_fingerprint': source_fingerprint(files),
+                'ingest_stats': stats,
+            })
+        print(f"Published {version} ({len(df):,} rows, {describe_ingest(stats)})")
+    elif args.command == 'list':
+        current = current_version(args.snapshot_dir)
+        for version in list_versions(args.snapshot_dir):
+            manifest = read_manifest(version, args.snapshot_dir)
+            line = f"{'*' if version == current else ' '} {version}  {manifest.get('rows', 0):>12,} rows"
+            if manifest.get('ingest_stats'):
+                line += f"  {describe_ingest(manifest['ingest_stats'])}"
+            print(line)
+    elif args.command == 'prune':
+        for version in prune_snapshots(args.keep, args.snapshot_dir):
+            print(f"Removed {version}")
+
+
+if __name__ == '__main__':
+    main()
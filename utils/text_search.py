@@ -0,0 +1,180 @@
+# utils/text_search.py
+"""
+Free-text search over job titles, company names and industries.
+
+The searched columns have few distinct values compared to the number of
+postings, and every posting with the same (job_title, company_name,
+industry) combination matches a query identically. The index is therefore
+built over distinct combinations instead of rows:
+
+- an inverted index maps each token to the (field, value) pairs containing
+  it; tokens are kept sorted so prefix matches for type-ahead are a binary
+  search,
+- each combination records the value it has in every field, and each row
+  records its combination.
+
+A query is evaluated against the combinations only, so its cost does not
+depend on the number of postings. Turning the result into a row mask is a
+single gather over the row -> combination codes.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.cache import cached
+from utils.filter_engine import encode_column
+
+SEARCH_FIELDS = ['job_title', 'company_name', 'industry']
+TOKEN_PATTERN = re.compile(r'[a-z0-9+#]+')
+
+
+def tokenize(text):
+    """Lowercase word tokens of text ('C++' and 'C#' stay whole)."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+@dataclass(frozen=True)
+class TextIndex:
+    """Per-version text search structures shared by all sessions (read-only)."""
+    values: dict
+    tokens: np.ndarray
+    postings: list
+    combo_values: dict
+    combo_counts: np.ndarray
+    row_combo: np.ndarray
+
+
+def get_text_index(df):
+    """
+    Return the cached text index for the dataset version of df.
+
+    Returns:
+        TextIndex: values (field -> sorted distinct values), sorted tokens
+        with their (field, value id) postings, the value ids and row count of
+        each distinct combination, and the combination of every row
+    """
+    return _build_text_index(df, df.attrs['dataset_version'])
+
+
+@cached('text_index', disk=True)
+def _build_text_index(_df, version):
+    values, codes, token_map = {}, {}, {}
+    for field in SEARCH_FIELDS:
+        values[field], codes[field] = encode_column(_df[field])
+        for value_id, value in enumerate(values[field]):
+            for token in set(tokenize(value)):
+                token_map.setdefault(token, []).append((field, value_id))
+
+    # One integer key per row identifies its combination of field values
+    shape = tuple(len(values[field]) + 1 for field in SEARCH_FIELDS)
+    keys = np.ravel_multi_index([codes[field] for field in SEARCH_FIELDS], shape)
+    combos, row_combo = np.unique(keys, return_inverse=True)
+    combo_values = dict(zip(SEARCH_FIELDS, np.unravel_index(combos, shape)))
+
+    tokens = sorted(token_map)
+    return TextIndex(
+        values=values,
+        tokens=np.array(tokens),
+        postings=[token_map[token] for token in tokens],
+        combo_values=combo_values,
+        combo_counts=np.bincount(row_combo, minlength=len(combos)),
+        row_combo=row_combo.astype(np.int32),
+    )
+
+
+def _prefix_postings(index, token):
+    """(field, value id) pairs of every indexed token starting with token."""
+    start, stop = np.searchsorted(index.tokens, [token, token + '\uffff'])
+    return [pair for position in range(start, stop) for pair in index.postings[position]]
+
+
+def _token_combos(index, token):
+    """Bool mask over combinations having a field value matching token."""
+    allowed = {field: np.zeros(len(index.values[field]) + 1, dtype=bool) for field in SEARCH_FIELDS}
+    for field, value_id in _prefix_postings(index, token):
+        allowed[field][value_id] = True
+    matched = np.zeros(len(index.combo_counts), dtype=bool)
+    for field in SEARCH_FIELDS:
+        matched |= allowed[field][index.combo_values[field]]
+    return matched
+
+
+def match_combos(index, query):
+    """
+    Combinations matching a query.
+
+    Every query token must prefix-match a word of the job title, company
+    name or industry (not necessarily the same field).
+
+    Returns:
+        np.ndarray: Bool mask over combinations, or None for an empty query
+    """
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return None
+    matched = np.ones(len(index.combo_counts), dtype=bool)
+    for token in query_tokens:
+        matched &= _token_combos(index, token)
+    return matched
+
+
+def text_mask(index, query):
+    """
+    Row mask for a free-text query, to combine with the filter masks.
+
+    Returns:
+        np.ndarray: Bool mask over postings, or None for an empty query
+    """
+    matched = match_combos(index, query)
+    if matched is None:
+        return None
+    return matched[index.row_combo]
+
+
+def value_mask(index, field, selected):
+    """
+    Row mask of postings whose field has one of the selected values
+    (e.g. job titles found by fuzzy matching).
+
+    Returns:
+        np.ndarray: Bool mask over postings
+    """
+    allowed = np.zeros(len(index.values[field]) + 1, dtype=bool)
+    positions = {value: i for i, value in enumerate(index.values[field])}
+    allowed[[positions[value] for value in selected if value in positions]] = True
+    return allowed[index.combo_values[field]][index.row_combo]
+
+
+def suggestions(index, query, limit=8):
+    """
+    Type-ahead completions for the last (partial) word of a query.
+
+    Returns:
+        list: (field, value, matching postings) tuples for field values
+        completing the last query token among the query's matches, most
+        postings first
+    """
+    query_tokens = tokenize(query)
+    matched = match_combos(index, query)
+    if matched is None:
+        return []
+
+    candidates = {}
+    for field, value_id in _prefix_postings(index, query_tokens[-1]):
+        candidates.setdefault(field, set()).add(value_id)
+
+    # One pass per field: postings of the matched combinations per value
+    found = []
+    for field, value_ids in candidates.items():
+        counts = np.bincount(
+            index.combo_values[field][matched], weights=index.combo_counts[matched],
+            minlength=len(index.values[field]) + 1
+        ).astype(np.int64)
+        value_ids = np.fromiter(value_ids, dtype=np.int64)
+        value_ids = value_ids[counts[value_ids] > 0]
+        # Values are sorted, so id order breaks ties by value like the final sort
+        value_ids = value_ids[np.lexsort((value_ids, -counts[value_ids]))[:limit]]
+        found.extend((field, index.values[field][value_id], int(counts[value_id])) for value_id in value_ids)
+    found.sort(key=lambda item: (-item[2], item[1]))
+    return found[:limit]